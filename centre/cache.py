@@ -0,0 +1,59 @@
+"""
+Backend de cache fichiers avec éviction LRU.
+
+FileBasedCache de Django supprime des entrées AU HASARD quand MAX_ENTRIES est
+atteint : une entrée lue à chaque consultation peut disparaître avant une
+entrée jamais relue. Ici, chaque lecture réussie remet à jour la date de
+modification du fichier (l'expiration est stockée dans le fichier, pas dans
+sa date) et l'éviction retire les fichiers les moins récemment utilisés.
+LocMemCache, l'autre backend proposé, est déjà LRU.
+
+Le décompte des fichiers (un listage du répertoire) a lieu à chaque écriture dans
+FileBasedCache, ce qui rend l'écriture de milliers d'entrées quadratique. Il n'est
+fait ici qu'une fois toutes les MAX_ENTRIES / 100 écritures d'un processus :
+MAX_ENTRIES devient une borne souple, dépassée au plus de cet intervalle par worker.
+"""
+import os
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+_ABSENT = object()
+
+
+class FichiersLRUCache(FileBasedCache):
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._intervalle_cull = max(1, self._max_entries // 100)
+        self._ecritures = 0
+
+    def get(self, key, default=None, version=None):
+        valeur = super().get(key, _ABSENT, version)
+        if valeur is _ABSENT:
+            return default
+        try:
+            os.utime(self._key_to_file(key, version))
+        except FileNotFoundError:
+            pass  # supprimée entre-temps par un autre processus
+        return valeur
+
+    def _cull(self):
+        self._ecritures += 1
+        if self._ecritures % self._intervalle_cull:
+            return
+        fichiers = self._list_cache_files()
+        nombre = len(fichiers)
+        if nombre < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+
+        def derniere_utilisation(fichier):
+            try:
+                return os.path.getmtime(fichier)
+            except FileNotFoundError:
+                return 0
+
+        fichiers.sort(key=derniere_utilisation)
+        for fichier in fichiers[:nombre // self._cull_frequency]:
+            self._delete(fichier)
@@ -0,0 +1,40 @@
+"""
+Lecture des corps JSON de l'API par orjson (dépendance optionnelle, voir centre/renderers.py).
+
+Même résultat que JSONParser de DRF. Tout corps qu'orjson refuse est relu par JSONParser,
+qui produit alors exactement la même erreur (ParseError) ou la même valeur (échappements
+de substituts isolés, 1e400...). Les nombres d'au moins 20 chiffres, qu'orjson lirait
+comme des flottants au-delà de 64 bits, passent aussi par JSONParser.
+"""
+import io
+import re
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from centre.renderers import ORJSONRenderer
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle : repli sur json
+    orjson = None
+
+_GRAND_NOMBRE = re.compile(rb'\d{20}')
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encodage = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encodage.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        corps = stream.read()
+        if not _GRAND_NOMBRE.search(corps):
+            try:
+                return orjson.loads(corps)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse(io.BytesIO(corps), media_type, parser_context)
@@ -0,0 +1,50 @@
+"""
+Rendu JSON de l'API par orjson (dépendance optionnelle : pip install orjson).
+
+orjson encode nativement datetime, date, time, UUID (numero_patient), dict et list,
+y compris les ReturnDict/ReturnList de DRF ; Decimal (glycemie, poids) et les autres
+types passent par l'encodeur de DRF, comme avec JSONRenderer. La sortie est celle de
+JSONRenderer, octet pour octet (users/tests.py), à deux écritures près, de même valeur :
+- flottants hors de [1e-4, 1e16[ : '1e16' au lieu de '1e+16', '0.00001' au lieu de '1e-05' ;
+- NaN et infinis : null, là où JSONRenderer (STRICT_JSON) lève une erreur.
+Repli sur JSONRenderer sans orjson, avec une indentation (API navigable, ?indent=),
+des réglages UNICODE_JSON / COMPACT_JSON / STRICT_JSON non standard, ou une valeur
+qu'orjson refuse (entier de plus de 64 bits...).
+"""
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle : repli sur json
+    orjson = None
+
+# Séparateurs de ligne que JSONRenderer échappe (JSON sous-ensemble strict de JavaScript)
+LS, PS = '\u2028'.encode(), '\u2029'.encode()
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def __init__(self):
+        super().__init__()
+        self._encodeur = self.encoder_class()
+
+    def _defaut(self, obj):
+        if type(obj) is Decimal:  # cas le plus fréquent, même conversion que l'encodeur DRF
+            return float(obj)
+        return self._encodeur.default(obj)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self._defaut, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if LS in ret or PS in ret:
+            ret = ret.replace(LS, b'\\u2028').replace(PS, b'\\u2029')
+        return ret
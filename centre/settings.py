@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 from pathlib import Path
+import sys
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -109,6 +110,47 @@ else:
     }
 
 
+# Caches
+# 'dossiers' : compteurs de version par patient et lectures API mises en cache
+# (medical_data/versions.py) ; 'analytique' : périodes closes des séries du tableau de
+# bord (medical_data/analytique.py) et compteurs des statistiques globales
+# (medical_data/stats.py). Les écritures les invalident dans le processus qui
+# les traite : avec un cache par processus, les autres workers gunicorn serviraient des
+# données périmées. Backend au choix, tous deux à éviction LRU :
+# DOSSIERS_CACHE=fichiers (défaut : partagé entre les workers d'une même machine, sous
+# DOSSIERS_CACHE_REPERTOIRE) ou memoire (un seul processus ; défaut avec DEBUG=True
+# et sous `manage.py test`, pour que les tests n'écrivent pas sur le disque ni ne se
+# partagent d'entrées entre deux exécutions).
+TESTS = sys.argv[1:2] == ['test']
+DOSSIERS_CACHE = os.environ.get('DOSSIERS_CACHE', 'memoire' if DEBUG or TESTS else 'fichiers')
+DOSSIERS_CACHE_REPERTOIRE = Path(os.environ.get('DOSSIERS_CACHE_REPERTOIRE', BASE_DIR / 'cache_dossiers'))
+
+
+def _cache_partage(nom):
+    if DOSSIERS_CACHE == 'memoire':
+        return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': nom}
+    return {'BACKEND': 'centre.cache.FichiersLRUCache', 'LOCATION': str(DOSSIERS_CACHE_REPERTOIRE / nom)}
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dossiers': {
+        **_cache_partage('dossiers'),
+        'TIMEOUT': int(os.environ.get('DOSSIERS_CACHE_SECONDES', 600)),
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('DOSSIERS_CACHE_ENTREES', 10000))},
+    },
+    # Périodes closes des séries du tableau de bord et statistiques globales, sans expiration :
+    # une année au jour pour les 4 métriques représente environ 1 500 entrées
+    'analytique': {
+        **_cache_partage('analytique'),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('ANALYTIQUE_CACHE_ENTREES', 50000))},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -127,6 +169,66 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hachage des mots de passe générés en masse (users/hachage.py)
+# HACHAGE_PROCESSUS : taille du pool de processus (0 = nombre de cœurs)
+# HACHAGE_ITERATIONS_DIFFEREES : itérations PBKDF2 du hachage différé, mis à niveau à la première connexion
+HACHAGE_PROCESSUS = int(os.environ.get('HACHAGE_PROCESSUS', 0))
+HACHAGE_ITERATIONS_DIFFEREES = 1000
+
+# Âge maximal (secondes) de l'instantané des statistiques globales avant recalcul complet
+STATS_FRAICHEUR_SECONDES = int(os.environ.get('STATS_FRAICHEUR_SECONDES', 300))
+
+# Agenda : horaires d'ouverture par jour de semaine (0 = lundi) et durée d'un créneau
+# (medical_data/agenda.py)
+HORAIRES_OUVERTURE = {
+    0: [('08:00', '12:00'), ('14:00', '18:00')],
+    1: [('08:00', '12:00'), ('14:00', '18:00')],
+    2: [('08:00', '12:00'), ('14:00', '18:00')],
+    3: [('08:00', '12:00'), ('14:00', '18:00')],
+    4: [('08:00', '12:00'), ('14:00', '18:00')],
+    5: [('08:00', '12:00')],
+}
+DUREE_CRENEAU_MINUTES = 30
+
+# Durée de vie maximale (secondes) du contexte en cache du tableau de bord patient
+TABLEAU_DE_BORD_CACHE_SECONDES = 600
+
+# Nombre d'éléments par page dans chaque section de l'historique patient
+HISTORIQUE_TAILLE_PAGE = 20
+
+# Nombre maximal de relevés par envoi d'un appareil connecté (ingestion par lots)
+INGESTION_RELEVES_MAX = 2000
+
+# Moteur d'alertes (medical_data/alertes.py) : seuils par défaut, par métrique
+# (min / max : bornes absolues ; variation : écart maximal entre deux relevés
+# successifs séparés de moins de ALERTES_VARIATION_HEURES). None : règle inactive.
+ALERTES_SEUILS_DEFAUT = {
+    'tension_systolique': {'min': 90, 'max': 180, 'variation': 40},
+    'tension_diastolique': {'min': 50, 'max': 110, 'variation': 30},
+    'glycemie': {'min': 0.7, 'max': 2.5, 'variation': 1.0},
+    'poids': {'min': None, 'max': None, 'variation': 3.0},
+}
+# Relevés évalués par une passe complète (heures) et horizon de la règle de variation
+ALERTES_FENETRE_HEURES = int(os.environ.get('ALERTES_FENETRE_HEURES', 72))
+ALERTES_VARIATION_HEURES = 48
+
+# Durée de vie (secondes) des rapports de cohortes en cache (medical_data/cohortes.py)
+COHORTES_CACHE_SECONDES = 3600
+
+# Recherche de patients (users/recherche.py) : 'auto' (FTS5 sous SQLite, trigrammes
+# sous PostgreSQL), 'fts5', 'trigrammes' ou 'simple'
+RECHERCHE_PATIENTS_BACKEND = os.environ.get('RECHERCHE_PATIENTS_BACKEND', 'auto')
+
+# Recherche plein texte des suivis (medical_data/recherche.py) : 'auto' (FTS5 sous SQLite,
+# configuration 'french' sous PostgreSQL), 'fts5', 'postgres' ou 'simple'
+RECHERCHE_SUIVIS_BACKEND = os.environ.get('RECHERCHE_SUIVIS_BACKEND', 'auto')
+
+# Autocomplétion de l'accueil (users/autocompletion.py), index en mémoire par processus :
+# délai (secondes) avant d'y ajouter les patients créés par d'autres processus, et entre
+# deux reconstructions complètes (modifications et suppressions faites ailleurs)
+AUTOCOMPLETION_PATIENTS_SECONDES = 30
+AUTOCOMPLETION_PATIENTS_RECONSTRUCTION = 600
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -164,5 +266,25 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         # Par défaut, n'autorise que les utilisateurs authentifiés
         'rest_framework.permissions.IsAuthenticated',
-    ]
-}
\ No newline at end of file
+    ],
+    # JSON encodé et lu par orjson s'il est installé, sinon par json comme JSONRenderer/JSONParser
+    # (centre/renderers.py, centre/parsers.py) ; API_JSON_RAPIDE=0 : classes standard de DRF
+    'DEFAULT_RENDERER_CLASSES': [
+        'centre.renderers.ORJSONRenderer' if os.environ.get('API_JSON_RAPIDE', '1') == '1'
+        else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'centre.parsers.ORJSONParser' if os.environ.get('API_JSON_RAPIDE', '1') == '1'
+        else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Taille de page par défaut des listes paginées par curseur (users/api/pagination.py)
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 50))
+
+# Listes patients, suivis et rendez-vous lues par values_list sans instancier les modèles
+# (users/api/rapide.py) ; False : passage par les sérialiseurs DRF
+API_LISTES_RAPIDES = os.environ.get('API_LISTES_RAPIDES', '1') == '1'
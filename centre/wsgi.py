@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'centre.settings')
 
 application = get_wsgi_application()
+
+# Index d'autocomplétion des patients construit avant la première requête
+from django.db import DatabaseError  # noqa: E402
+from users import autocompletion  # noqa: E402
+
+try:
+    autocompletion.prechauffer()
+except DatabaseError:
+    pass  # base pas encore migrée : construit à la première consultation
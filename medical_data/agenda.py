@@ -0,0 +1,183 @@
+"""
+Agenda des rendez-vous : fenêtres jour / semaine / mois, créneaux libres
+et réservation sans conflit.
+
+Les fenêtres sont converties en plages demi-ouvertes [début, fin) sur
+date_heure, en datetimes aware du fuseau courant. Contrairement à
+date_heure__date=..., qui applique une conversion de date à la colonne,
+ces plages peuvent utiliser l'index rdv_date_statut_idx (ou
+rdv_praticien_date_idx quand un praticien est précisé).
+
+Disponibilités : les créneaux sont découpés dans settings.HORAIRES_OUVERTURE
+par pas de settings.DUREE_CRENEAU_MINUTES. Les rendez-vous existants de la
+plage sont chargés en UNE requête et rangés dans une liste triée de débuts
+d'occupation ; chaque créneau candidat est testé par recherche dichotomique.
+Un rendez-vous occupe [date_heure, date_heure + durée d'un créneau).
+La ressource réservée est le praticien (ou l'agenda commun du centre
+quand aucun praticien n'est précisé).
+
+Concurrence : les contraintes d'unicité partielles de RendezVous
+(rdv_creneau_praticien_unique / rdv_creneau_centre_unique) garantissent
+qu'un seul rendez-vous actif occupe un créneau donné, même si deux
+réservations arrivent au même instant ; la seconde reçoit CreneauIndisponible.
+"""
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from medical_data.analytique import debut_periode, periode_suivante
+from medical_data.models import RendezVous
+
+VUES = ('jour', 'semaine', 'mois')
+
+
+def _instant(jour):
+    return timezone.make_aware(datetime.combine(jour, time.min))
+
+
+def fenetre(jour, vue='jour'):
+    """(début, fin) aware de la vue contenant `jour` ; fin exclue."""
+    if vue not in VUES:
+        raise ValueError(f"Vue inconnue : {vue}")
+    debut = debut_periode(jour, vue)
+    return _instant(debut), _instant(periode_suivante(debut, vue))
+
+
+def filtrer(queryset, debut, fin, statut=None, praticien_id=None):
+    """Restreint un queryset de RendezVous à [debut, fin) et aux filtres optionnels."""
+    queryset = queryset.filter(date_heure__gte=debut, date_heure__lt=fin)
+    if statut:
+        queryset = queryset.filter(statut__in=statut.split(','))
+    if praticien_id:
+        queryset = queryset.filter(praticien_id=praticien_id)
+    return queryset
+
+
+# ----------------------------------------------------------------------
+# DISPONIBILITÉS ET RÉSERVATION
+# ----------------------------------------------------------------------
+
+class CreneauInvalide(ValueError):
+    """Heure hors des horaires d'ouverture ou non alignée sur la grille des créneaux."""
+
+
+class CreneauIndisponible(Exception):
+    """Le créneau est déjà occupé par un rendez-vous actif."""
+
+
+# Statuts qui n'occupent plus de créneau
+STATUTS_LIBERES = ['A']
+
+
+def duree_creneau():
+    return timedelta(minutes=getattr(settings, 'DUREE_CRENEAU_MINUTES', 30))
+
+
+def _plages_ouverture(jour):
+    """Plages [début, fin) aware d'ouverture du centre pour `jour`."""
+    plages = []
+    for debut, fin in getattr(settings, 'HORAIRES_OUVERTURE', {}).get(jour.weekday(), []):
+        plages.append((
+            timezone.make_aware(datetime.combine(jour, time.fromisoformat(debut))),
+            timezone.make_aware(datetime.combine(jour, time.fromisoformat(fin))),
+        ))
+    return plages
+
+
+def creneaux_ouverture(debut, fin):
+    """Tous les débuts de créneaux d'ouverture dans [debut, fin)."""
+    duree = duree_creneau()
+    creneaux = []
+    jour = timezone.localdate(debut)
+    while _instant(jour) < fin:
+        for ouverture, fermeture in _plages_ouverture(jour):
+            courant = ouverture
+            while courant + duree <= fermeture:
+                if debut <= courant < fin:
+                    creneaux.append(courant)
+                courant += duree
+        jour += timedelta(days=1)
+    return creneaux
+
+
+def _actifs(praticien_id):
+    queryset = RendezVous.objects.exclude(statut__in=STATUTS_LIBERES)
+    if praticien_id:
+        return queryset.filter(praticien_id=praticien_id)
+    return queryset.filter(praticien__isnull=True)
+
+
+class Occupations:
+    """Débuts des rendez-vous actifs d'une plage, triés, pour tester les chevauchements en O(log n)."""
+
+    def __init__(self, debuts, duree):
+        self.debuts = sorted(debuts)
+        self.duree = duree
+
+    @classmethod
+    def charger(cls, debut, fin, praticien_id=None):
+        duree = duree_creneau()
+        debuts = _actifs(praticien_id).filter(
+            date_heure__gt=debut - duree, date_heure__lt=fin,
+        ).values_list('date_heure', flat=True)
+        return cls(debuts, duree)
+
+    def chevauche(self, debut):
+        """Un rendez-vous commence-t-il dans ]debut - durée, debut + durée[ ?"""
+        i = bisect_right(self.debuts, debut - self.duree)
+        return i < len(self.debuts) and self.debuts[i] < debut + self.duree
+
+
+def creneaux_libres(debut, fin, praticien_id=None):
+    """Créneaux libres et futurs de [debut, fin) : une seule requête, quel que soit le nombre de créneaux."""
+    debut = max(debut, timezone.now())
+    occupations = Occupations.charger(debut, fin, praticien_id)
+    return [c for c in creneaux_ouverture(debut, fin) if not occupations.chevauche(c)]
+
+
+def verifier_creneau(date_heure):
+    """Lève CreneauInvalide si `date_heure` n'est pas un début de créneau d'ouverture."""
+    date_heure = timezone.localtime(date_heure)
+    if date_heure not in creneaux_ouverture(date_heure, date_heure + duree_creneau()):
+        raise CreneauInvalide(
+            f"Créneau invalide : choisissez un horaire d'ouverture, par pas de "
+            f"{getattr(settings, 'DUREE_CRENEAU_MINUTES', 30)} minutes."
+        )
+
+
+def verifier_disponibilite(date_heure, praticien_id=None, exclure_pk=None):
+    """Lève CreneauInvalide ou CreneauIndisponible."""
+    verifier_creneau(date_heure)
+    duree = duree_creneau()
+    conflits = _actifs(praticien_id).filter(
+        date_heure__gt=date_heure - duree, date_heure__lt=date_heure + duree,
+    )
+    if exclure_pk is not None:
+        conflits = conflits.exclude(pk=exclure_pk)
+    if conflits.exists():
+        raise CreneauIndisponible("Ce créneau vient d'être réservé. Veuillez en choisir un autre.")
+
+
+def enregistrer(sauvegarde, date_heure, praticien_id=None, exclure_pk=None):
+    """
+    Vérifie le créneau puis exécute `sauvegarde()` dans une transaction.
+    Une violation des contraintes d'unicité (réservation concurrente) devient CreneauIndisponible.
+    """
+    verifier_disponibilite(date_heure, praticien_id, exclure_pk)
+    try:
+        with transaction.atomic():
+            return sauvegarde()
+    except IntegrityError:
+        raise CreneauIndisponible("Ce créneau vient d'être réservé. Veuillez en choisir un autre.")
+
+
+def reserver(**champs):
+    """Crée un RendezVous sur un créneau libre (voir enregistrer)."""
+    return enregistrer(
+        lambda: RendezVous.objects.create(**champs),
+        champs['date_heure'],
+        praticien_id=getattr(champs.get('praticien'), 'pk', champs.get('praticien_id')),
+    )
@@ -0,0 +1,263 @@
+"""
+Agrégats journaliers des relevés vitaux (par patient et pour tout le centre).
+
+Chaque ligne résume une journée : nombre de relevés puis, par métrique,
+nombre de valeurs, somme, minimum et maximum (la moyenne s'en déduit).
+- ajouter() : mise à jour incrémentale à l'ingestion : les journées nouvelles sont
+  créées en un bulk_create, les existantes reçoivent un UPDATE ... SET somme = somme + x,
+  quel que soit le nombre de relevés ;
+- recalculer() : recalcul d'une journée depuis les relevés (suppression,
+  modification : le minimum et le maximum ne se décrémentent pas) ;
+- reconstruire() : recalcul complet par requêtes groupées (commande reconstruire_agregats,
+  migration 0011 pour les relevés antérieurs aux agrégats) ; les périodes reconstruites
+  quittent le cache des séries du tableau de bord (patients_actifs).
+Les rapports longue durée lisent ainsi O(jours) lignes au lieu de O(relevés).
+"""
+from django.db import IntegrityError, transaction
+from django.apps import apps as apps_installees
+from django.db.models import Count, F, Max, Min, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least, TruncDate
+from django.utils import timezone
+
+from medical_data import agenda, analytique
+from medical_data.models import AgregatJournalierCentre, AgregatJournalierPatient, ReleveVital
+
+METRIQUES = ['tension_systolique', 'tension_diastolique', 'glycemie', 'poids']
+TAILLE_LOT = 1000
+
+
+def _vide():
+    return {'nombre': 0, **{m: [0, 0.0, None, None] for m in METRIQUES}}
+
+
+def _cumuler(resume, autre):
+    """Ajoute le résumé `autre` à `resume` (nombre, somme, min, max par métrique)."""
+    resume['nombre'] += autre['nombre']
+    for m in METRIQUES:
+        nombre, somme, minimum, maximum = autre[m]
+        if not nombre:
+            continue
+        cumul = resume[m]
+        cumul[0] += nombre
+        cumul[1] += somme
+        cumul[2] = minimum if cumul[2] is None else min(cumul[2], minimum)
+        cumul[3] = maximum if cumul[3] is None else max(cumul[3], maximum)
+
+
+# ----------------------------------------------------------------------
+# MISE À JOUR INCRÉMENTALE
+# ----------------------------------------------------------------------
+
+def _resumer(releves):
+    """{(patient_id, jour): résumé} pour des relevés en mémoire."""
+    resumes = {}
+    for releve in releves:
+        resume = resumes.setdefault((releve.patient_id, timezone.localdate(releve.date_releve)), _vide())
+        un = {'nombre': 1}
+        for m in METRIQUES:
+            valeur = getattr(releve, m)
+            un[m] = [0, 0.0, None, None] if valeur is None else [1, float(valeur), float(valeur), float(valeur)]
+        _cumuler(resume, un)
+    return resumes
+
+
+def _champs(resume):
+    """Valeurs des champs d'une nouvelle ligne à partir d'un résumé."""
+    champs = {'nombre': resume['nombre']}
+    for m in METRIQUES:
+        nombre, somme, minimum, maximum = resume[m]
+        champs.update({f'{m}_nombre': nombre, f'{m}_somme': somme, f'{m}_min': minimum, f'{m}_max': maximum})
+    return champs
+
+
+def _appliquer(modele, cles, resume, patients=0):
+    """Ajoute `resume` à la ligne (créée au besoin) ; retourne True si la ligne vient d'être créée."""
+    modifications = {'nombre': F('nombre') + resume['nombre']}
+    if patients:
+        modifications['patients'] = F('patients') + patients
+    for m in METRIQUES:
+        nombre, somme, minimum, maximum = resume[m]
+        if not nombre:
+            continue
+        modifications[f'{m}_nombre'] = F(f'{m}_nombre') + nombre
+        modifications[f'{m}_somme'] = F(f'{m}_somme') + somme
+        # Coalesce : MIN/MAX de SQLite renvoient NULL si un argument est NULL
+        modifications[f'{m}_min'] = Least(Coalesce(F(f'{m}_min'), Value(minimum)), Value(minimum))
+        modifications[f'{m}_max'] = Greatest(Coalesce(F(f'{m}_max'), Value(maximum)), Value(maximum))
+    if modele.objects.filter(**cles).update(**modifications):
+        return False
+    agregat, cree = modele.objects.get_or_create(**cles)
+    modele.objects.filter(pk=agregat.pk).update(**modifications)
+    return cree
+
+
+def _integrer(modele, resumes, existants, cles, patients=None):
+    """
+    Intègre {clé: résumé} : les lignes absentes sont créées en un bulk_create avec leurs
+    valeurs finales, les lignes existantes reçoivent un UPDATE incrémental chacune.
+    Retourne l'ensemble des clés dont la ligne a été créée.
+    """
+    patients = patients or {}
+    nouvelles = [cle for cle in resumes if cle not in existants]
+    crees = set()
+    if nouvelles:
+        try:
+            with transaction.atomic():
+                modele.objects.bulk_create([
+                    modele(**cles(cle), **_champs(resumes[cle]), **({'patients': patients[cle]} if cle in patients else {}))
+                    for cle in nouvelles
+                ])
+            crees = set(nouvelles)
+        except IntegrityError:
+            # Ligne créée entre-temps par une écriture concurrente : chemin ligne par ligne
+            pass
+    for cle, resume in resumes.items():
+        if cle not in crees and _appliquer(modele, cles(cle), resume, patients.get(cle, 0)):
+            crees.add(cle)
+    return crees
+
+
+def ajouter(releves):
+    """Intègre des relevés nouvellement créés (signal post_save ou ingestion par lots)."""
+    resumes = _resumer(releves)
+    if not resumes:
+        return
+    jours = {jour for _, jour in resumes}
+    with transaction.atomic():
+        existants = set(
+            AgregatJournalierPatient.objects.filter(
+                patient_id__in={patient_id for patient_id, _ in resumes}, jour__in=jours,
+            ).values_list('patient_id', 'jour')
+        )
+        crees = _integrer(
+            AgregatJournalierPatient, resumes, existants,
+            lambda cle: {'patient_id': cle[0], 'jour': cle[1]},
+        )
+
+        # Journées du centre : cumul des patients du lot, +1 patient par ligne patient créée
+        centre = {}
+        patients = {}
+        for (patient_id, jour), resume in resumes.items():
+            _cumuler(centre.setdefault(jour, _vide()), resume)
+            patients[jour] = patients.get(jour, 0) + ((patient_id, jour) in crees)
+        existants = set(AgregatJournalierCentre.objects.filter(jour__in=jours).values_list('jour', flat=True))
+        _integrer(AgregatJournalierCentre, centre, existants, lambda jour: {'jour': jour}, patients)
+
+
+# ----------------------------------------------------------------------
+# RECALCUL
+# ----------------------------------------------------------------------
+
+def _expressions_releves():
+    """Agrégats SQL sur les relevés bruts -> champs d'AgregatJournalier."""
+    expressions = {'nombre': Count('id')}
+    for m in METRIQUES:
+        expressions.update({
+            f'{m}_nombre': Count(m),
+            f'{m}_somme': Coalesce(Sum(m), Value(0), output_field=AgregatJournalierPatient._meta.get_field(f'{m}_somme')),
+            f'{m}_min': Min(m),
+            f'{m}_max': Max(m),
+        })
+    return expressions
+
+
+def _expressions_patients():
+    """Agrégats SQL sur les lignes patient d'une journée -> champs d'AgregatJournalierCentre."""
+    expressions = {'patients': Count('id'), 'nombre': Sum('nombre')}
+    for m in METRIQUES:
+        expressions.update({
+            f'{m}_nombre': Sum(f'{m}_nombre'),
+            f'{m}_somme': Sum(f'{m}_somme'),
+            f'{m}_min': Min(f'{m}_min'),
+            f'{m}_max': Max(f'{m}_max'),
+        })
+    return expressions
+
+
+def _en_flottants(valeurs):
+    """Decimal (glycémie, poids) -> float pour les champs FloatField."""
+    return {
+        nom: float(valeur) if nom.endswith(('_somme', '_min', '_max')) and valeur is not None else valeur
+        for nom, valeur in valeurs.items()
+    }
+
+
+def recalculer_centre(jours):
+    """Recalcule les lignes du centre des `jours` à partir des lignes patient."""
+    for jour in set(jours):
+        valeurs = AgregatJournalierPatient.objects.filter(jour=jour).aggregate(**_expressions_patients())
+        if not valeurs['patients']:
+            AgregatJournalierCentre.objects.filter(jour=jour).delete()
+        else:
+            AgregatJournalierCentre.objects.update_or_create(jour=jour, defaults=valeurs)
+
+
+def recalculer(patient_id, jour):
+    """Recalcule la journée d'un patient depuis ses relevés, puis la journée du centre."""
+    debut, fin = agenda.fenetre(jour)
+    with transaction.atomic():
+        valeurs = ReleveVital.objects.filter(
+            patient_id=patient_id, date_releve__gte=debut, date_releve__lt=fin,
+        ).aggregate(**_expressions_releves())
+        if not valeurs['nombre']:
+            AgregatJournalierPatient.objects.filter(patient_id=patient_id, jour=jour).delete()
+        else:
+            AgregatJournalierPatient.objects.update_or_create(
+                patient_id=patient_id, jour=jour, defaults=_en_flottants(valeurs),
+            )
+        recalculer_centre([jour])
+
+
+def reconstruire(debut=None, fin=None, apps=None):
+    """
+    Reconstruit tous les agrégats (ou ceux de [debut, fin], dates incluses)
+    par requêtes groupées. Retourne (lignes patient, lignes centre).
+    `apps` : registre des modèles historiques quand l'appel vient d'une migration.
+    """
+    apps = apps or apps_installees
+    Releve = apps.get_model('medical_data', 'ReleveVital')
+    AgregatPatient = apps.get_model('medical_data', 'AgregatJournalierPatient')
+    AgregatCentre = apps.get_model('medical_data', 'AgregatJournalierCentre')
+    releves = Releve.objects.all()
+    patients = AgregatPatient.objects.all()
+    centre = AgregatCentre.objects.all()
+    if debut:
+        releves = releves.filter(date_releve__gte=agenda.fenetre(debut)[0])
+        patients, centre = patients.filter(jour__gte=debut), centre.filter(jour__gte=debut)
+    if fin:
+        releves = releves.filter(date_releve__lt=agenda.fenetre(fin)[1])
+        patients, centre = patients.filter(jour__lte=fin), centre.filter(jour__lte=fin)
+
+    lignes = (
+        releves.annotate(jour=TruncDate('date_releve'))
+        .values('patient_id', 'jour')
+        .annotate(**_expressions_releves())
+        .order_by()
+    )
+    with transaction.atomic():
+        # Journées touchées : celles des anciennes lignes et celles des nouvelles
+        anciennes = patients.aggregate(premier=Min('jour'), dernier=Max('jour'))
+        jours = [jour for jour in anciennes.values() if jour is not None]
+        patients.delete()
+        centre.delete()
+        nb_patients = 0
+        lot = []
+        for ligne in lignes.iterator(chunk_size=TAILLE_LOT):
+            lot.append(AgregatPatient(**_en_flottants(ligne)))
+            if len(lot) >= TAILLE_LOT:
+                AgregatPatient.objects.bulk_create(lot)
+                nb_patients += len(lot)
+                jours.extend(a.jour for a in lot)
+                lot = []
+        AgregatPatient.objects.bulk_create(lot)
+        nb_patients += len(lot)
+        jours.extend(a.jour for a in lot)
+
+        lignes_centre = patients.values('jour').annotate(**_expressions_patients()).order_by()
+        nouveaux = [AgregatCentre(**ligne) for ligne in lignes_centre]
+        AgregatCentre.objects.bulk_create(nouveaux, batch_size=TAILLE_LOT)
+
+        # Séries du tableau de bord lues sur ces agrégats : périodes closes en cache sans expiration
+        if jours:
+            analytique.invalider_plage('patients_actifs', debut or min(jours), fin or max(jours))
+    return nb_patients, len(nouveaux)
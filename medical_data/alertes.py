@@ -0,0 +1,196 @@
+"""
+Moteur de triage des relevés vitaux.
+
+Une passe évalue les relevés récents de TOUS les patients en une fois :
+une requête charge les relevés de la fenêtre, triés par (patient, date),
+dans des tableaux NumPy ; les seuils (défauts du centre, remplacés par ceux
+du patient s'il en a) sont étalés en tableaux alignés sur les relevés, puis
+chaque règle est une comparaison vectorisée :
+- 'max' / 'min' : valeur hors bornes (niveau critique) ;
+- 'ecart' : écart à une valeur de référence du patient (ex. glycémie habituelle) ;
+- 'variation' : écart entre deux relevés successifs du même patient, séparés
+  de moins de settings.ALERTES_VARIATION_HEURES.
+Aucune boucle Python par patient ou par relevé : une passe sur 50 000 patients
+prend quelques secondes, surtout passées à lire la base. Les alertes sont
+insérées en masse ; une nouvelle passe ne crée pas de doublon (contrainte
+unique relevé / métrique / règle).
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from medical_data.models import Alerte, ReleveVital, SeuilsAlerte
+
+METRIQUES = ['tension_systolique', 'tension_diastolique', 'glycemie', 'poids']
+PARAMETRES = ['min', 'max', 'variation', 'reference', 'ecart']
+NIVEAUX = {'max': 'C', 'min': 'C', 'variation': 'A', 'ecart': 'A'}
+TAILLE_LOT = 1000
+
+
+def valider_regles(regles):
+    """Vérifie le format des règles d'un patient ; lève ValueError."""
+    if not isinstance(regles, dict):
+        raise ValueError("Objet {métrique: {paramètre: valeur}} attendu.")
+    for metrique, parametres in regles.items():
+        if metrique not in METRIQUES:
+            raise ValueError(f"Métrique inconnue : {metrique}.")
+        if not isinstance(parametres, dict):
+            raise ValueError(f"{metrique} : objet {{paramètre: valeur}} attendu.")
+        for nom, valeur in parametres.items():
+            if nom not in PARAMETRES:
+                raise ValueError(f"{metrique} : paramètre inconnu {nom}.")
+            if valeur is not None and (isinstance(valeur, bool) or not isinstance(valeur, (int, float))):
+                raise ValueError(f"{metrique}.{nom} : nombre ou null attendu.")
+        if ('reference' in parametres) != ('ecart' in parametres):
+            raise ValueError(f"{metrique} : 'reference' et 'ecart' vont ensemble.")
+    return regles
+
+
+# ----------------------------------------------------------------------
+# CHARGEMENT EN TABLEAUX
+# ----------------------------------------------------------------------
+
+def _charger_releves(debut, patient_ids=None):
+    """Relevés depuis `debut`, triés par (patient, date) : dict de tableaux NumPy."""
+    queryset = ReleveVital.objects.filter(date_releve__gte=debut)
+    if patient_ids is not None:
+        queryset = queryset.filter(patient_id__in=patient_ids)
+    lignes = list(
+        queryset.order_by('patient_id', 'date_releve', 'id')
+        .values_list('id', 'patient_id', 'date_releve', *METRIQUES)
+    )
+    n = len(lignes)
+    colonnes = list(zip(*lignes)) if lignes else [()] * (3 + len(METRIQUES))
+    releves = {
+        'id': np.fromiter(colonnes[0], dtype=np.int64, count=n),
+        'patient': np.fromiter(colonnes[1], dtype=np.int64, count=n),
+        'date': np.fromiter((d.timestamp() for d in colonnes[2]), dtype=np.float64, count=n),
+        'instants': colonnes[2],
+    }
+    for position, metrique in enumerate(METRIQUES, start=3):
+        releves[metrique] = np.fromiter(
+            (np.nan if v is None else float(v) for v in colonnes[position]), dtype=np.float64, count=n,
+        )
+    return releves
+
+
+def _charger_seuils(patients, patient_ids=None):
+    """
+    Seuils par patient distinct : {(métrique, paramètre): tableau aligné sur `patients`}
+    (NaN = règle inactive). Les patients sans réglage gardent les défauts du centre.
+    """
+    defauts = getattr(settings, 'ALERTES_SEUILS_DEFAUT', {})
+    seuils = {}
+    for metrique in METRIQUES:
+        for parametre in PARAMETRES:
+            defaut = defauts.get(metrique, {}).get(parametre)
+            seuils[(metrique, parametre)] = np.full(len(patients), np.nan if defaut is None else float(defaut))
+
+    personnalises = SeuilsAlerte.objects.exclude(regles={})
+    if patient_ids is not None:
+        personnalises = personnalises.filter(patient_id__in=patient_ids)
+    for patient_id, regles in personnalises.values_list('patient_id', 'regles'):
+        position = np.searchsorted(patients, patient_id)
+        if position >= len(patients) or patients[position] != patient_id:
+            continue  # aucun relevé récent
+        for metrique, parametres in regles.items():
+            for parametre, valeur in parametres.items():
+                if (metrique, parametre) in seuils:
+                    seuils[(metrique, parametre)][position] = np.nan if valeur is None else float(valeur)
+    return seuils
+
+
+# ----------------------------------------------------------------------
+# RÈGLES VECTORISÉES
+# ----------------------------------------------------------------------
+
+def _detecter(releves, seuils, rang_patient, a_evaluer, horizon):
+    """
+    Applique toutes les règles. Retourne une liste de
+    (indices des relevés, métrique, règle, valeurs ou écarts, seuils franchis).
+    """
+    detections = []
+    for metrique in METRIQUES:
+        valeurs = releves[metrique]
+        seuil = {p: seuils[(metrique, p)][rang_patient] for p in PARAMETRES}
+
+        # Les comparaisons avec NaN (valeur absente, règle inactive) sont fausses
+        with np.errstate(invalid='ignore'):
+            ecart = valeurs - seuil['reference']
+            for regle, masque, mesure in (
+                ('max', valeurs > seuil['max'], valeurs),
+                ('min', valeurs < seuil['min'], valeurs),
+                ('ecart', np.abs(ecart) > seuil['ecart'], ecart),
+            ):
+                indices = np.flatnonzero(masque & a_evaluer)
+                detections.append((indices, metrique, regle, mesure[indices], seuil[regle][indices]))
+
+            # Variation : relevés successifs (où la métrique est renseignée) du même patient
+            presents = np.flatnonzero(~np.isnan(valeurs))
+            precedent, courant = presents[:-1], presents[1:]
+            variation = valeurs[courant] - valeurs[precedent]
+            masque = (
+                (releves['patient'][courant] == releves['patient'][precedent])
+                & (releves['date'][courant] - releves['date'][precedent] <= horizon)
+                & (np.abs(variation) > seuil['variation'][courant])
+                & a_evaluer[courant]
+            )
+            detections.append((
+                courant[masque], metrique, 'variation', variation[masque], seuil['variation'][courant][masque],
+            ))
+    return detections
+
+
+def evaluer(depuis=None, patient_ids=None, maintenant=None):
+    """
+    Évalue les relevés datés d'après `depuis` (par défaut : settings.ALERTES_FENETRE_HEURES),
+    pour tous les patients ou seulement `patient_ids`. Retourne le nombre de nouvelles alertes.
+    """
+    maintenant = maintenant or timezone.now()
+    if depuis is None:
+        depuis = maintenant - timedelta(hours=getattr(settings, 'ALERTES_FENETRE_HEURES', 72))
+    horizon = timedelta(hours=getattr(settings, 'ALERTES_VARIATION_HEURES', 48))
+
+    # Les relevés antérieurs à `depuis` (jusqu'à l'horizon) servent de point de comparaison
+    releves = _charger_releves(depuis - horizon, patient_ids)
+    if not len(releves['id']):
+        return 0
+    patients, rang_patient = np.unique(releves['patient'], return_inverse=True)
+    seuils = _charger_seuils(patients, patient_ids)
+    a_evaluer = releves['date'] >= depuis.timestamp()
+
+    detections = _detecter(releves, seuils, rang_patient, a_evaluer, horizon.total_seconds())
+
+    # Alertes déjà produites par une passe précédente : ni réinstanciées, ni réinsérées
+    existantes = Alerte.objects.filter(date_releve__gte=depuis)
+    if patient_ids is not None:
+        existantes = existantes.filter(patient_id__in=patient_ids)
+    existantes = set(existantes.values_list('releve_id', 'metrique', 'regle'))
+
+    ids, patients_releves, instants = releves['id'].tolist(), releves['patient'].tolist(), releves['instants']
+    nouvelles = []
+    for indices, metrique, regle, valeurs, seuils_franchis in detections:
+        for i, valeur, seuil in zip(indices.tolist(), valeurs.tolist(), seuils_franchis.tolist()):
+            if (ids[i], metrique, regle) in existantes:
+                continue
+            nouvelles.append(Alerte(
+                patient_id=patients_releves[i],
+                releve_id=ids[i],
+                date_releve=instants[i],
+                metrique=metrique,
+                regle=regle,
+                niveau=NIVEAUX[regle],
+                valeur=round(valeur, 2),
+                seuil=seuil,
+            ))
+    with transaction.atomic():
+        Alerte.objects.bulk_create(nouvelles, batch_size=TAILLE_LOT, ignore_conflicts=True)
+    return len(nouvelles)
+
+
+def evaluer_apres_commit(patient_id, depuis):
+    """Évaluation des nouveaux relevés d'un patient, une fois la transaction validée."""
+    transaction.on_commit(lambda: evaluer(depuis=depuis, patient_ids=[patient_id]))
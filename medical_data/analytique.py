@@ -0,0 +1,193 @@
+"""
+Séries temporelles (jour / semaine / mois) pour les graphiques du tableau de bord.
+
+Chaque métrique est calculée par UNE requête groupée (Trunc + COUNT) sur la plage
+des périodes manquantes. Les périodes closes sont mises en cache sans expiration :
+une période passée n'est jamais recalculée, sauf invalidation explicite
+(ex. un rendez-vous déplacé ou supprimé, voir medical_data/signals.py).
+La période en cours n'est jamais mise en cache. Les périodes sont conservées dans
+leur propre cache (alias 'analytique', settings.CACHES) : sans expiration, elles
+n'évincent pas les compteurs et tableaux de bord du cache par défaut.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, DateTimeField
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+PERIODES = {
+    'jour': TruncDay,
+    'semaine': TruncWeek,
+    'mois': TruncMonth,
+}
+MAX_PERIODES = 400
+ALIAS = 'analytique'
+
+
+def _metriques():
+    from users.models import Patient
+    from medical_data.models import Suivi, RendezVous, AgregatJournalierPatient
+
+    # nom -> (queryset, champ date ou datetime, agrégat, champ de ventilation ou None)
+    return {
+        'nouveaux_patients': (Patient.objects.filter(is_personnel=False), 'date_joined', Count('id'), None),
+        'rendez_vous': (RendezVous.objects.all(), 'date_heure', Count('id'), 'statut'),
+        'suivis': (Suivi.objects.all(), 'date_suivi', Count('id'), None),
+        # Agrégats journaliers : une ligne par patient et par jour au lieu de chaque relevé
+        'patients_actifs': (AgregatJournalierPatient.objects.all(), 'jour', Count('patient', distinct=True), None),
+    }
+
+
+METRIQUES = ['nouveaux_patients', 'rendez_vous', 'suivis', 'patients_actifs']
+
+
+# ----------------------------------------------------------------------
+# DÉCOUPAGE EN PÉRIODES
+# ----------------------------------------------------------------------
+
+def debut_periode(jour, periode):
+    """Premier jour de la période (jour, lundi, 1er du mois) contenant `jour`."""
+    if periode == 'semaine':
+        return jour - timedelta(days=jour.weekday())
+    if periode == 'mois':
+        return jour.replace(day=1)
+    return jour
+
+
+def periode_suivante(debut, periode):
+    if periode == 'semaine':
+        return debut + timedelta(days=7)
+    if periode == 'mois':
+        return date(debut.year + debut.month // 12, debut.month % 12 + 1, 1)
+    return debut + timedelta(days=1)
+
+
+def decouper(debut, fin, periode):
+    """Liste des débuts de période couvrant [debut, fin] (dates locales)."""
+    debuts = []
+    courant = debut_periode(debut, periode)
+    while courant <= fin:
+        debuts.append(courant)
+        if len(debuts) > MAX_PERIODES:
+            raise ValueError(f"Plage trop longue : {MAX_PERIODES} périodes au maximum.")
+        courant = periode_suivante(courant, periode)
+    return debuts
+
+
+def _instant(jour):
+    return timezone.make_aware(datetime.combine(jour, time.min))
+
+
+def _cle(metrique, periode, debut):
+    return f'analytique:{metrique}:{periode}:{debut.isoformat()}'
+
+
+# ----------------------------------------------------------------------
+# CALCUL
+# ----------------------------------------------------------------------
+
+def _calculer(metrique, periode, debuts):
+    """Une requête groupée couvrant toutes les périodes demandées -> {debut: valeur}."""
+    queryset, champ, agregat, ventilation = _metriques()[metrique]
+    debut_plage, fin_plage = debuts[0], periode_suivante(debuts[-1], periode)
+    # Un champ DateField (agrégats journaliers) est déjà en date locale
+    horodate = isinstance(queryset.model._meta.get_field(champ), DateTimeField)
+    if horodate:
+        trunc = PERIODES[periode](champ, tzinfo=timezone.get_current_timezone())
+        debut_plage, fin_plage = _instant(debut_plage), _instant(fin_plage)
+    else:
+        trunc = PERIODES[periode](champ)
+    lignes = queryset.filter(**{
+        f'{champ}__gte': debut_plage,
+        f'{champ}__lt': fin_plage,
+    }).annotate(periode_debut=trunc)
+
+    colonnes = ['periode_debut'] + ([ventilation] if ventilation else [])
+    lignes = lignes.values(*colonnes).annotate(valeur=agregat).order_by()
+
+    resultats = {debut: ({} if ventilation else 0) for debut in debuts}
+    for ligne in lignes:
+        debut = timezone.localtime(ligne['periode_debut']).date() if horodate else ligne['periode_debut']
+        if debut not in resultats:
+            continue
+        if ventilation:
+            resultats[debut][ligne[ventilation]] = ligne['valeur']
+        else:
+            resultats[debut] = ligne['valeur']
+    return resultats
+
+
+def serie(metrique, periode, debut, fin):
+    """Valeurs de `metrique` pour chaque période de [debut, fin], closes servies depuis le cache."""
+    debuts = decouper(debut, fin, periode)
+    aujourd_hui = timezone.localdate()
+    closes = {d for d in debuts if periode_suivante(d, periode) <= aujourd_hui}
+
+    cache = caches[ALIAS]
+    en_cache = cache.get_many([_cle(metrique, periode, d) for d in closes])
+    valeurs = {}
+    manquants = []
+    for d in debuts:
+        cle = _cle(metrique, periode, d)
+        if cle in en_cache:
+            valeurs[d] = en_cache[cle]
+        else:
+            manquants.append(d)
+
+    if manquants:
+        # Une seule requête, de la première à la dernière période manquante
+        plage = [d for d in debuts if manquants[0] <= d <= manquants[-1]]
+        calcules = _calculer(metrique, periode, plage)
+        for d in manquants:
+            valeurs[d] = calcules[d]
+        cache.set_many(
+            {_cle(metrique, periode, d): calcules[d] for d in manquants if d in closes},
+            timeout=None,
+        )
+    return debuts, [valeurs[d] for d in debuts]
+
+
+def series(periode, debut, fin, metriques=None):
+    """Toutes les séries demandées, alignées sur les mêmes périodes."""
+    resultat = {}
+    debuts = []
+    for metrique in metriques or METRIQUES:
+        debuts, valeurs = serie(metrique, periode, debut, fin)
+        if metrique == 'rendez_vous':
+            # Ventilation par statut : une liste alignée par statut
+            from medical_data.models import RendezVous
+            resultat[metrique] = {
+                code: [v.get(code, 0) for v in valeurs] for code, _ in RendezVous.STATUT_CHOIX
+            }
+        else:
+            resultat[metrique] = valeurs
+    return {
+        'periode': periode,
+        'debut': debut,
+        'fin': fin,
+        'periodes': debuts,
+        'series': resultat,
+    }
+
+
+def invalider(metrique, instant):
+    """
+    Supprime du cache les périodes (toutes granularités) contenant `instant`, après le commit :
+    plus tôt, une lecture concurrente remettrait en cache, sans expiration, l'ancienne valeur.
+    """
+    jour = timezone.localdate(instant)
+    cles = [_cle(metrique, periode, debut_periode(jour, periode)) for periode in PERIODES]
+    transaction.on_commit(lambda: caches[ALIAS].delete_many(cles))
+
+
+def invalider_plage(metrique, debut, fin):
+    """Comme invalider(), pour toutes les périodes recouvrant les journées [debut, fin] (sans limite de longueur)."""
+    cles = []
+    for periode in PERIODES:
+        courant = debut_periode(debut, periode)
+        while courant <= fin:
+            cles.append(_cle(metrique, periode, courant))
+            courant = periode_suivante(courant, periode)
+    transaction.on_commit(lambda: caches[ALIAS].delete_many(cles))
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class MedicalDataConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'medical_data'
+
+    def ready(self):
+        # Connexion des signaux (statistiques incrémentales, etc.)
+        from . import signals  # noqa: F401
+
+        # Index plein texte des notes cliniques (table FTS5 ou index GIN selon la base)
+        from django.db.models.signals import post_migrate
+        from . import recherche
+        post_migrate.connect(recherche.installer, sender=self)
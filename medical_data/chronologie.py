@@ -0,0 +1,104 @@
+"""
+Chronologie unifiée d'un patient : Suivis, Rendez-vous et Relevés Vitaux
+fusionnés en un seul flux, du plus récent au plus ancien.
+
+Chaque source est lue par son index (patient, date) avec un LIMIT de la taille
+de page (+1), à partir de sa propre position ; les trois listes déjà triées
+sont fusionnées (heapq.merge, fusion k-voies). Le curseur composite conserve
+la position de chaque source : le coût d'une page dépend de sa taille, jamais
+de la longueur de l'historique.
+"""
+import heapq
+
+from medical_data.models import Suivi, RendezVous, ReleveVital
+from medical_data.pagination import apres, decoder_curseur, encoder_curseur
+
+# type d'événement -> (modèle, champ date) ; l'ordre départage les événements simultanés
+SOURCES = {
+    'suivi': (Suivi, 'date_suivi'),
+    'rendez_vous': (RendezVous, 'date_heure'),
+    'releve': (ReleveVital, 'date_releve'),
+}
+TYPES = list(SOURCES)
+
+# Marqueurs du curseur composite : source pas encore lue / source épuisée
+DEBUT = '-'
+EPUISEE = '~'
+SEPARATEUR = '.'
+
+
+def encoder(positions):
+    """{type: (date, pk) | None | EPUISEE} -> jeton opaque (une position par source)."""
+    morceaux = []
+    for type_evenement in TYPES:
+        position = positions.get(type_evenement)
+        if position is None:
+            morceaux.append(DEBUT)
+        elif position == EPUISEE:
+            morceaux.append(EPUISEE)
+        else:
+            morceaux.append(encoder_curseur(*position))
+    return SEPARATEUR.join(morceaux)
+
+
+def decoder(jeton):
+    """Inverse de encoder() ; lève ValueError si le jeton est invalide."""
+    morceaux = jeton.split(SEPARATEUR)
+    if len(morceaux) != len(TYPES):
+        raise ValueError("Curseur invalide.")
+    positions = {}
+    for type_evenement, morceau in zip(TYPES, morceaux):
+        if morceau == DEBUT:
+            positions[type_evenement] = None
+        elif morceau == EPUISEE:
+            positions[type_evenement] = EPUISEE
+        else:
+            positions[type_evenement] = decoder_curseur(morceau)
+    return positions
+
+
+def _lire_source(patient_id, type_evenement, position, taille):
+    """Au plus `taille` + 1 éléments de la source, après `position`, triés (date, id) décroissants."""
+    modele, champ_date = SOURCES[type_evenement]
+    queryset = modele.objects.filter(patient_id=patient_id)
+    if type_evenement == 'rendez_vous':
+        # RendezVousSerializer lit le nom et le téléphone du patient
+        queryset = queryset.select_related('patient')
+    if position is not None:
+        queryset = apres(queryset, champ_date, position)
+    return list(queryset.order_by(f'-{champ_date}', '-pk')[:taille + 1])
+
+
+def page(patient_id, curseur=None, taille=50, types=None):
+    """
+    Une page de la chronologie : ([(type, date, objet)], jeton de la page suivante ou None).
+    `types` restreint les sources (par défaut : toutes).
+    """
+    positions = decoder(curseur) if curseur else {}
+    types = [t for t in TYPES if types is None or t in types]
+
+    lus = {}
+    for type_evenement in types:
+        position = positions.get(type_evenement)
+        if position != EPUISEE:
+            lus[type_evenement] = _lire_source(patient_id, type_evenement, position, taille)
+
+    # Fusion k-voies : chaque liste est déjà triée par (date, rang de la source, id) décroissants
+    flux = [
+        [(getattr(objet, SOURCES[t][1]), -TYPES.index(t), objet.pk, t, objet) for objet in objets]
+        for t, objets in lus.items()
+    ]
+    fusion = heapq.merge(*flux, key=lambda e: e[:3], reverse=True)
+    evenements = [(t, date, objet) for (date, _, _, t, objet), _ in zip(fusion, range(taille))]
+
+    # Nouvelle position de chaque source : dernier élément servi, ou épuisée si tout a été lu
+    for type_evenement, objets in lus.items():
+        servis = [(date, objet.pk) for t, date, objet in evenements if t == type_evenement]
+        if len(servis) == len(objets):
+            positions[type_evenement] = EPUISEE
+        elif servis:
+            positions[type_evenement] = servis[-1]
+
+    if all(positions.get(t) == EPUISEE for t in types):
+        return evenements, None
+    return evenements, encoder(positions)
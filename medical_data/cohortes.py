@@ -0,0 +1,226 @@
+"""
+Distributions des relevés vitaux par cohorte (rapports qualité).
+
+Une cohorte regroupe les patients par groupe sanguin ou par tranche d'âge
+(calculée depuis date_naissance). Pour une période glissante (90 jours par
+défaut), le module lit en deux requêtes les colonnes utiles de Patient et
+de ReleveVital, puis calcule en NumPy, sans boucle par patient :
+- tension systolique : percentiles de la moyenne par patient (un patient
+  très suivi ne pèse pas plus qu'un autre) ;
+- glycémie : répartition des relevés par bande (hypo, normale, intermédiaire, hyper) ;
+- poids : percentiles de la variation (dernier - premier relevé) par patient.
+Le résultat est mis en cache par définition de cohorte (et par jour).
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from medical_data import agenda
+from medical_data.models import ReleveVital
+
+GROUPES = ['groupe_sanguin', 'tranche_age', 'aucun']
+PERCENTILES = [5, 25, 50, 75, 95]
+JOURS_DEFAUT = 90
+JOURS_MAX = 730
+
+# Tranches d'âge : bornes inférieures (années révolues)
+TRANCHES_AGE = [0, 18, 40, 60, 75]
+
+# Bandes de glycémie (g/L) : bornes supérieures exclues
+BANDES_GLYCEMIE = [
+    ('hypo', 0.7),
+    ('normale', 1.1),
+    ('intermediaire', 1.26),
+    ('hyper', None),
+]
+
+INCONNU = 'inconnu'
+
+
+def _libelles_tranches():
+    libelles = []
+    for i, borne in enumerate(TRANCHES_AGE):
+        suivante = TRANCHES_AGE[i + 1] if i + 1 < len(TRANCHES_AGE) else None
+        libelles.append(f'{borne}-{suivante - 1}' if suivante else f'{borne}+')
+    return libelles
+
+
+# ----------------------------------------------------------------------
+# CHARGEMENT
+# ----------------------------------------------------------------------
+
+def _charger_patients(groupe, aujourd_hui):
+    """(ids triés, indice de cohorte par patient, libellés des cohortes)."""
+    from users.models import Patient
+
+    lignes = list(
+        Patient.objects.filter(is_personnel=False).order_by('id')
+        .values_list('id', 'groupe_sanguin', 'date_naissance')
+    )
+    ids = np.fromiter((ligne[0] for ligne in lignes), dtype=np.int64, count=len(lignes))
+
+    if groupe == 'groupe_sanguin':
+        libelles = [code for code, _ in Patient.GROUPE_SANGUIN_CHOIX] + [INCONNU]
+        position = {code: i for i, code in enumerate(libelles)}
+        cohortes = np.fromiter(
+            (position.get(ligne[1], len(libelles) - 1) for ligne in lignes), dtype=np.int64, count=len(lignes),
+        )
+    elif groupe == 'tranche_age':
+        libelles = _libelles_tranches() + [INCONNU]
+        naissances = [ligne[2] for ligne in lignes]
+        connue = np.fromiter((d is not None for d in naissances), dtype=bool, count=len(lignes))
+        annee = np.fromiter((d.year if d else 0 for d in naissances), dtype=np.int64, count=len(lignes))
+        mois_jour = np.fromiter((d.month * 100 + d.day if d else 0 for d in naissances), dtype=np.int64, count=len(lignes))
+        # Âge en années révolues : -1 si l'anniversaire de l'année n'est pas encore passé
+        ages = aujourd_hui.year - annee - (mois_jour > aujourd_hui.month * 100 + aujourd_hui.day)
+        cohortes = np.where(
+            connue & (ages >= 0),
+            np.searchsorted(TRANCHES_AGE, ages, side='right') - 1,
+            len(libelles) - 1,
+        )
+    else:
+        libelles = ['tous']
+        cohortes = np.zeros(len(lignes), dtype=np.int64)
+    return ids, cohortes, libelles
+
+
+def _charger_releves(debut, fin):
+    """Relevés de la période triés par (patient, date) : tableaux NumPy."""
+    lignes = list(
+        ReleveVital.objects.filter(date_releve__gte=debut, date_releve__lt=fin)
+        .order_by('patient_id', 'date_releve', 'id')
+        .values_list('patient_id', 'tension_systolique', 'glycemie', 'poids')
+    )
+    n = len(lignes)
+    colonnes = list(zip(*lignes)) if lignes else [()] * 4
+    releves = {'patient': np.fromiter(colonnes[0], dtype=np.int64, count=n)}
+    for position, metrique in enumerate(['tension_systolique', 'glycemie', 'poids'], start=1):
+        releves[metrique] = np.fromiter(
+            (np.nan if v is None else float(v) for v in colonnes[position]), dtype=np.float64, count=n,
+        )
+    return releves
+
+
+# ----------------------------------------------------------------------
+# CALCUL VECTORISÉ
+# ----------------------------------------------------------------------
+
+def _distribution(valeurs):
+    """Percentiles, moyenne et effectif d'un échantillon (None si vide)."""
+    if not len(valeurs):
+        return {'n': 0, 'moyenne': None, **{f'p{p}': None for p in PERCENTILES}}
+    quantiles = np.percentile(valeurs, PERCENTILES)
+    return {
+        'n': int(len(valeurs)),
+        'moyenne': round(float(valeurs.mean()), 2),
+        **{f'p{p}': round(float(q), 2) for p, q in zip(PERCENTILES, quantiles)},
+    }
+
+
+def _moyenne_par_patient(rang_patient, valeurs, nb_patients):
+    """Moyenne de la métrique par patient (NaN si aucune valeur)."""
+    present = ~np.isnan(valeurs)
+    nombre = np.bincount(rang_patient[present], minlength=nb_patients)
+    somme = np.bincount(rang_patient[present], weights=valeurs[present], minlength=nb_patients)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(nombre > 0, somme / nombre, np.nan)
+
+
+def _variation_par_patient(rang_patient, valeurs, nb_patients):
+    """Dernière - première valeur par patient (relevés triés par date ; NaN si moins de deux)."""
+    present = np.flatnonzero(~np.isnan(valeurs))
+    rangs = rang_patient[present]
+    variation = np.full(nb_patients, np.nan)
+    if not len(present):
+        return variation
+    # Premier et dernier relevé de chaque patient dans l'ordre (patient, date)
+    debut_groupe = np.flatnonzero(np.r_[True, rangs[1:] != rangs[:-1]])
+    fin_groupe = np.r_[debut_groupe[1:], len(rangs)] - 1
+    plusieurs = fin_groupe > debut_groupe
+    variation[rangs[debut_groupe[plusieurs]]] = (
+        valeurs[present[fin_groupe[plusieurs]]] - valeurs[present[debut_groupe[plusieurs]]]
+    )
+    return variation
+
+
+def calculer(groupe='groupe_sanguin', jours=JOURS_DEFAUT, aujourd_hui=None):
+    """Rapport complet pour une définition de cohorte (sans cache)."""
+    aujourd_hui = aujourd_hui or timezone.localdate()
+    debut, _ = agenda.fenetre(aujourd_hui - timedelta(days=jours - 1))
+    _, fin = agenda.fenetre(aujourd_hui)
+
+    ids, cohorte_patient, libelles = _charger_patients(groupe, aujourd_hui)
+    releves = _charger_releves(debut, fin)
+
+    # Relevés -> rang du patient (les relevés du personnel, absents de `ids`, sont écartés)
+    connu = np.isin(releves['patient'], ids)
+    rang = np.searchsorted(ids, releves['patient'][connu])
+    for metrique in ('tension_systolique', 'glycemie', 'poids'):
+        releves[metrique] = releves[metrique][connu]
+
+    systolique = _moyenne_par_patient(rang, releves['tension_systolique'], len(ids))
+    variation_poids = _variation_par_patient(rang, releves['poids'], len(ids))
+
+    # Glycémie : bande de chaque relevé, puis comptage (cohorte, bande) en un seul bincount
+    glycemie = releves['glycemie']
+    mesuree = ~np.isnan(glycemie)
+    bornes = [borne for _, borne in BANDES_GLYCEMIE if borne is not None]
+    bande = np.searchsorted(bornes, glycemie[mesuree], side='right')
+    cohorte_releve = cohorte_patient[rang[mesuree]]
+    comptes = np.bincount(
+        cohorte_releve * len(BANDES_GLYCEMIE) + bande, minlength=len(libelles) * len(BANDES_GLYCEMIE),
+    ).reshape(len(libelles), len(BANDES_GLYCEMIE))
+
+    actifs = np.bincount(rang, minlength=len(ids)) > 0
+    resultat = []
+    for i, libelle in enumerate(libelles):
+        membres = cohorte_patient == i
+        total_glycemie = int(comptes[i].sum())
+        resultat.append({
+            'cohorte': libelle,
+            'patients': int(membres.sum()),
+            'patients_actifs': int((membres & actifs).sum()),
+            'tension_systolique': _distribution(systolique[membres & ~np.isnan(systolique)]),
+            'glycemie': {
+                'releves': total_glycemie,
+                'bandes': {nom: int(c) for (nom, _), c in zip(BANDES_GLYCEMIE, comptes[i])},
+                'proportions': {
+                    nom: round(int(c) / total_glycemie, 4) if total_glycemie else None
+                    for (nom, _), c in zip(BANDES_GLYCEMIE, comptes[i])
+                },
+            },
+            'variation_poids': _distribution(variation_poids[membres & ~np.isnan(variation_poids)]),
+        })
+    return {
+        'groupe': groupe,
+        'jours': jours,
+        'debut': debut,
+        'fin': fin,
+        'calcule_le': timezone.now(),
+        'cohortes': resultat,
+    }
+
+
+# ----------------------------------------------------------------------
+# CACHE
+# ----------------------------------------------------------------------
+
+def _cle(definition):
+    empreinte = hashlib.sha1(json.dumps(definition, sort_keys=True, default=str).encode()).hexdigest()
+    return f'cohortes:{empreinte}'
+
+
+def rapport(groupe='groupe_sanguin', jours=JOURS_DEFAUT):
+    """Rapport servi depuis le cache (une entrée par définition de cohorte et par jour)."""
+    aujourd_hui = timezone.localdate()
+    cle = _cle({'groupe': groupe, 'jours': jours, 'jour': aujourd_hui})
+    resultat = cache.get(cle)
+    if resultat is None:
+        resultat = calculer(groupe, jours, aujourd_hui)
+        cache.set(cle, resultat, getattr(settings, 'COHORTES_CACHE_SECONDES', 3600))
+    return resultat
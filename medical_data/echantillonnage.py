@@ -0,0 +1,190 @@
+"""
+Séries de relevés vitaux sous-échantillonnées côté serveur.
+
+Les relevés d'une plage sont lus en une requête (values_list), convertis en
+tableaux NumPy, puis réduits à quelques centaines de points :
+- 'lttb' (Largest-Triangle-Three-Buckets) : conserve la forme visuelle de la
+  courbe (pics, creux) en ne gardant que des points réels ;
+- 'minmax' : par intervalle de temps régulier, minimum, maximum, moyenne et
+  nombre de mesures ;
+- 'agregats' : même résultat par intervalles de jours entiers, calculé depuis
+  les agrégats journaliers (O(jours) lignes lues, medical_data/agregats.py).
+Une année de relevés tient ainsi en une réponse de quelques kilo-octets.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.utils import timezone
+
+from medical_data.models import AgregatJournalierPatient, ReleveVital
+
+METRIQUES = ['tension_systolique', 'tension_diastolique', 'glycemie', 'poids']
+METHODES = ['lttb', 'minmax', 'agregats']
+POINTS_DEFAUT = 300
+POINTS_MAX = 2000
+
+
+# ----------------------------------------------------------------------
+# CHARGEMENT
+# ----------------------------------------------------------------------
+
+def charger(patient_id, debut, fin, metriques=METRIQUES):
+    """
+    Relevés de [debut, fin) en tableaux : (instants en secondes epoch, {métrique: valeurs}).
+    Les valeurs absentes sont des NaN.
+    """
+    lignes = list(
+        ReleveVital.objects.filter(patient_id=patient_id, date_releve__gte=debut, date_releve__lt=fin)
+        .order_by('date_releve', 'pk')
+        .values_list('date_releve', *metriques)
+    )
+    instants = np.fromiter((ligne[0].timestamp() for ligne in lignes), dtype=np.float64, count=len(lignes))
+    valeurs = {}
+    for colonne, metrique in enumerate(metriques, start=1):
+        valeurs[metrique] = np.fromiter(
+            (np.nan if ligne[colonne] is None else float(ligne[colonne]) for ligne in lignes),
+            dtype=np.float64, count=len(lignes),
+        )
+    return instants, valeurs
+
+
+# ----------------------------------------------------------------------
+# SOUS-ÉCHANTILLONNAGE
+# ----------------------------------------------------------------------
+
+def lttb(x, y, points):
+    """
+    Largest-Triangle-Three-Buckets : indices des `points` éléments retenus
+    (le premier et le dernier sont toujours conservés). `x` doit être croissant, `points` >= 3.
+    """
+    n = len(x)
+    if points >= n:
+        return np.arange(n)
+
+    # Bornes des seaux intermédiaires (le premier et le dernier point sont hors seaux)
+    bornes = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    indices = np.empty(points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    precedent = 0
+    for seau in range(points - 2):
+        debut, fin = bornes[seau], bornes[seau + 1]
+        # Point moyen du seau suivant (le dernier point pour le dernier seau)
+        suivant_debut = fin
+        suivant_fin = bornes[seau + 2] if seau + 2 < len(bornes) else n
+        moyenne_x = x[suivant_debut:suivant_fin].mean()
+        moyenne_y = y[suivant_debut:suivant_fin].mean()
+
+        # Aire du triangle (précédent retenu, candidat, moyenne du suivant), vectorisée sur le seau
+        ax, ay = x[precedent], y[precedent]
+        aires = np.abs(
+            (ax - moyenne_x) * (y[debut:fin] - ay) - (ax - x[debut:fin]) * (moyenne_y - ay)
+        )
+        precedent = debut + int(np.argmax(aires))
+        indices[seau + 1] = precedent
+    return indices
+
+
+def minmax(x, y, points, debut, fin):
+    """
+    `points` intervalles réguliers sur [debut, fin) (secondes epoch) :
+    (début de chaque intervalle, min, max, moyenne, nombre). Intervalles vides exclus.
+    """
+    bords = np.linspace(debut, fin, points + 1)
+    seaux = np.clip(np.searchsorted(bords, x, side='right') - 1, 0, points - 1)
+    nombre = np.bincount(seaux, minlength=points)
+    somme = np.bincount(seaux, weights=y, minlength=points)
+    minimum = np.full(points, np.inf)
+    maximum = np.full(points, -np.inf)
+    np.minimum.at(minimum, seaux, y)
+    np.maximum.at(maximum, seaux, y)
+
+    plein = nombre > 0
+    return bords[:-1][plein], minimum[plein], maximum[plein], somme[plein] / nombre[plein], nombre[plein]
+
+
+def par_jours(patient_id, jour_debut, jour_fin, metriques, points):
+    """
+    Intervalles de jours entiers couvrant [jour_debut, jour_fin], fusionnés depuis les agrégats
+    journaliers : {métrique: (début, min, max, moyenne, nombre)}. Intervalles vides exclus.
+    """
+    lignes = list(
+        AgregatJournalierPatient.objects.filter(patient_id=patient_id, jour__gte=jour_debut, jour__lte=jour_fin)
+        .order_by('jour')
+        .values_list('jour', *[f'{m}_{c}' for m in metriques for c in ('nombre', 'somme', 'min', 'max')])
+    )
+    nb_jours = (jour_fin - jour_debut).days + 1
+    largeur = -(-nb_jours // points)  # jours par intervalle
+    nb_seaux = -(-nb_jours // largeur)
+    seaux = np.fromiter(((ligne[0] - jour_debut).days // largeur for ligne in lignes), dtype=np.int64, count=len(lignes))
+    debuts = np.array([
+        timezone.make_aware(datetime.combine(jour_debut, time.min)).timestamp() + i * largeur * 86400
+        for i in range(nb_seaux)
+    ])
+
+    resultat = {}
+    for position, metrique in enumerate(metriques):
+        colonnes = np.array([ligne[1 + 4 * position:5 + 4 * position] for ligne in lignes], dtype=np.float64).reshape(-1, 4)
+        nombre_jour, somme_jour, min_jour, max_jour = colonnes.T
+        plein_jour = nombre_jour > 0
+        nombre = np.bincount(seaux, weights=nombre_jour, minlength=nb_seaux).astype(np.int64)
+        somme = np.bincount(seaux, weights=somme_jour, minlength=nb_seaux)
+        minimum = np.full(nb_seaux, np.inf)
+        maximum = np.full(nb_seaux, -np.inf)
+        np.minimum.at(minimum, seaux[plein_jour], min_jour[plein_jour])
+        np.maximum.at(maximum, seaux[plein_jour], max_jour[plein_jour])
+        plein = nombre > 0
+        resultat[metrique] = (debuts[plein], minimum[plein], maximum[plein], somme[plein] / nombre[plein], nombre[plein])
+    return resultat
+
+
+# ----------------------------------------------------------------------
+# SÉRIES
+# ----------------------------------------------------------------------
+
+def _instants_iso(secondes):
+    return [datetime.fromtimestamp(s, tz=dt_timezone.utc).isoformat().replace('+00:00', 'Z') for s in secondes]
+
+
+def _arrondir(valeurs):
+    return np.round(valeurs, 2).tolist()
+
+
+def _serie_buckets(t, minimum, maximum, moyenne, nombre):
+    return {
+        't': _instants_iso(t),
+        'min': _arrondir(minimum),
+        'max': _arrondir(maximum),
+        'moyenne': _arrondir(moyenne),
+        'n': nombre.tolist(),
+    }
+
+
+def series(patient_id, debut, fin, metriques=METRIQUES, points=POINTS_DEFAUT, methode='lttb'):
+    """Une série réduite par métrique ; les relevés sans valeur pour la métrique sont ignorés."""
+    if methode == 'agregats':
+        jours = par_jours(
+            patient_id, timezone.localdate(debut), timezone.localdate(fin - timedelta(microseconds=1)), metriques, points,
+        )
+        resultat = {}
+        for metrique, intervalles in jours.items():
+            resultat[metrique] = _serie_buckets(*intervalles)
+            resultat[metrique]['releves'] = int(intervalles[4].sum())
+        return resultat
+
+    instants, valeurs = charger(patient_id, debut, fin, metriques)
+    resultat = {}
+    for metrique in metriques:
+        present = ~np.isnan(valeurs[metrique])
+        x, y = instants[present], valeurs[metrique][present]
+        if methode == 'minmax':
+            resultat[metrique] = _serie_buckets(*minmax(x, y, points, debut.timestamp(), fin.timestamp()))
+        else:
+            retenus = lttb(x, y, points)
+            resultat[metrique] = {
+                't': _instants_iso(x[retenus]),
+                'v': _arrondir(y[retenus]),
+            }
+        resultat[metrique]['releves'] = int(present.sum())
+    return resultat
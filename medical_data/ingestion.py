@@ -0,0 +1,133 @@
+"""
+Ingestion par lots des relevés transmis par les appareils connectés
+(glucomètres, tensiomètres) qui synchronisent leurs mesures en différé.
+
+Les relevés déjà validés sont dédoublonnés (appareil, horodatage d'origine)
+contre le lot lui-même puis contre la base (une requête par tranche),
+et insérés avec bulk_create : une synchronisation de plusieurs centaines de
+mesures coûte quelques requêtes au lieu d'un aller-retour par relevé.
+bulk_create ne déclenche pas les signaux : les mises à jour qui en dépendent
+(statistiques, séries, agrégats journaliers, alertes, version du patient)
+sont appliquées explicitement.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from medical_data import agregats, alertes, analytique, stats
+from medical_data.models import ReleveVital
+from medical_data.versions import incrementer_version
+
+TAILLE_TRANCHE = 500
+
+# Statuts par élément
+CREE = 'cree'
+DOUBLON = 'doublon'
+INVALIDE = 'invalide'
+
+
+def _existants(patient_id, releves):
+    """Clés (appareil_id, date_releve) déjà présentes en base parmi `releves`."""
+    cles = {(r.appareil_id, r.date_releve) for r in releves if r.appareil_id}
+    if not cles:
+        return set()
+    dates = [d for _, d in cles]
+    return set(
+        ReleveVital.objects.filter(
+            patient_id=patient_id,
+            appareil_id__in={a for a, _ in cles},
+            date_releve__gte=min(dates),
+            date_releve__lte=max(dates),
+        ).values_list('appareil_id', 'date_releve')
+    ) & cles
+
+
+def _inserer_tranche(patient_id, tranche, resultats):
+    """Insère une tranche de (index, ReleveVital) ; les doublons sont signalés, pas insérés."""
+    existants = _existants(patient_id, [r for _, r in tranche])
+    a_creer = []
+    for index, releve in tranche:
+        if releve.appareil_id and (releve.appareil_id, releve.date_releve) in existants:
+            resultats[index] = {'index': index, 'statut': DOUBLON}
+        else:
+            a_creer.append((index, releve))
+    if not a_creer:
+        return []
+
+    try:
+        with transaction.atomic():
+            ReleveVital.objects.bulk_create([r for _, r in a_creer])
+    except IntegrityError:
+        # Relevés insérés entre-temps par une synchronisation concurrente : ligne à ligne,
+        # chaque conflit sur (patient, appareil, horodatage) devient un doublon
+        inseres = []
+        for index, releve in a_creer:
+            try:
+                with transaction.atomic():
+                    ReleveVital.objects.bulk_create([releve])
+            except IntegrityError:
+                if not releve.appareil_id:
+                    raise  # pas un doublon d'appareil (patient supprimé...)
+                resultats[index] = {'index': index, 'statut': DOUBLON}
+            else:
+                inseres.append((index, releve))
+        a_creer = inseres
+
+    for index, releve in a_creer:
+        resultats[index] = {'index': index, 'statut': CREE, 'id': releve.pk}
+    return [r for _, r in a_creer]
+
+
+def _apres_insertion(patient_id, crees):
+    """Équivalent des signaux post_save pour les relevés insérés en masse."""
+    if not crees:
+        return
+    incrementer_version(patient_id)
+    agregats.ajouter(crees)
+    alertes.evaluer_apres_commit(patient_id, min(r.date_releve for r in crees))
+
+    # Relevés antidatés : les périodes closes des séries qui les contiennent sont à recalculer
+    jours = {}
+    for releve in crees:
+        jours.setdefault(timezone.localdate(releve.date_releve), releve.date_releve)
+    for instant in jours.values():
+        analytique.invalider('patients_actifs', instant)
+
+    il_y_a_30j = timezone.now() - timedelta(days=30)
+    if any(r.date_releve >= il_y_a_30j for r in crees):
+        deja_actif = ReleveVital.objects.filter(
+            patient_id=patient_id, date_releve__gte=il_y_a_30j,
+        ).exclude(pk__in=[r.pk for r in crees]).exists()
+        if not deja_actif:
+            stats.ajuster('patients_suivi_actif_30j', 1)
+
+
+def ingerer_releves(patient_id, elements, taille_tranche=TAILLE_TRANCHE):
+    """
+    Enregistre les relevés d'un patient.
+    `elements` : liste de dicts validés (champs de ReleveVital) ou d'erreurs ({'erreurs': ...}),
+    dans l'ordre reçu. Retourne un résultat par élément : {'index', 'statut', 'id' | 'erreurs'}.
+    """
+    resultats = [None] * len(elements)
+    valides = []
+    vus = set()
+    for index, element in enumerate(elements):
+        if 'erreurs' in element:
+            resultats[index] = {'index': index, 'statut': INVALIDE, 'erreurs': element['erreurs']}
+            continue
+        releve = ReleveVital(patient_id=patient_id, **element)
+        cle = (releve.appareil_id, releve.date_releve)
+        if releve.appareil_id and cle in vus:
+            # Mesure répétée dans le même lot
+            resultats[index] = {'index': index, 'statut': DOUBLON}
+            continue
+        vus.add(cle)
+        valides.append((index, releve))
+
+    crees = []
+    with transaction.atomic():
+        for debut in range(0, len(valides), taille_tranche):
+            crees.extend(_inserer_tranche(patient_id, valides[debut:debut + taille_tranche], resultats))
+        _apres_insertion(patient_id, crees)
+    return resultats
@@ -0,0 +1,29 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from medical_data import alertes
+
+
+class Command(BaseCommand):
+    help = (
+        "Évalue les règles d'alerte sur les relevés récents de tous les patients (une passe vectorisée). "
+        "À planifier périodiquement (cron) ; les alertes déjà présentes ne sont pas dupliquées."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--heures', type=int, default=settings.ALERTES_FENETRE_HEURES,
+            help="Relevés des N dernières heures (défaut : settings.ALERTES_FENETRE_HEURES).",
+        )
+
+    def handle(self, *args, **options):
+        debut = time.monotonic()
+        detections = alertes.evaluer(depuis=timezone.now() - timedelta(hours=options['heures']))
+        self.stdout.write(self.style.SUCCESS(
+            f"{detections} nouvelle(s) alerte(s) sur les {options['heures']} dernières heures "
+            f"en {time.monotonic() - debut:.2f} s."
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from medical_data import stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule les statistiques globales du tableau de bord. "
+        "À planifier périodiquement (cron) lorsque le cache est partagé entre processus."
+    )
+
+    def handle(self, *args, **options):
+        valeurs = stats.rafraichir()
+        for nom in stats.COMPTEURS:
+            self.stdout.write(f"{nom} : {valeurs[nom]}")
+        self.stdout.write(self.style.SUCCESS(f"Statistiques à jour au {valeurs['as_of']:%Y-%m-%d %H:%M:%S}."))
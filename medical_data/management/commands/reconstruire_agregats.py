@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from medical_data import agregats
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit les agrégats journaliers des relevés vitaux (par patient et pour le centre) "
+        "à partir des relevés bruts. Sans option : toutes les dates."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--debut', help="Première journée à reconstruire (AAAA-MM-JJ).")
+        parser.add_argument('--fin', help="Dernière journée à reconstruire, incluse (AAAA-MM-JJ).")
+
+    def handle(self, *args, **options):
+        bornes = {}
+        for nom in ('debut', 'fin'):
+            if options[nom]:
+                try:
+                    bornes[nom] = parse_date(options[nom])
+                except ValueError:
+                    bornes[nom] = None
+                if bornes[nom] is None:
+                    raise CommandError(f"Date invalide pour --{nom} : {options[nom]} (AAAA-MM-JJ attendu).")
+
+        nb_patients, nb_centre = agregats.reconstruire(bornes.get('debut'), bornes.get('fin'))
+        self.stdout.write(self.style.SUCCESS(
+            f"Agrégats reconstruits : {nb_patients} journées patient, {nb_centre} journées centre."
+        ))
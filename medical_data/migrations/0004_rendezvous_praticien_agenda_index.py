@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical_data', '0003_relevevital'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rendezvous',
+            name='praticien',
+            field=models.ForeignKey(blank=True, help_text='Membre du personnel qui assure le rendez-vous.', limit_choices_to={'is_personnel': True}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rendez_vous_praticien', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='rendezvous',
+            index=models.Index(fields=['date_heure', 'statut'], name='rdv_date_statut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rendezvous',
+            index=models.Index(fields=['praticien', 'date_heure'], name='rdv_praticien_date_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical_data', '0004_rendezvous_praticien_agenda_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='rendezvous',
+            constraint=models.UniqueConstraint(condition=models.Q(models.Q(('statut', 'A'), _negated=True), ('praticien__isnull', False)), fields=('praticien', 'date_heure'), name='rdv_creneau_praticien_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='rendezvous',
+            constraint=models.UniqueConstraint(condition=models.Q(models.Q(('statut', 'A'), _negated=True), ('praticien__isnull', True)), fields=('date_heure',), name='rdv_creneau_centre_unique'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical_data', '0005_rendezvous_creneau_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='relevevital',
+            index=models.Index(fields=['patient', 'date_releve'], name='releve_patient_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rendezvous',
+            index=models.Index(fields=['patient', 'date_heure'], name='rdv_patient_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='suivi',
+            index=models.Index(fields=['patient', 'date_suivi'], name='suivi_patient_date_idx'),
+        ),
+    ]
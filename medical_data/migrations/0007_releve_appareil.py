@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:28
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical_data', '0006_historique_patient_date_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='relevevital',
+            name='appareil_id',
+            field=models.CharField(blank=True, help_text="Identifiant de l'appareil ayant transmis le relevé.", max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='relevevital',
+            name='date_releve',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Date et heure de la mesure.'),
+        ),
+        migrations.AddConstraint(
+            model_name='relevevital',
+            constraint=models.UniqueConstraint(condition=models.Q(('appareil_id__isnull', False)), fields=('patient', 'appareil_id', 'date_releve'), name='releve_appareil_unique'),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical_data', '0007_releve_appareil'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgregatJournalierCentre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.PositiveIntegerField(default=0, help_text='Nombre de relevés de la journée.')),
+                ('tension_systolique_nombre', models.PositiveIntegerField(default=0)),
+                ('tension_systolique_somme', models.FloatField(default=0)),
+                ('tension_systolique_min', models.FloatField(blank=True, null=True)),
+                ('tension_systolique_max', models.FloatField(blank=True, null=True)),
+                ('tension_diastolique_nombre', models.PositiveIntegerField(default=0)),
+                ('tension_diastolique_somme', models.FloatField(default=0)),
+                ('tension_diastolique_min', models.FloatField(blank=True, null=True)),
+                ('tension_diastolique_max', models.FloatField(blank=True, null=True)),
+                ('glycemie_nombre', models.PositiveIntegerField(default=0)),
+                ('glycemie_somme', models.FloatField(default=0)),
+                ('glycemie_min', models.FloatField(blank=True, null=True)),
+                ('glycemie_max', models.FloatField(blank=True, null=True)),
+                ('poids_nombre', models.PositiveIntegerField(default=0)),
+                ('poids_somme', models.FloatField(default=0)),
+                ('poids_min', models.FloatField(blank=True, null=True)),
+                ('poids_max', models.FloatField(blank=True, null=True)),
+                ('jour', models.DateField(help_text='Journée agrégée (fuseau du centre).', unique=True)),
+                ('patients', models.PositiveIntegerField(default=0, help_text='Nombre de patients ayant transmis un relevé.')),
+            ],
+            options={
+                'verbose_name': 'Agrégat journalier (centre)',
+                'verbose_name_plural': 'Agrégats journaliers (centre)',
+                'ordering': ['jour'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AgregatJournalierPatient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField(help_text='Journée agrégée (fuseau du centre).')),
+                ('nombre', models.PositiveIntegerField(default=0, help_text='Nombre de relevés de la journée.')),
+                ('tension_systolique_nombre', models.PositiveIntegerField(default=0)),
+                ('tension_systolique_somme', models.FloatField(default=0)),
+                ('tension_systolique_min', models.FloatField(blank=True, null=True)),
+                ('tension_systolique_max', models.FloatField(blank=True, null=True)),
+                ('tension_diastolique_nombre', models.PositiveIntegerField(default=0)),
+                ('tension_diastolique_somme', models.FloatField(default=0)),
+                ('tension_diastolique_min', models.FloatField(blank=True, null=True)),
+                ('tension_diastolique_max', models.FloatField(blank=True, null=True)),
+                ('glycemie_nombre', models.PositiveIntegerField(default=0)),
+                ('glycemie_somme', models.FloatField(default=0)),
+                ('glycemie_min', models.FloatField(blank=True, null=True)),
+                ('glycemie_max', models.FloatField(blank=True, null=True)),
+                ('poids_nombre', models.PositiveIntegerField(default=0)),
+                ('poids_somme', models.FloatField(default=0)),
+                ('poids_min', models.FloatField(blank=True, null=True)),
+                ('poids_max', models.FloatField(blank=True, null=True)),
+                ('patient', models.ForeignKey(help_text='Le patient dont les relevés sont agrégés.', on_delete=django.db.models.deletion.CASCADE, related_name='agregats_journaliers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Agrégat journalier (patient)',
+                'verbose_name_plural': 'Agrégats journaliers (patients)',
+                'ordering': ['patient', 'jour'],
+                'indexes': [models.Index(fields=['jour'], name='agregat_patient_jour_idx')],
+                'constraints': [models.UniqueConstraint(fields=('patient', 'jour'), name='agregat_patient_jour_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical_data', '0008_agregats_journaliers'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeuilsAlerte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('regles', models.JSONField(blank=True, default=dict, help_text='Seuils par métrique.')),
+                ('date_modification', models.DateTimeField(auto_now=True)),
+                ('patient', models.OneToOneField(help_text='Le patient concerné par ces seuils.', on_delete=django.db.models.deletion.CASCADE, related_name='seuils_alerte', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': "Seuils d'alerte",
+                'verbose_name_plural': "Seuils d'alerte",
+            },
+        ),
+        migrations.CreateModel(
+            name='Alerte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_releve', models.DateTimeField(help_text='Date du relevé (copiée pour le tri de la file).')),
+                ('metrique', models.CharField(help_text='Métrique concernée (ex: glycemie).', max_length=30)),
+                ('regle', models.CharField(choices=[('max', 'Au-dessus du maximum'), ('min', 'En dessous du minimum'), ('variation', 'Variation rapide'), ('ecart', 'Écart à la référence')], max_length=10)),
+                ('niveau', models.CharField(choices=[('C', 'Critique'), ('A', 'Attention')], default='A', max_length=1)),
+                ('valeur', models.FloatField(help_text="Valeur mesurée (écart pour les règles 'variation' et 'ecart').")),
+                ('seuil', models.FloatField(help_text='Seuil franchi.')),
+                ('statut', models.CharField(choices=[('N', 'Nouvelle'), ('T', 'Traitée')], default='N', max_length=1)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_traitement', models.DateTimeField(blank=True, null=True)),
+                ('patient', models.ForeignKey(help_text='Le patient concerné.', on_delete=django.db.models.deletion.CASCADE, related_name='alertes', to=settings.AUTH_USER_MODEL)),
+                ('releve', models.ForeignKey(help_text="Le relevé ayant déclenché l'alerte.", on_delete=django.db.models.deletion.CASCADE, related_name='alertes', to='medical_data.relevevital')),
+                ('traitee_par', models.ForeignKey(blank=True, limit_choices_to={'is_personnel': True}, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='alertes_traitees', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Alerte',
+                'verbose_name_plural': 'Alertes',
+                'ordering': ['-date_releve'],
+                'indexes': [models.Index(fields=['statut', 'niveau', 'date_releve'], name='alerte_file_idx')],
+                'constraints': [models.UniqueConstraint(fields=('releve', 'metrique', 'regle'), name='alerte_releve_regle_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical_data', '0009_alertes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rendezvous',
+            index=models.Index(fields=['patient', 'statut', 'date_heure'], name='rdv_patient_statut_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='suivi',
+            index=models.Index(fields=['date_suivi'], name='suivi_date_idx'),
+        ),
+    ]
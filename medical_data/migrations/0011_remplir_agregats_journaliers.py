@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def remplir(apps, schema_editor):
+    # Relevés antérieurs aux agrégats journaliers (0008) : sans eux, les séries
+    # patients_actifs afficheraient 0 sur toutes les périodes passées
+    from medical_data import agregats
+
+    agregats.reconstruire(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('medical_data', '0010_suivi_rdv_index_composites'),
+    ]
+
+    operations = [
+        migrations.RunPython(remplir, migrations.RunPython.noop),
+    ]
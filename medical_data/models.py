@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
 from django.conf import settings
+from django.utils import timezone
 
 class Suivi(models.Model):
     # Lien vers le patient (AUTH_USER_MODEL est notre modèle Patient)
@@ -42,6 +45,12 @@ class Suivi(models.Model):
         verbose_name_plural = 'Suivis et Observations'
         # On trie les suivis du plus récent au plus ancien (pour le carnet)
         ordering = ['-date_suivi'] 
+        # Historique d'un patient par date (pagination keyset, chronologie),
+        # liste paginée de tous les suivis (API : tri -date_suivi)
+        indexes = [
+            models.Index(fields=['patient', 'date_suivi'], name='suivi_patient_date_idx'),
+            models.Index(fields=['date_suivi'], name='suivi_date_idx'),
+        ]
 
     def __str__(self):
         # Utiliser 'last_name' et 'first_name' de AbstractUser
@@ -93,17 +102,68 @@ class RendezVous(models.Model):
         help_text="Notes pour le personnel du centre (ex: préparation spéciale)."
     )
 
+    # Soignant en charge (optionnel, membre du personnel)
+    praticien = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='rendez_vous_praticien',
+        limit_choices_to={'is_personnel': True},
+        help_text="Membre du personnel qui assure le rendez-vous."
+    )
+
     class Meta:
         verbose_name = 'Rendez-vous'
         verbose_name_plural = 'Rendez-vous'
         # Tri des rendez-vous par date (du plus proche au plus éloigné)
         ordering = ['date_heure']
+        # Agenda : plages [début, fin) sur date_heure, éventuellement filtrées par statut ou praticien
+        indexes = [
+            models.Index(fields=['date_heure', 'statut'], name='rdv_date_statut_idx'),
+            models.Index(fields=['praticien', 'date_heure'], name='rdv_praticien_date_idx'),
+            models.Index(fields=['patient', 'date_heure'], name='rdv_patient_date_idx'),
+            # Prochain rendez-vous d'un patient (tableau de bord : statut planifié ou confirmé)
+            models.Index(fields=['patient', 'statut', 'date_heure'], name='rdv_patient_statut_date_idx'),
+        ]
+        # Un seul rendez-vous actif (non annulé) par créneau et par praticien,
+        # ou par créneau sur l'agenda commun : arbitre les réservations concurrentes (medical_data/agenda.py)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['praticien', 'date_heure'],
+                condition=~Q(statut='A') & Q(praticien__isnull=False),
+                name='rdv_creneau_praticien_unique',
+            ),
+            models.UniqueConstraint(
+                fields=['date_heure'],
+                condition=~Q(statut='A') & Q(praticien__isnull=True),
+                name='rdv_creneau_centre_unique',
+            ),
+        ]
 
     def __str__(self):
         return f"RDV: {self.date_heure.strftime('%Y-%m-%d %H:%M')} - {self.patient.last_name}"
 
 
+class ReleveVitalQuerySet(models.QuerySet):
+
+    def derniers_par_patient(self):
+        """
+        Ne conserve que le relevé le plus récent de chaque patient.
+        Utilisé dans un Prefetch : une seule requête pour toute la liste de patients.
+        """
+        return self.annotate(
+            rang_recent=Window(
+                RowNumber(),
+                partition_by=F('patient_id'),
+                order_by=[F('date_releve').desc(), F('id').desc()],
+            )
+        ).filter(rang_recent=1)
+
+
 class ReleveVital(models.Model):
+    objects = ReleveVitalQuerySet.as_manager()
+
     patient = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -111,9 +171,18 @@ class ReleveVital(models.Model):
         help_text="Le patient ayant effectué le relevé."
     )
 
+    # Horodatage de la mesure : maintenant pour une saisie manuelle,
+    # ou l'heure d'origine pour les relevés synchronisés par un appareil
     date_releve = models.DateTimeField(
-        auto_now_add=True,
-        help_text="Date et heure de la saisie."
+        default=timezone.now,
+        help_text="Date et heure de la mesure."
+    )
+
+    # Identifiant de l'appareil connecté (glucomètre, tensiomètre...) ; vide pour une saisie manuelle
+    appareil_id = models.CharField(
+        max_length=64,
+        null=True, blank=True,
+        help_text="Identifiant de l'appareil ayant transmis le relevé."
     )
     
     # 1. TENSION ARTÉRIELLE (Systolique et Diastolique)
@@ -150,6 +219,179 @@ class ReleveVital(models.Model):
         verbose_name = 'Relevé Vital'
         verbose_name_plural = 'Relevés Vitaux'
         ordering = ['-date_releve'] # Du plus récent au plus ancien
+        indexes = [
+            models.Index(fields=['patient', 'date_releve'], name='releve_patient_date_idx'),
+        ]
+        # Une synchronisation rejouée par un appareil ne crée pas de doublon (medical_data/ingestion.py)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['patient', 'appareil_id', 'date_releve'],
+                condition=Q(appareil_id__isnull=False),
+                name='releve_appareil_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Relevé de {self.patient.username} le {self.date_releve.strftime('%d/%m/%Y à %H:%M')}"
+
+### AGRÉGATS JOURNALIERS DES RELEVÉS ###
+# Tenus à jour de façon incrémentale (medical_data/agregats.py) et reconstructibles
+# avec la commande `reconstruire_agregats`. Les rapports longue durée lisent
+# une ligne par jour au lieu de parcourir tous les relevés.
+
+class AgregatJournalier(models.Model):
+    """Nombre, somme, min et max par métrique sur une journée (fuseau du centre)."""
+
+    jour = models.DateField(help_text="Journée agrégée (fuseau du centre).")
+    nombre = models.PositiveIntegerField(default=0, help_text="Nombre de relevés de la journée.")
+
+    tension_systolique_nombre = models.PositiveIntegerField(default=0)
+    tension_systolique_somme = models.FloatField(default=0)
+    tension_systolique_min = models.FloatField(null=True, blank=True)
+    tension_systolique_max = models.FloatField(null=True, blank=True)
+
+    tension_diastolique_nombre = models.PositiveIntegerField(default=0)
+    tension_diastolique_somme = models.FloatField(default=0)
+    tension_diastolique_min = models.FloatField(null=True, blank=True)
+    tension_diastolique_max = models.FloatField(null=True, blank=True)
+
+    glycemie_nombre = models.PositiveIntegerField(default=0)
+    glycemie_somme = models.FloatField(default=0)
+    glycemie_min = models.FloatField(null=True, blank=True)
+    glycemie_max = models.FloatField(null=True, blank=True)
+
+    poids_nombre = models.PositiveIntegerField(default=0)
+    poids_somme = models.FloatField(default=0)
+    poids_min = models.FloatField(null=True, blank=True)
+    poids_max = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+    def moyenne(self, metrique):
+        nombre = getattr(self, f'{metrique}_nombre')
+        return getattr(self, f'{metrique}_somme') / nombre if nombre else None
+
+
+class AgregatJournalierPatient(AgregatJournalier):
+    patient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='agregats_journaliers',
+        help_text="Le patient dont les relevés sont agrégés."
+    )
+
+    class Meta:
+        verbose_name = 'Agrégat journalier (patient)'
+        verbose_name_plural = 'Agrégats journaliers (patients)'
+        ordering = ['patient', 'jour']
+        constraints = [
+            models.UniqueConstraint(fields=['patient', 'jour'], name='agregat_patient_jour_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['jour'], name='agregat_patient_jour_idx'),
+        ]
+
+    def __str__(self):
+        return f"Agrégat du {self.jour:%d/%m/%Y} (patient {self.patient_id})"
+
+
+class AgregatJournalierCentre(AgregatJournalier):
+    jour = models.DateField(unique=True, help_text="Journée agrégée (fuseau du centre).")
+    patients = models.PositiveIntegerField(default=0, help_text="Nombre de patients ayant transmis un relevé.")
+
+    class Meta:
+        verbose_name = 'Agrégat journalier (centre)'
+        verbose_name_plural = 'Agrégats journaliers (centre)'
+        ordering = ['jour']
+
+    def __str__(self):
+        return f"Agrégat du centre du {self.jour:%d/%m/%Y}"
+
+
+### ALERTES SUR LES RELEVÉS VITAUX ###
+# Produites par le moteur de triage (medical_data/alertes.py), consultées par le personnel.
+
+class SeuilsAlerte(models.Model):
+    """
+    Règles d'alerte propres à un patient ; elles complètent ou remplacent
+    settings.ALERTES_SEUILS_DEFAUT, métrique par métrique.
+    Format : {"glycemie": {"min": 0.7, "max": 2.0, "variation": 0.8, "reference": 1.1, "ecart": 0.5}, ...}
+    """
+    patient = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='seuils_alerte',
+        help_text="Le patient concerné par ces seuils."
+    )
+    regles = models.JSONField(default=dict, blank=True, help_text="Seuils par métrique.")
+    date_modification = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Seuils d'alerte"
+        verbose_name_plural = "Seuils d'alerte"
+
+    def __str__(self):
+        return f"Seuils d'alerte du patient {self.patient_id}"
+
+
+class Alerte(models.Model):
+
+    REGLE_CHOIX = [
+        ('max', 'Au-dessus du maximum'),
+        ('min', 'En dessous du minimum'),
+        ('variation', 'Variation rapide'),
+        ('ecart', 'Écart à la référence'),
+    ]
+    NIVEAU_CHOIX = [
+        ('C', 'Critique'),
+        ('A', 'Attention'),
+    ]
+    STATUT_CHOIX = [
+        ('N', 'Nouvelle'),
+        ('T', 'Traitée'),
+    ]
+
+    patient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='alertes',
+        help_text="Le patient concerné."
+    )
+    releve = models.ForeignKey(
+        ReleveVital,
+        on_delete=models.CASCADE,
+        related_name='alertes',
+        help_text="Le relevé ayant déclenché l'alerte."
+    )
+    date_releve = models.DateTimeField(help_text="Date du relevé (copiée pour le tri de la file).")
+    metrique = models.CharField(max_length=30, help_text="Métrique concernée (ex: glycemie).")
+    regle = models.CharField(max_length=10, choices=REGLE_CHOIX)
+    niveau = models.CharField(max_length=1, choices=NIVEAU_CHOIX, default='A')
+    valeur = models.FloatField(help_text="Valeur mesurée (écart pour les règles 'variation' et 'ecart').")
+    seuil = models.FloatField(help_text="Seuil franchi.")
+    statut = models.CharField(max_length=1, choices=STATUT_CHOIX, default='N')
+    date_creation = models.DateTimeField(auto_now_add=True)
+    traitee_par = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='alertes_traitees',
+        limit_choices_to={'is_personnel': True},
+    )
+    date_traitement = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Alerte'
+        verbose_name_plural = 'Alertes'
+        ordering = ['-date_releve']
+        constraints = [
+            # Une nouvelle passe du moteur ne duplique pas les alertes existantes
+            models.UniqueConstraint(fields=['releve', 'metrique', 'regle'], name='alerte_releve_regle_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['statut', 'niveau', 'date_releve'], name='alerte_file_idx'),
+        ]
 
     def __str__(self):
-        return f"Relevé de {self.patient.username} le {self.date_releve.strftime('%d/%m/%Y à %H:%M')}"
\ No newline at end of file
+        return f"Alerte {self.get_niveau_display()} ({self.metrique}, {self.get_regle_display()}) - patient {self.patient_id}"
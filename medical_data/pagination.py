@@ -0,0 +1,53 @@
+"""
+Pagination par curseur (keyset) sur (date, id) décroissants.
+
+Le curseur encode la position du dernier élément servi ; la page suivante
+est lue par "WHERE (date, id) < (position) ORDER BY date DESC, id DESC LIMIT n",
+sans OFFSET : le coût d'une page ne dépend pas de sa profondeur.
+"""
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encoder_curseur(date, pk):
+    brut = f'{date.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(brut.encode()).decode().rstrip('=')
+
+
+def decoder_curseur(curseur):
+    """(datetime, pk) ; lève ValueError si le curseur est invalide."""
+    try:
+        brut = base64.urlsafe_b64decode(curseur + '=' * (-len(curseur) % 4)).decode()
+        date_iso, pk = brut.rsplit('|', 1)
+        date = parse_datetime(date_iso)
+        pk = int(pk)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise ValueError("Curseur invalide.")
+    if date is None:
+        raise ValueError("Curseur invalide.")
+    return date, pk
+
+
+def apres(queryset, champ_date, position):
+    """Éléments strictement après `position` (date, pk) dans l'ordre décroissant."""
+    date, pk = position
+    return queryset.filter(Q(**{f'{champ_date}__lt': date}) | Q(**{champ_date: date, 'pk__lt': pk}))
+
+
+def page_keyset(queryset, champ_date, curseur=None, taille=20):
+    """
+    Une page triée par (champ_date, id) décroissants.
+    Retourne (éléments, curseur de la page suivante ou None).
+    """
+    queryset = queryset.order_by(f'-{champ_date}', '-pk')
+    if curseur:
+        queryset = apres(queryset, champ_date, decoder_curseur(curseur))
+    elements = list(queryset[:taille + 1])
+    suivant = None
+    if len(elements) > taille:
+        elements = elements[:taille]
+        dernier = elements[-1]
+        suivant = encoder_curseur(getattr(dernier, champ_date), dernier.pk)
+    return elements, suivant
@@ -0,0 +1,315 @@
+"""
+Recherche plein texte dans les notes cliniques (Suivi : motif, notes_medecin, prescriptions).
+
+Une recherche se compose de mots et de "phrases entre guillemets" ; tous doivent
+figurer dans le suivi. Les mots sont ramenés à leur racine par un raciniseur
+français léger (pluriels, féminins, suffixes courants : « douleurs » trouve
+« douleur », « diabétique » trouve « diabète ») après suppression des accents
+et des mots vides. Backend selon la base (settings.RECHERCHE_SUIVIS_BACKEND) :
+- 'fts5' (SQLite) : table FTS5 des textes racinisés (un enregistrement par suivi),
+  mise à jour à chaque enregistrement ou suppression d'un suivi (signaux) ; bm25,
+  le motif pesant plus que les notes ;
+- 'postgres' : index GIN sur to_tsvector('french', ...), websearch_to_tsquery, ts_rank_cd ;
+- 'simple' : LIKE (autres bases).
+Le filtrage des listes (?search=) cherche le dernier mot de chaque terme comme préfixe
+(« parac » trouve « Paracétamol », « 500 » trouve « 500mg ») ; la recherche classée
+(rechercher) ne retient que les mots entiers.
+Les extraits surlignés (<mark>) sont construits depuis le texte d'origine, échappé.
+"""
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+from medical_data.models import Suivi
+
+CHAMPS = ['motif', 'notes_medecin', 'prescriptions']
+POIDS = {'motif': 3.0, 'notes_medecin': 1.0, 'prescriptions': 1.0}
+LIMITE_DEFAUT = 20
+LIMITE_MAX = 100
+MOTS_EXTRAIT = 24
+TAILLE_LOT = 1000
+
+
+# ----------------------------------------------------------------------
+# ANALYSE DU FRANÇAIS
+# ----------------------------------------------------------------------
+
+MOTS_VIDES = set("""
+a au aux avec ce ces dans de des du elle en et eux il ils je la le les leur lui ma mais me meme mes moi mon ne nos
+notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi ton tu un une vos votre vous c d j l m n s t y
+""".split())
+
+# Suffixes retirés (le plus long d'abord), s'il reste au moins 3 lettres
+SUFFIXES = sorted([
+    'issement', 'ement', 'ation', 'atrice', 'ateur', 'ance', 'ence', 'isme', 'iste', 'ique', 'able',
+    'ible', 'euse', 'eux', 'ite', 'ive', 'if', 'ee', 'er', 'ez', 'e',
+], key=len, reverse=True)
+
+_MOT = re.compile(r'\w+')
+
+
+def sans_accents(texte):
+    texte = unicodedata.normalize('NFKD', texte)
+    return ''.join(c for c in texte if not unicodedata.combining(c)).lower()
+
+
+def raciniser(mot):
+    """Racine d'un mot déjà en minuscules sans accents : 'traitements' -> 'trait'."""
+    if len(mot) > 3 and mot.endswith('aux'):
+        mot = mot[:-3] + 'al'
+    elif len(mot) > 3 and mot[-1] in 'sx':
+        mot = mot[:-1]
+    for suffixe in SUFFIXES:
+        if mot.endswith(suffixe) and len(mot) - len(suffixe) >= 3:
+            return mot[:-len(suffixe)]
+    return mot
+
+
+def racines(texte):
+    """Racines des mots significatifs d'un texte, dans l'ordre (les phrases restent cherchables)."""
+    return [raciniser(mot) for mot in _MOT.findall(sans_accents(texte or '')) if mot not in MOTS_VIDES]
+
+
+def analyser(requete):
+    """'aspirine "douleur thoracique"' -> [['aspirin'], ['douleur', 'thorac']] : mots et phrases."""
+    elements = []
+    for phrase, mots in re.findall(r'"([^"]*)"|(\S+)', requete or ''):
+        if phrase:
+            if racines(phrase):
+                elements.append(racines(phrase))
+        else:
+            elements.extend([racine] for racine in racines(mots))
+    return elements
+
+
+# ----------------------------------------------------------------------
+# EXTRAITS
+# ----------------------------------------------------------------------
+
+def extrait(texte, cherchees, taille=MOTS_EXTRAIT):
+    """
+    Fenêtre de `taille` mots la plus riche en racines `cherchees`, mots trouvés entre <mark>.
+    None si le texte ne contient aucune de ces racines.
+    """
+    if not texte:
+        return None
+    mots = list(_MOT.finditer(texte))
+    trouves = [i for i, m in enumerate(mots) if raciniser(sans_accents(m.group())) in cherchees]
+    if not trouves:
+        return None
+    # Début de fenêtre couvrant le plus de mots trouvés
+    debut = max(trouves, key=lambda i: sum(1 for j in trouves if i <= j < i + taille))
+    debut = max(0, min(debut - 2, len(mots) - taille))
+    fin = min(len(mots), debut + taille)
+    marques = set(trouves)
+
+    morceaux = []
+    position = mots[debut].start()
+    for i in range(debut, fin):
+        m = mots[i]
+        morceaux.append(escape(texte[position:m.start()]))
+        morceaux.append(f'<mark>{escape(m.group())}</mark>' if i in marques else escape(m.group()))
+        position = m.end()
+    return (
+        ('… ' if debut > 0 else '')
+        + ''.join(morceaux)
+        + (' …' if fin < len(mots) else escape(texte[position:]))
+    )
+
+
+def extraits(suivi, elements):
+    cherchees = {racine for element in elements for racine in element}
+    resultat = {}
+    for champ in CHAMPS:
+        morceau = extrait(getattr(suivi, champ), cherchees)
+        if morceau:
+            resultat[champ] = morceau
+    return resultat
+
+
+# ----------------------------------------------------------------------
+# BACKENDS
+# ----------------------------------------------------------------------
+
+class RechercheSimple:
+    """LIKE sur les champs bruts (sans racinisation), par date décroissante."""
+
+    def installer(self, connexion):
+        pass
+
+    def indexer(self, suivis, connexion=connection, nouveaux=False):
+        pass
+
+    def supprimer(self, ids):
+        pass
+
+    def filtre(self, requete):
+        # LIKE '%texte%' : préfixes et sous-chaînes compris
+        condition = Q()
+        for phrase, mot in re.findall(r'"([^"]*)"|(\S+)', requete):
+            texte = phrase or mot
+            condition &= Q(motif__icontains=texte) | Q(notes_medecin__icontains=texte) | Q(prescriptions__icontains=texte)
+        return condition
+
+    def classer(self, requete, patient_id, limite):
+        queryset = Suivi.objects.filter(self.filtre(requete))
+        if patient_id:
+            queryset = queryset.filter(patient_id=patient_id)
+        return [(pk, None) for pk in queryset.order_by('-date_suivi', '-pk').values_list('pk', flat=True)[:limite]]
+
+
+class RechercheFTS5(RechercheSimple):
+    """SQLite : table FTS5 des textes racinisés, rowid = id du suivi."""
+    TABLE = 'medical_data_suivi_fts'
+
+    def installer(self, connexion):
+        with connexion.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = %s", [self.TABLE])
+            existe = cursor.fetchone()[0]
+            if not existe:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {self.TABLE} USING fts5({', '.join(CHAMPS)}, tokenize='unicode61')"
+                )
+        if existe:
+            return
+        # Première installation : indexation des suivis existants, en une transaction
+        with transaction.atomic(using=connexion.alias):
+            lot = []
+            for suivi in Suivi.objects.using(connexion.alias).only('pk', *CHAMPS).iterator(chunk_size=TAILLE_LOT):
+                lot.append(suivi)
+                if len(lot) >= TAILLE_LOT:
+                    self.indexer(lot, connexion, nouveaux=True)
+                    lot = []
+            self.indexer(lot, connexion, nouveaux=True)
+
+    def indexer(self, suivis, connexion=connection, nouveaux=False):
+        if not suivis:
+            return
+        with connexion.cursor() as cursor:
+            if not nouveaux:
+                cursor.executemany(f"DELETE FROM {self.TABLE} WHERE rowid = %s", [(s.pk,) for s in suivis])
+            cursor.executemany(
+                f"INSERT INTO {self.TABLE}(rowid, {', '.join(CHAMPS)}) VALUES (%s, %s, %s, %s)",
+                [(s.pk, *[' '.join(racines(getattr(s, champ))) for champ in CHAMPS]) for s in suivis],
+            )
+
+    def supprimer(self, ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {self.TABLE} WHERE rowid = %s", [(pk,) for pk in ids])
+
+    def _match(self, requete, prefixes=False):
+        elements = analyser(requete)
+        if not elements:
+            return None
+        # "parac"* : tout mot indexé commençant par la racine (pour une phrase, par son dernier mot)
+        etoile = '*' if prefixes else ''
+        return ' AND '.join('"' + ' '.join(element) + '"' + etoile for element in elements)
+
+    def filtre(self, requete):
+        match = self._match(requete, prefixes=True)
+        if match is None:
+            return Q()
+        return Q(pk__in=RawSQL(f"SELECT rowid FROM {self.TABLE} WHERE {self.TABLE} MATCH %s", [match]))
+
+    def classer(self, requete, patient_id, limite):
+        match = self._match(requete)
+        if match is None:
+            return []
+        filtre_patient = ' AND s.patient_id = %s' if patient_id else ''
+        poids = ', '.join(str(POIDS[champ]) for champ in CHAMPS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT f.rowid, bm25({self.TABLE}, {poids}) AS score FROM {self.TABLE} f "
+                f"JOIN medical_data_suivi s ON s.id = f.rowid "
+                f"WHERE {self.TABLE} MATCH %s{filtre_patient} ORDER BY score, f.rowid DESC LIMIT %s",
+                [match, *([patient_id] if patient_id else []), limite],
+            )
+            # bm25 : plus petit = plus pertinent ; exposé en score positif
+            return [(pk, round(-score, 4)) for pk, score in cursor.fetchall()]
+
+
+class RecherchePostgres(RechercheSimple):
+    """PostgreSQL : configuration 'french' (racinisation Snowball), index GIN sur l'expression."""
+    VECTEUR = (
+        "to_tsvector('french', coalesce(motif, '') || ' ' || coalesce(notes_medecin, '') "
+        "|| ' ' || coalesce(prescriptions, ''))"
+    )
+
+    def installer(self, connexion):
+        with connexion.cursor() as cursor:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS suivi_recherche_fr_idx ON medical_data_suivi USING gin ({self.VECTEUR})'
+            )
+
+    def filtre(self, requete):
+        # to_tsquery avec préfixes ('parac:*'), la racinisation 'french' s'appliquant aux termes
+        elements = []
+        for phrase, mots in re.findall(r'"([^"]*)"|(\S+)', requete or ''):
+            mots = _MOT.findall((phrase or mots).lower())
+            if mots:
+                elements.append(' <-> '.join(mots[:-1] + [mots[-1] + ':*']))
+        if not elements:
+            return Q()
+        return Q(pk__in=RawSQL(
+            f"SELECT id FROM medical_data_suivi WHERE {self.VECTEUR} @@ to_tsquery('french', %s)",
+            [' & '.join(f'({element})' for element in elements)],
+        ))
+
+    def classer(self, requete, patient_id, limite):
+        filtre_patient = ' AND patient_id = %s' if patient_id else ''
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT id, ts_rank_cd({self.VECTEUR}, q) AS score "
+                f"FROM medical_data_suivi, websearch_to_tsquery('french', %s) q "
+                f"WHERE {self.VECTEUR} @@ q{filtre_patient} ORDER BY score DESC, id DESC LIMIT %s",
+                [requete, *([patient_id] if patient_id else []), limite],
+            )
+            return [(pk, round(score, 4)) for pk, score in cursor.fetchall()]
+
+
+BACKENDS = {
+    'simple': RechercheSimple,
+    'fts5': RechercheFTS5,
+    'postgres': RecherchePostgres,
+}
+
+
+def backend(connexion=connection):
+    nom = getattr(settings, 'RECHERCHE_SUIVIS_BACKEND', 'auto')
+    if nom == 'auto':
+        nom = {'sqlite': 'fts5', 'postgresql': 'postgres'}.get(connexion.vendor, 'simple')
+    return BACKENDS[nom]()
+
+
+def installer(sender=None, using='default', **kwargs):
+    """Crée les structures du backend (post_migrate)."""
+    from django.db import connections
+
+    connexion = connections[using]
+    if Suivi._meta.db_table in connexion.introspection.table_names():
+        backend(connexion).installer(connexion)
+
+
+# ----------------------------------------------------------------------
+# RECHERCHE
+# ----------------------------------------------------------------------
+
+def filtre(requete):
+    """Condition (Q) : suivis contenant tous les mots et phrases de `requete`, le dernier mot de chacun en préfixe."""
+    return backend().filtre(requete)
+
+
+def rechercher(requete, patient_id=None, limite=LIMITE_DEFAUT):
+    """Suivis les plus pertinents : [(suivi, score, {champ: extrait surligné})]."""
+    classement = backend().classer(requete, patient_id, limite)
+    suivis = Suivi.objects.in_bulk([pk for pk, _ in classement])
+    elements = analyser(requete)
+    return [
+        (suivis[pk], score, extraits(suivis[pk], elements))
+        for pk, score in classement if pk in suivis
+    ]
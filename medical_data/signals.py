@@ -0,0 +1,266 @@
+"""
+Réactions aux écritures sur les modèles médicaux et les patients.
+Connectés dans MedicalDataConfig.ready().
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from medical_data import agregats, alertes, analytique, recherche, stats
+from medical_data.models import AgregatJournalierPatient
+from medical_data.models import Suivi, RendezVous, ReleveVital
+from medical_data.versions import incrementer_version
+from users import autocompletion
+from users.models import DetailsPatient
+
+
+def _dans_semaine_courante(date_heure):
+    lundi = stats.debut_semaine()
+    return lundi <= date_heure < lundi + timedelta(days=7)
+
+
+# ----------------------------------------------------------------------
+# STATISTIQUES GLOBALES (medical_data/stats.py)
+# ----------------------------------------------------------------------
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def stats_patient_enregistre(sender, instance, created, **kwargs):
+    if created and not instance.is_personnel:
+        stats.ajuster('total_patients', 1)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def stats_patient_supprime(sender, instance, **kwargs):
+    if not instance.is_personnel:
+        stats.ajuster('total_patients', -1)
+
+
+@receiver(post_save, sender=RendezVous)
+def stats_rdv_enregistre(sender, instance, created, **kwargs):
+    if not created:
+        # L'ancienne date n'est pas connue : recalcul complet
+        stats.invalider()
+    elif _dans_semaine_courante(instance.date_heure):
+        stats.ajuster('rdv_this_week', 1)
+
+
+@receiver(post_delete, sender=RendezVous)
+def stats_rdv_supprime(sender, instance, **kwargs):
+    if _dans_semaine_courante(instance.date_heure):
+        stats.ajuster('rdv_this_week', -1)
+
+
+@receiver(post_save, sender=Suivi)
+def stats_suivi_enregistre(sender, instance, created, **kwargs):
+    if created:
+        stats.ajuster('suivis_last_month', 1)
+
+
+@receiver(post_delete, sender=Suivi)
+def stats_suivi_supprime(sender, instance, **kwargs):
+    if instance.date_suivi >= timezone.now() - timedelta(days=30):
+        stats.ajuster('suivis_last_month', -1)
+
+
+@receiver(post_save, sender=ReleveVital)
+def stats_releve_enregistre(sender, instance, created, **kwargs):
+    if not created:
+        return
+    # Nouveau patient actif seulement s'il n'avait aucun autre relevé sur 30 jours
+    deja_actif = ReleveVital.objects.filter(
+        patient_id=instance.patient_id,
+        date_releve__gte=timezone.now() - timedelta(days=30),
+    ).exclude(pk=instance.pk).exists()
+    if not deja_actif:
+        stats.ajuster('patients_suivi_actif_30j', 1)
+
+
+@receiver(post_delete, sender=ReleveVital)
+def stats_releve_supprime(sender, instance, **kwargs):
+    stats.invalider()
+
+
+# ----------------------------------------------------------------------
+# SÉRIES TEMPORELLES (medical_data/analytique.py)
+# ----------------------------------------------------------------------
+# Seules les périodes closes sont en cache : les créations (datées de
+# maintenant) ne les touchent pas, contrairement aux suppressions et aux
+# rendez-vous, dont la date est libre.
+
+@receiver(pre_save, sender=RendezVous)
+def analytique_rdv_avant_modification(sender, instance, **kwargs):
+    # Date d'origine d'un rendez-vous déplacé : sa période quitte aussi le cache
+    if instance.pk and not instance._state.adding:
+        instance._date_heure_initiale = (
+            RendezVous.objects.filter(pk=instance.pk).values_list('date_heure', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=RendezVous)
+@receiver(post_delete, sender=RendezVous)
+def analytique_rdv_modifie(sender, instance, **kwargs):
+    analytique.invalider('rendez_vous', instance.date_heure)
+    initiale = getattr(instance, '_date_heure_initiale', None)
+    if initiale is not None and initiale != instance.date_heure:
+        analytique.invalider('rendez_vous', initiale)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def analytique_patient_supprime(sender, instance, **kwargs):
+    analytique.invalider('nouveaux_patients', instance.date_joined)
+
+
+@receiver(post_delete, sender=Suivi)
+def analytique_suivi_supprime(sender, instance, **kwargs):
+    analytique.invalider('suivis', instance.date_suivi)
+
+
+@receiver(post_delete, sender=ReleveVital)
+def analytique_releve_supprime(sender, instance, **kwargs):
+    analytique.invalider('patients_actifs', instance.date_releve)
+
+
+# ----------------------------------------------------------------------
+# VERSION DES DONNÉES PAR PATIENT (medical_data/versions.py)
+# ----------------------------------------------------------------------
+
+@receiver(pre_save, sender=Suivi)
+@receiver(pre_save, sender=RendezVous)
+def version_patient_avant_modification(sender, instance, **kwargs):
+    # Élément rattaché à un autre patient : l'ancien patient change aussi de version
+    # (pour les relevés, lu par agregats_releve_avant_modification)
+    if instance.pk and not instance._state.adding:
+        instance._patient_id_initial = (
+            sender.objects.filter(pk=instance.pk).values_list('patient_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=ReleveVital)
+@receiver(post_delete, sender=ReleveVital)
+@receiver(post_save, sender=Suivi)
+@receiver(post_delete, sender=Suivi)
+@receiver(post_save, sender=RendezVous)
+@receiver(post_delete, sender=RendezVous)
+def version_donnees_patient_modifiees(sender, instance, **kwargs):
+    incrementer_version(instance.patient_id)
+    initial = getattr(instance, '_patient_id_initial', None)
+    if initial is not None and initial != instance.patient_id:
+        incrementer_version(initial)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def version_patient_modifie(sender, instance, **kwargs):
+    incrementer_version(instance.pk)
+
+
+@receiver(post_save, sender=DetailsPatient)
+@receiver(post_delete, sender=DetailsPatient)
+def version_details_patient_modifies(sender, instance, **kwargs):
+    incrementer_version(instance.patient_id)
+
+
+# ----------------------------------------------------------------------
+# AGRÉGATS JOURNALIERS DES RELEVÉS (medical_data/agregats.py)
+# ----------------------------------------------------------------------
+
+@receiver(pre_save, sender=ReleveVital)
+def agregats_releve_avant_modification(sender, instance, **kwargs):
+    # Journée et patient d'origine d'un relevé modifié : à recalculer s'ils changent
+    if instance.pk and not instance._state.adding:
+        initial = ReleveVital.objects.filter(pk=instance.pk).values_list('date_releve', 'patient_id').first()
+        if initial:
+            instance._date_releve_initiale, instance._patient_id_initial = initial
+
+
+@receiver(post_save, sender=ReleveVital)
+def agregats_releve_enregistre(sender, instance, created, **kwargs):
+    if created:
+        agregats.ajouter([instance])
+        return
+    journees = {(instance.patient_id, timezone.localdate(instance.date_releve))}
+    initiale = getattr(instance, '_date_releve_initiale', None)
+    if initiale is not None:
+        journees.add((instance._patient_id_initial, timezone.localdate(initiale)))
+    for patient_id, jour in journees:
+        agregats.recalculer(patient_id, jour)
+
+
+def _supprime_avec_patient(origin):
+    """Suppression en cascade depuis un patient : traitée une seule fois par agregats_patient_supprime."""
+    modele = origin._meta.model if hasattr(origin, '_meta') else getattr(origin, 'model', None)
+    return modele is not None and modele._meta.label == settings.AUTH_USER_MODEL
+
+
+@receiver(post_delete, sender=ReleveVital)
+def agregats_releve_supprime(sender, instance, origin=None, **kwargs):
+    if _supprime_avec_patient(origin):
+        return
+    # Une suppression en masse (queryset.delete()) ne recalcule chaque journée qu'une fois
+    cle = (instance.patient_id, timezone.localdate(instance.date_releve))
+    deja_recalcules = getattr(origin, '_agregats_recalcules', None)
+    if deja_recalcules is None:
+        deja_recalcules = set()
+        if origin is not None:
+            origin._agregats_recalcules = deja_recalcules
+    if cle not in deja_recalcules:
+        deja_recalcules.add(cle)
+        agregats.recalculer(*cle)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def agregats_patient_avant_suppression(sender, instance, **kwargs):
+    instance._jours_agregats = list(
+        AgregatJournalierPatient.objects.filter(patient=instance).values_list('jour', flat=True)
+    )
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def agregats_patient_supprime(sender, instance, **kwargs):
+    # Les lignes du patient sont supprimées en cascade ; celles du centre sont recalculées
+    agregats.recalculer_centre(getattr(instance, '_jours_agregats', []))
+
+
+# ----------------------------------------------------------------------
+# ALERTES (medical_data/alertes.py)
+# ----------------------------------------------------------------------
+
+@receiver(post_save, sender=ReleveVital)
+def alertes_releve_enregistre(sender, instance, created, **kwargs):
+    if created:
+        alertes.evaluer_apres_commit(instance.patient_id, instance.date_releve)
+
+
+# ----------------------------------------------------------------------
+# RECHERCHE PLEIN TEXTE DES NOTES CLINIQUES (medical_data/recherche.py)
+# ----------------------------------------------------------------------
+# Dans la transaction de l'écriture : un rollback annule aussi la mise à jour de l'index
+
+@receiver(post_save, sender=Suivi)
+def recherche_suivi_enregistre(sender, instance, **kwargs):
+    recherche.backend().indexer([instance])
+
+
+@receiver(post_delete, sender=Suivi)
+def recherche_suivi_supprime(sender, instance, **kwargs):
+    recherche.backend().supprimer([instance.pk])
+
+
+# ----------------------------------------------------------------------
+# AUTOCOMPLÉTION DE L'ACCUEIL (users/autocompletion.py)
+# ----------------------------------------------------------------------
+# Index en mémoire : mis à jour après le commit, pour ne jamais proposer un patient annulé
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def autocompletion_patient_enregistre(sender, instance, **kwargs):
+    transaction.on_commit(lambda: autocompletion.index.mettre_a_jour([instance]))
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def autocompletion_patient_supprime(sender, instance, **kwargs):
+    pk = instance.pk  # remis à None par Django après la suppression
+    transaction.on_commit(lambda: autocompletion.index.retirer([pk]))
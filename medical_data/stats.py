@@ -0,0 +1,102 @@
+"""
+Statistiques globales du tableau de bord (GlobalStatsView).
+
+Les compteurs sont calculés une fois (4 requêtes), puis conservés dans le cache
+partagé entre les workers (alias 'analytique', settings.CACHES) et tenus à jour de
+façon incrémentale par les signaux (medical_data/signals.py) : un ajustement fait par
+un worker est vu par tous. as_of reste la date du dernier recalcul complet.
+Un recalcul complet a lieu quand l'instantané est plus vieux que
+settings.STATS_FRAICHEUR_SECONDES ou quand la semaine a changé : les fenêtres
+glissantes (30 jours) ne dérivent donc jamais plus longtemps que cette borne.
+La lecture ne coûte qu'un accès cache, quelle que soit la taille des tables.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+ALIAS = 'analytique'
+PREFIXE = 'stats_globales:'
+COMPTEURS = ['total_patients', 'rdv_this_week', 'suivis_last_month', 'patients_suivi_actif_30j']
+CLE_CALCUL = PREFIXE + 'calcule_le'
+CLE_SEMAINE = PREFIXE + 'debut_semaine'
+
+
+def debut_semaine(maintenant=None):
+    """Lundi 00:00 (fuseau courant) de la semaine de `maintenant`, en datetime aware."""
+    aujourd_hui = timezone.localdate(maintenant or timezone.now())
+    lundi = aujourd_hui - timedelta(days=aujourd_hui.weekday())
+    return timezone.make_aware(datetime.combine(lundi, time.min))
+
+
+def calculer(maintenant=None):
+    """Recalcul complet depuis la base (plages de dates 'sargables' : index utilisables)."""
+    from users.models import Patient
+    from medical_data.models import Suivi, RendezVous, ReleveVital
+
+    maintenant = maintenant or timezone.now()
+    lundi = debut_semaine(maintenant)
+    il_y_a_30j = maintenant - timedelta(days=30)
+    return {
+        'total_patients': Patient.objects.filter(is_personnel=False).count(),
+        'rdv_this_week': RendezVous.objects.filter(
+            date_heure__gte=lundi, date_heure__lt=lundi + timedelta(days=7)
+        ).count(),
+        'suivis_last_month': Suivi.objects.filter(date_suivi__gte=il_y_a_30j).count(),
+        'patients_suivi_actif_30j': ReleveVital.objects.filter(
+            date_releve__gte=il_y_a_30j
+        ).values('patient').distinct().count(),
+    }
+
+
+def rafraichir(maintenant=None):
+    """Recalcule et remplace l'instantané en cache. Retourne les statistiques."""
+    maintenant = maintenant or timezone.now()
+    valeurs = calculer(maintenant)
+    caches[ALIAS].set_many({PREFIXE + nom: valeur for nom, valeur in valeurs.items()}, timeout=None)
+    caches[ALIAS].set_many({
+        CLE_CALCUL: maintenant,
+        CLE_SEMAINE: debut_semaine(maintenant),
+    }, timeout=None)
+    return dict(valeurs, as_of=maintenant)
+
+
+def stats_globales():
+    """Statistiques servies depuis le cache ; recalcul seulement si l'instantané est périmé."""
+    maintenant = timezone.now()
+    cles = [PREFIXE + nom for nom in COMPTEURS] + [CLE_CALCUL, CLE_SEMAINE]
+    valeurs = caches[ALIAS].get_many(cles)
+    fraicheur = timedelta(seconds=getattr(settings, 'STATS_FRAICHEUR_SECONDES', 300))
+
+    if (
+        len(valeurs) < len(cles)
+        or maintenant - valeurs[CLE_CALCUL] > fraicheur
+        or valeurs[CLE_SEMAINE] != debut_semaine(maintenant)
+    ):
+        return rafraichir(maintenant)
+
+    stats = {nom: valeurs[PREFIXE + nom] for nom in COMPTEURS}
+    stats['as_of'] = valeurs[CLE_CALCUL]
+    return stats
+
+
+def ajuster(compteur, delta=1):
+    """
+    Ajustement incrémental d'un compteur, appliqué après le commit.
+    Sans instantané en cache, rien à faire : la prochaine lecture recalculera.
+    as_of n'est pas avancé : les autres compteurs (fenêtres glissantes) datent du dernier calcul.
+    """
+    def _appliquer():
+        try:
+            caches[ALIAS].incr(PREFIXE + compteur, delta)
+        except ValueError:
+            pass
+
+    transaction.on_commit(_appliquer)
+
+
+def invalider():
+    """Force un recalcul complet à la prochaine lecture (modification non incrémentable)."""
+    transaction.on_commit(lambda: caches[ALIAS].delete(CLE_CALCUL))
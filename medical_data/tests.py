@@ -1,3 +1,1149 @@
-from django.test import TestCase
+import importlib
+import os
+import re
+import tempfile
+import time as horloge
+from datetime import date, datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from centre.cache import FichiersLRUCache
+from medical_data import agenda, agregats, alertes, analytique, chronologie, cohortes, echantillonnage, ingestion, recherche, stats
+from medical_data.models import (
+    Suivi, RendezVous, ReleveVital, Alerte, AgregatJournalierCentre, AgregatJournalierPatient, SeuilsAlerte,
+)
+from medical_data.versions import version_patient
+from users.models import Patient
+
+
+# ----------------------------------------------------------------------
+# PLANS D'EXÉCUTION DES REQUÊTES CHAUDES
+# ----------------------------------------------------------------------
+
+def plan(sql):
+    """Lignes du plan d'exécution (EXPLAIN) d'une requête capturée."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # Sur des tables de test minuscules, PostgreSQL préfère un parcours séquentiel
+            # même quand l'index existe : on ne le laisse choisir que faute d'index
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            return [ligne[0] for ligne in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [ligne[-1] for ligne in cursor.fetchall()]
+
+
+def parcours_complets(lignes, tables):
+    """Lignes du plan qui lisent toute une table de `tables` sans passer par un index."""
+    if connection.vendor == 'postgresql':
+        motif = re.compile(r'Seq Scan on (\w+)')
+    else:
+        # « SCAN table » seul ; « SCAN table USING INDEX ... » est un parcours ordonné d'index
+        motif = re.compile(r'^SCAN (\w+)$')
+    return [ligne for ligne in lignes if (trouve := motif.search(ligne.strip())) and trouve.group(1) in tables]
+
+
+class PlansRequetesTests(TestCase):
+    """
+    Les requêtes des vues et viewsets les plus sollicités doivent s'appuyer sur un index :
+    chaque SELECT exécuté est repassé dans EXPLAIN et le test échoue au premier parcours complet
+    d'une des tables surveillées (index supprimé, filtre ou tri modifié dans une vue...).
+    """
+    TABLES = {
+        Patient._meta.db_table,
+        Suivi._meta.db_table,
+        RendezVous._meta.db_table,
+        ReleveVital._meta.db_table,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.personnel = Patient.objects.create(first_name='Dr', last_name='Essomba', telephone='690000100', is_personnel=True)
+        cls.patients = [
+            Patient.objects.create(first_name=f'Patient {i}', telephone=f'69000020{i}') for i in range(3)
+        ]
+        maintenant = timezone.now()
+        for rang, patient in enumerate(cls.patients):
+            for i in range(3):
+                Suivi.objects.create(patient=patient, motif=f'Motif {i}', notes_medecin='RAS')
+                ReleveVital.objects.create(patient=patient, tension_systolique=120 + i, tension_diastolique=80)
+            RendezVous.objects.create(patient=patient, date_heure=maintenant + timedelta(days=2, hours=rang), motif='Contrôle')
+        cls.patient = cls.patients[0]
+
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        self.api.force_authenticate(self.personnel)
+
+    def verifier_plans(self, client, url):
+        with CaptureQueriesContext(connection) as requetes:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+
+        examinees = 0
+        for requete in requetes.captured_queries:
+            sql = requete['sql']
+            if not sql.startswith('SELECT') or not any(f'"{table}"' in sql for table in self.TABLES):
+                continue
+            lignes = plan(sql)
+            self.assertEqual(
+                parcours_complets(lignes, self.TABLES), [],
+                f"{url} : parcours complet de table\n{sql}\n" + '\n'.join(lignes),
+            )
+            examinees += 1
+        self.assertGreater(examinees, 0, url)
+
+    def test_api_liste_patients(self):
+        self.verifier_plans(self.api, '/api/v1/patients/')
+
+    def test_api_liste_suivis(self):
+        self.verifier_plans(self.api, '/api/v1/suivis/')
+
+    def test_api_suivis_d_un_patient(self):
+        self.verifier_plans(self.api, f'/api/v1/suivis/?patient_id={self.patient.pk}')
+
+    def test_api_rendez_vous_d_un_patient(self):
+        self.verifier_plans(self.api, f'/api/v1/rendezvous/?patient_id={self.patient.pk}')
+
+    def test_api_chronologie_patient(self):
+        self.verifier_plans(self.api, f'/api/v1/patients/{self.patient.pk}/chronologie/')
+
+    def test_tableau_de_bord_patient(self):
+        self.client.force_login(self.patient)
+        self.verifier_plans(self.client, reverse('patient_dashboard'))
+
+    def test_historique_patient(self):
+        self.client.force_login(self.patient)
+        self.verifier_plans(self.client, reverse('patient_historique'))
+
+    def test_detection_parcours_complet(self):
+        # Garde-fou du test lui-même : un filtre sans index est bien signalé
+        sql = str(ReleveVital.objects.filter(tension_systolique=120).query)
+        self.assertNotEqual(parcours_complets(plan(sql), self.TABLES), [])
+
+
+# ----------------------------------------------------------------------
+# CHRONOLOGIE UNIFIÉE (medical_data/chronologie.py)
+# ----------------------------------------------------------------------
+
+class ChronologieTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.personnel = Patient.objects.create(first_name='Dr', last_name='Essomba', telephone='690000100', is_personnel=True)
+        cls.patient = Patient.objects.create(first_name='Awa', telephone='690000200')
+        autre = Patient.objects.create(first_name='Paul', telephone='690000201')
+        cls.t = t = timezone.now().replace(microsecond=0) - timedelta(days=1)
+        heures = lambda h: t + timedelta(hours=h)
+        for h in (-5, -1, 0, 3):
+            suivi = Suivi.objects.create(patient=cls.patient, motif=f'S{h}', notes_medecin='RAS')
+            Suivi.objects.filter(pk=suivi.pk).update(date_suivi=heures(h))  # auto_now_add
+        for h in (-4, 0, 2):
+            RendezVous.objects.create(patient=cls.patient, date_heure=heures(h), motif=f'V{h}')
+        for h in (-3, -1, 0, 0, 1):
+            ReleveVital.objects.create(patient=cls.patient, date_releve=heures(h), tension_systolique=120)
+        ReleveVital.objects.create(patient=autre, date_releve=heures(0), tension_systolique=130)
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.personnel)
+
+    def tout_lire(self, taille, types=None):
+        lus, curseur = [], None
+        for _ in range(100):
+            evenements, curseur = chronologie.page(self.patient.pk, curseur, taille, types)
+            self.assertLessEqual(len(evenements), taille)
+            lus.extend((t, objet.pk) for t, _, objet in evenements)
+            if curseur is None:
+                return lus
+        self.fail('pagination sans fin')
+
+    def test_fusion_ordonnee_et_departage(self):
+        evenements, suivant = chronologie.page(self.patient.pk, taille=100)
+        self.assertIsNone(suivant)
+        self.assertEqual(len(evenements), 12)
+        dates = [date for _, date, _ in evenements]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        # À instant égal : suivi, puis rendez-vous, puis relevés (id décroissant)
+        simultanes = [(t, objet.pk) for t, date, objet in evenements if date == self.t]
+        releves = ReleveVital.objects.filter(patient=self.patient, date_releve=self.t).order_by('-pk')
+        releves = list(releves.values_list('pk', flat=True))
+        self.assertEqual([t for t, _ in simultanes], ['suivi', 'rendez_vous', 'releve', 'releve'])
+        self.assertEqual([pk for t, pk in simultanes if t == 'releve'], releves)
+
+    def test_continuite_du_curseur(self):
+        complet = self.tout_lire(100)
+        for taille in (1, 2, 3, 5, 11, 12):
+            with self.subTest(taille=taille):
+                self.assertEqual(self.tout_lire(taille), complet)  # ni doublon ni trou
+
+    def test_filtre_par_types(self):
+        complet = self.tout_lire(100)
+        for types in (['releve'], ['suivi', 'rendez_vous']):
+            with self.subTest(types=types):
+                attendu = [e for e in complet if e[0] in types]
+                self.assertEqual(self.tout_lire(2, types), attendu)
+
+    def test_api(self):
+        url = f'/api/v1/patients/{self.patient.pk}/chronologie/'
+        lus, params = [], {'page_size': 5, 'types': 'suivi,releve,inconnu'}
+        while True:
+            corps = self.api.get(url, params).json()
+            lus.extend((r['type'], r['donnees']['id']) for r in corps['results'])
+            if not corps['curseur_suivant']:
+                break
+            params = {'page_size': 5, 'types': 'suivi,releve', 'curseur': corps['curseur_suivant']}
+        self.assertEqual(lus, self.tout_lire(100, ['suivi', 'releve']))
+        for curseur in ('xx', '-.-', 'a.b.c', chronologie.encoder({}) + '.-'):
+            self.assertEqual(self.api.get(url, {'curseur': curseur}).status_code, 400, curseur)
+        self.assertEqual(self.api.get(f'/api/v1/patients/{self.personnel.pk}/chronologie/').status_code, 404)
+
+
+# ----------------------------------------------------------------------
+# STATISTIQUES GLOBALES INCRÉMENTALES (medical_data/stats.py)
+# ----------------------------------------------------------------------
+
+class StatsGlobalesTests(TestCase):
+    """Les signaux tiennent les compteurs exacts sans recalcul complet, dans la borne de fraîcheur."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.personnel = Patient.objects.create(first_name='Dr', last_name='Essomba', telephone='690000100', is_personnel=True)
+        cls.patient = Patient.objects.create(first_name='Awa', telephone='690000200')
+        Suivi.objects.create(patient=cls.patient, motif='Motif', notes_medecin='RAS')
+        ReleveVital.objects.create(patient=cls.patient, tension_systolique=120, tension_diastolique=80)
+
+    def setUp(self):
+        caches[stats.ALIAS].clear()
+        self.api = APIClient()
+        self.api.force_authenticate(self.personnel)
+
+    def lire(self):
+        reponse = self.api.get('/api/v1/stats/global/')
+        self.assertEqual(reponse.status_code, 200)
+        return {nom: reponse.json()[nom] for nom in stats.COMPTEURS}
+
+    def verifier_sans_recalcul(self):
+        with mock.patch.object(stats, 'calculer', wraps=stats.calculer) as calculer:
+            valeurs = self.lire()
+        calculer.assert_not_called()
+        self.assertEqual(valeurs, stats.calculer())
+
+    def test_patient_cree_puis_supprime(self):
+        self.lire()
+        with self.captureOnCommitCallbacks(execute=True):
+            patient = Patient.objects.create(first_name='Paul', telephone='690000201')
+            Patient.objects.create(first_name='Dr', last_name='Ngo', telephone='690000101', is_personnel=True)
+        self.verifier_sans_recalcul()
+        self.assertEqual(self.lire()['total_patients'], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            patient.delete()
+        self.verifier_sans_recalcul()
+        self.assertEqual(self.lire()['total_patients'], 1)
+
+    def test_rendez_vous_cree_puis_supprime(self):
+        self.lire()
+        lundi = stats.debut_semaine()
+        with self.captureOnCommitCallbacks(execute=True):
+            cette_semaine = RendezVous.objects.create(patient=self.patient, date_heure=lundi + timedelta(days=3), motif='A')
+            RendezVous.objects.create(patient=self.patient, date_heure=lundi + timedelta(days=8), motif='B')
+        self.verifier_sans_recalcul()
+        self.assertEqual(self.lire()['rdv_this_week'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            cette_semaine.delete()
+        self.verifier_sans_recalcul()
+        self.assertEqual(self.lire()['rdv_this_week'], 0)
+
+    def test_suivi_et_releve(self):
+        self.lire()
+        with self.captureOnCommitCallbacks(execute=True):
+            autre = Patient.objects.create(first_name='Ines', telephone='690000202')
+            Suivi.objects.create(patient=self.patient, motif='Contrôle', notes_medecin='RAS')
+            ReleveVital.objects.create(patient=self.patient, tension_systolique=125, tension_diastolique=82)  # déjà actif
+            ReleveVital.objects.create(patient=autre, tension_systolique=130, tension_diastolique=85)
+        self.verifier_sans_recalcul()
+        self.assertEqual(self.lire()['suivis_last_month'], 2)
+        self.assertEqual(self.lire()['patients_suivi_actif_30j'], 2)
+
+    def test_modification_non_incrementable_recalcule(self):
+        rdv = RendezVous.objects.create(patient=self.patient, date_heure=stats.debut_semaine() + timedelta(days=1), motif='A')
+        self.lire()
+        with self.captureOnCommitCallbacks(execute=True):
+            rdv.date_heure += timedelta(days=7)
+            rdv.save()
+        with mock.patch.object(stats, 'calculer', wraps=stats.calculer) as calculer:
+            self.assertEqual(self.lire()['rdv_this_week'], 0)
+        calculer.assert_called_once()
+
+    def test_as_of_date_du_dernier_calcul(self):
+        calcul = timezone.now() - timedelta(seconds=30)
+        stats.rafraichir(calcul)
+        with self.captureOnCommitCallbacks(execute=True):
+            Patient.objects.create(first_name='Paul', telephone='690000203')
+        valeurs = stats.stats_globales()
+        self.assertEqual(valeurs['total_patients'], 2)
+        self.assertEqual(valeurs['as_of'], calcul)
+
+    @override_settings(STATS_FRAICHEUR_SECONDES=60)
+    def test_borne_de_fraicheur(self):
+        maintenant = timezone.now()
+        stats.rafraichir(maintenant - timedelta(seconds=30))
+        with mock.patch.object(stats, 'calculer', wraps=stats.calculer) as calculer:
+            self.lire()
+            calculer.assert_not_called()
+            stats.rafraichir(maintenant - timedelta(seconds=61))
+            calculer.reset_mock()
+            self.lire()
+            calculer.assert_called_once()
+
+
+# ----------------------------------------------------------------------
+# SÉRIES TEMPORELLES DU TABLEAU DE BORD (medical_data/analytique.py)
+# ----------------------------------------------------------------------
+
+class SeriesAnalytiquesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.personnel = Patient.objects.create(first_name='Dr', last_name='Essomba', telephone='690000100', is_personnel=True)
+        cls.patient = Patient.objects.create(first_name='Awa', telephone='690000200')
+
+    def setUp(self):
+        caches[analytique.ALIAS].clear()
+        self.api = APIClient()
+        self.api.force_authenticate(self.personnel)
+
+    def get(self, **params):
+        return self.api.get('/api/v1/stats/series/', params)
+
+    def test_parametres_invalides(self):
+        for params in [
+            {'fin': 'xx'}, {'debut': 'xx'}, {'fin': '2026-13-40'}, {'debut': 'xx', 'fin': 'yy'},
+            {'debut': '2026-02-10', 'fin': '2026-02-01'}, {'periode': 'heure'}, {'metriques': 'inconnue'},
+        ]:
+            self.assertEqual(self.get(**params).status_code, 400, params)
+
+    def test_plage_plafonnee(self):
+        self.assertEqual(self.get(debut='2025-01-01', fin='2026-01-02').status_code, 200)
+        self.assertEqual(self.get(debut='2025-01-01', fin='2026-01-03').status_code, 400)
+        self.assertEqual(self.get(periode='mois', debut='2020-01-01', fin='2026-01-01').status_code, 200)
+
+    def test_rendez_vous_deplace(self):
+        aujourd_hui = timezone.localdate()
+        debut, fin = aujourd_hui - timedelta(days=30), aujourd_hui - timedelta(days=1)
+        rdv = RendezVous.objects.create(
+            patient=self.patient, date_heure=timezone.now() - timedelta(days=20), motif='Contrôle', statut='P',
+        )
+
+        def presents():
+            series = self.get(debut=debut.isoformat(), fin=fin.isoformat(), metriques='rendez_vous').json()
+            return sum(series['series']['rendez_vous']['P'])
+
+        self.assertEqual(presents(), 1)  # périodes closes mises en cache
+        with self.captureOnCommitCallbacks(execute=True):
+            rdv.date_heure -= timedelta(days=5)
+            rdv.save()
+        self.assertEqual(presents(), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            rdv.delete()
+        self.assertEqual(presents(), 0)
+
+    def test_invalidation_apres_le_commit(self):
+        aujourd_hui = timezone.localdate()
+        debut, fin = aujourd_hui - timedelta(days=30), aujourd_hui - timedelta(days=1)
+        rdv = RendezVous.objects.create(
+            patient=self.patient, date_heure=timezone.now() - timedelta(days=20), motif='Contrôle', statut='P',
+        )
+
+        def presents():
+            series = self.get(debut=debut.isoformat(), fin=fin.isoformat(), metriques='rendez_vous').json()
+            return sum(series['series']['rendez_vous']['P'])
+
+        self.assertEqual(presents(), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            rdv.date_heure = timezone.now() + timedelta(days=2)  # hors de la plage
+            rdv.save()
+            # Avant le commit, l'entrée en cache n'est pas touchée : une lecture concurrente
+            # ne peut pas y remettre la valeur d'avant l'écriture, après une suppression anticipée
+            self.assertEqual(presents(), 1)
+        self.assertEqual(presents(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            rdv.date_heure = timezone.now() - timedelta(days=10)
+            rdv.save()
+        self.assertEqual(presents(), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            rdv.delete()
+        self.assertEqual(presents(), 0)
+
+    def test_cache_dedie(self):
+        aujourd_hui = timezone.localdate()
+        self.get(debut=(aujourd_hui - timedelta(days=10)).isoformat(), fin=aujourd_hui.isoformat())
+        cle = f'analytique:suivis:jour:{(aujourd_hui - timedelta(days=3)).isoformat()}'
+        self.assertEqual(caches[analytique.ALIAS].get(cle), 0)
+        self.assertIsNone(cache.get(cle))
+
+
+# ----------------------------------------------------------------------
+# AGRÉGATS JOURNALIERS DES RELEVÉS (medical_data/agregats.py)
+# ----------------------------------------------------------------------
+
+def lignes_agregats():
+    """État complet des tables d'agrégats, pour comparer incrémental et reconstruction."""
+    exclus = {'id'}
+    return (
+        [{k: v for k, v in ligne.items() if k not in exclus} for ligne in AgregatJournalierPatient.objects.values()],
+        [{k: v for k, v in ligne.items() if k not in exclus} for ligne in AgregatJournalierCentre.objects.values()],
+    )
+
+
+class AgregatsJournaliersTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.awa = Patient.objects.create(first_name='Awa', telephone='690000200')
+        cls.paul = Patient.objects.create(first_name='Paul', telephone='690000201')
+        cls.jour = timezone.localdate() - timedelta(days=10)
+        cls.lendemain = cls.jour + timedelta(days=1)
+
+    def setUp(self):
+        caches[analytique.ALIAS].clear()
+
+    def a(self, heure, jour=None):
+        return timezone.make_aware(datetime.combine(jour or self.jour, time(heure)))
+
+    def releve(self, patient, heure, jour=None, **valeurs):
+        return ReleveVital.objects.create(patient=patient, date_releve=self.a(heure, jour), **valeurs)
+
+    def test_ajouter(self):
+        self.releve(self.awa, 8, tension_systolique=120, tension_diastolique=80, glycemie='1.10')
+        self.releve(self.awa, 12, tension_systolique=140, tension_diastolique=90)
+        # Lot mêlant une journée existante et une nouvelle (chemin de l'ingestion)
+        lot = [
+            ReleveVital.objects.create(patient=self.awa, date_releve=self.a(18), tension_systolique=110),
+            ReleveVital.objects.create(patient=self.paul, date_releve=self.a(9), glycemie='0.90'),
+        ]
+        AgregatJournalierPatient.objects.all().delete()
+        AgregatJournalierCentre.objects.all().delete()
+        agregats.ajouter(ReleveVital.objects.exclude(pk__in=[r.pk for r in lot]))
+        agregats.ajouter(lot)
+
+        awa = AgregatJournalierPatient.objects.get(patient=self.awa, jour=self.jour)
+        self.assertEqual(awa.nombre, 3)
+        self.assertEqual(
+            (awa.tension_systolique_nombre, awa.tension_systolique_somme, awa.tension_systolique_min, awa.tension_systolique_max),
+            (3, 370, 110, 140),
+        )
+        self.assertEqual((awa.tension_diastolique_nombre, awa.tension_diastolique_min), (2, 80))
+        self.assertEqual((awa.glycemie_nombre, awa.glycemie_min, awa.glycemie_max), (1, 1.1, 1.1))
+        self.assertEqual((awa.poids_nombre, awa.poids_somme, awa.poids_min), (0, 0, None))
+        centre = AgregatJournalierCentre.objects.get(jour=self.jour)
+        self.assertEqual((centre.patients, centre.nombre, centre.glycemie_nombre), (2, 4, 2))
+        self.assertEqual((centre.glycemie_min, centre.glycemie_max), (0.9, 1.1))
+        # Incrémental et reconstruction donnent les mêmes lignes
+        incremental = lignes_agregats()
+        agregats.reconstruire()
+        self.assertEqual(lignes_agregats(), incremental)
+
+    def test_recalculer_apres_suppression(self):
+        self.releve(self.awa, 8, tension_systolique=120)
+        maximum = self.releve(self.awa, 12, tension_systolique=160)
+        seul = self.releve(self.paul, 9, tension_systolique=130)
+        maximum.delete()  # signal post_delete : recalculer()
+        awa = AgregatJournalierPatient.objects.get(patient=self.awa, jour=self.jour)
+        self.assertEqual((awa.nombre, awa.tension_systolique_somme, awa.tension_systolique_max), (1, 120, 120))
+        centre = AgregatJournalierCentre.objects.get(jour=self.jour)
+        self.assertEqual((centre.patients, centre.nombre, centre.tension_systolique_max), (2, 2, 130))
+
+        seul.delete()  # journée vide : ligne retirée, centre à un patient
+        self.assertFalse(AgregatJournalierPatient.objects.filter(patient=self.paul).exists())
+        self.assertEqual(AgregatJournalierCentre.objects.get(jour=self.jour).patients, 1)
+        ReleveVital.objects.filter(patient=self.awa).delete()
+        agregats.recalculer(self.awa.pk, self.jour)
+        self.assertFalse(AgregatJournalierPatient.objects.exists())
+        self.assertFalse(AgregatJournalierCentre.objects.exists())
+
+    def test_recalculer_centre(self):
+        self.releve(self.awa, 8, poids='70.5')
+        self.releve(self.paul, 8, poids='82')
+        attendu = lignes_agregats()
+        AgregatJournalierCentre.objects.filter(jour=self.jour).update(patients=9, poids_max=1)
+        AgregatJournalierCentre.objects.create(jour=self.lendemain, patients=1, nombre=3)  # sans ligne patient
+        agregats.recalculer_centre([self.jour, self.lendemain])
+        self.assertEqual(lignes_agregats(), attendu)
+
+    def test_reconstruire(self):
+        self.releve(self.awa, 8, tension_systolique=120)
+        self.releve(self.awa, 8, self.lendemain, tension_systolique=125)
+        self.releve(self.paul, 10, self.lendemain, glycemie='1.20')
+        attendu = lignes_agregats()
+        AgregatJournalierPatient.objects.update(nombre=99)
+        AgregatJournalierCentre.objects.all().delete()
+        # Plage : seule la journée demandée est reconstruite
+        self.assertEqual(agregats.reconstruire(self.lendemain, self.lendemain), (2, 1))
+        self.assertEqual(AgregatJournalierPatient.objects.get(jour=self.jour).nombre, 99)
+        self.assertEqual(agregats.reconstruire(), (3, 2))
+        self.assertEqual(lignes_agregats(), attendu)
+
+    def test_reconstruire_invalide_les_series(self):
+        self.releve(self.awa, 8, tension_systolique=120)
+        AgregatJournalierPatient.objects.all().delete()  # état d'avant la migration de remplissage
+
+        def actifs():
+            return analytique.serie('patients_actifs', 'jour', self.jour, self.jour)[1][0]
+
+        self.assertEqual(actifs(), 0)  # période close : mise en cache sans expiration
+        with self.captureOnCommitCallbacks(execute=True):
+            agregats.reconstruire()
+        self.assertEqual(actifs(), 1)
+
+    def test_migration_de_remplissage(self):
+        from django.apps import apps
+
+        self.releve(self.awa, 8, tension_systolique=120)
+        self.releve(self.paul, 9, self.lendemain, glycemie='1.00')
+        attendu = lignes_agregats()
+        AgregatJournalierPatient.objects.all().delete()
+        AgregatJournalierCentre.objects.all().delete()
+        migration = importlib.import_module('medical_data.migrations.0011_remplir_agregats_journaliers')
+        migration.remplir(apps, None)
+        self.assertEqual(lignes_agregats(), attendu)
+
+
+# ----------------------------------------------------------------------
+# COHORTES (medical_data/cohortes.py, /api/v1/stats/cohortes/)
+# ----------------------------------------------------------------------
+
+class CohortesTests(TestCase):
+    """Distributions par cohorte comparées à des valeurs calculées à la main."""
+
+    AUJOURD_HUI = date(2026, 3, 10)  # période de 90 jours : du 11/12/2025 au 10/03/2026
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.personnel = Patient.objects.create(
+            first_name='Dr', last_name='Essomba', telephone='690000700', is_personnel=True, groupe_sanguin='A+',
+        )
+        cls.awa = Patient.objects.create(
+            first_name='Awa', telephone='690000701', groupe_sanguin='A+', date_naissance=date(2008, 3, 11),
+        )
+        cls.paul = Patient.objects.create(
+            first_name='Paul', telephone='690000702', groupe_sanguin='A+', date_naissance=date(2008, 3, 10),
+        )
+        cls.marie = Patient.objects.create(first_name='Marie', telephone='690000703', groupe_sanguin='O-')
+        cls.jean = Patient.objects.create(
+            first_name='Jean', telephone='690000704', groupe_sanguin='B+', date_naissance=date(1950, 3, 10),
+        )
+
+        def releve(patient, quand, **valeurs):
+            ReleveVital.objects.create(patient=patient, date_releve=timezone.make_aware(quand), **valeurs)
+
+        # Awa : systolique moyenne 130, poids +2, glycémie hypo puis normale
+        releve(cls.awa, datetime(2026, 2, 1, 9), tension_systolique=120, poids='70.00', glycemie='0.60')
+        releve(cls.awa, datetime(2026, 2, 20, 9), tension_systolique=140, poids='72.00', glycemie='1.00')
+        # Hors période : ignoré
+        releve(cls.awa, datetime(2025, 11, 1, 9), tension_systolique=300, poids='50.00', glycemie='3.00')
+        # Paul : systolique 150, poids -3 (dernier - premier), glycémie intermédiaire puis hyper (borne 1,26 exclue)
+        releve(cls.paul, datetime(2026, 1, 5, 9), tension_systolique=150, poids='80.00', glycemie='1.20')
+        releve(cls.paul, datetime(2026, 2, 5, 9), poids='78.00')
+        releve(cls.paul, datetime(2026, 3, 10, 9), poids='77.00', glycemie='1.26')
+        # Marie : un seul poids (pas de variation), glycémie à la borne 1,1 -> intermédiaire
+        releve(cls.marie, datetime(2026, 2, 2, 9), tension_systolique=110, poids='60.00', glycemie='1.10')
+        # Le personnel n'entre dans aucune cohorte
+        releve(cls.personnel, datetime(2026, 2, 3, 9), tension_systolique=200, poids='90.00', glycemie='0.50')
+
+    def par_cohorte(self, groupe):
+        resultat = cohortes.calculer(groupe, 90, self.AUJOURD_HUI)
+        return {ligne['cohorte']: ligne for ligne in resultat['cohortes']}
+
+    def test_percentiles_et_bandes_de_glycemie(self):
+        a_positif = self.par_cohorte('groupe_sanguin')['A+']
+        self.assertEqual((a_positif['patients'], a_positif['patients_actifs']), (2, 2))
+        # Moyennes par patient [130, 150] : interpolation linéaire des percentiles
+        self.assertEqual(a_positif['tension_systolique'], {
+            'n': 2, 'moyenne': 140.0, 'p5': 131.0, 'p25': 135.0, 'p50': 140.0, 'p75': 145.0, 'p95': 149.0,
+        })
+        # Variations [+2, -3]
+        self.assertEqual(a_positif['variation_poids'], {
+            'n': 2, 'moyenne': -0.5, 'p5': -2.75, 'p25': -1.75, 'p50': -0.5, 'p75': 0.75, 'p95': 1.75,
+        })
+        self.assertEqual(a_positif['glycemie'], {
+            'releves': 4,
+            'bandes': {'hypo': 1, 'normale': 1, 'intermediaire': 1, 'hyper': 1},
+            'proportions': {'hypo': 0.25, 'normale': 0.25, 'intermediaire': 0.25, 'hyper': 0.25},
+        })
+
+    def test_cohortes_sans_donnees(self):
+        lignes = self.par_cohorte('groupe_sanguin')
+        o_negatif, b_positif = lignes['O-'], lignes['B+']
+        self.assertEqual(o_negatif['tension_systolique']['n'], 1)
+        self.assertEqual(o_negatif['glycemie']['bandes']['intermediaire'], 1)
+        # Un seul poids : pas de variation
+        self.assertEqual(o_negatif['variation_poids'], {'n': 0, 'moyenne': None, **{f'p{p}': None for p in cohortes.PERCENTILES}})
+        # Membre sans relevé
+        self.assertEqual((b_positif['patients'], b_positif['patients_actifs']), (1, 0))
+        self.assertEqual(b_positif['tension_systolique']['n'], 0)
+        self.assertEqual(b_positif['glycemie']['releves'], 0)
+        self.assertEqual(set(b_positif['glycemie']['proportions'].values()), {None})
+        self.assertEqual(lignes['inconnu']['patients'], 0)
+        # Aucun patient ni relevé
+        ReleveVital.objects.all().delete()
+        Patient.objects.filter(is_personnel=False).delete()
+        tous, = cohortes.calculer('aucun', 90, self.AUJOURD_HUI)['cohortes']
+        self.assertEqual((tous['patients'], tous['tension_systolique']['n'], tous['glycemie']['releves']), (0, 0, 0))
+
+    def test_tranches_age_et_cohorte_unique(self):
+        lignes = self.par_cohorte('tranche_age')
+        # Âge révolu au 10/03/2026 : Awa a 17 ans (anniversaire le lendemain), Paul 18, Jean 76, Marie inconnu
+        self.assertEqual(
+            {cohorte: ligne['patients'] for cohorte, ligne in lignes.items()},
+            {'0-17': 1, '18-39': 1, '40-59': 0, '60-74': 0, '75+': 1, 'inconnu': 1},
+        )
+        self.assertEqual(lignes['0-17']['tension_systolique']['moyenne'], 130.0)
+        self.assertEqual(lignes['18-39']['variation_poids']['moyenne'], -3.0)
+        tous = self.par_cohorte('aucun')['tous']
+        self.assertEqual((tous['patients'], tous['patients_actifs']), (4, 3))
+        self.assertEqual(tous['tension_systolique']['n'], 3)
+        self.assertEqual(tous['glycemie']['releves'], 5)
+
+    def test_api_cache_du_jour(self):
+        cache.clear()
+        api = APIClient()
+        api.force_authenticate(self.personnel)
+        with self.assertNumQueries(2):
+            premiere = api.get('/api/v1/stats/cohortes/', {'groupe': 'tranche_age', 'jours': 30})
+        self.assertEqual(premiere.status_code, 200)
+        with self.assertNumQueries(0):
+            seconde = api.get('/api/v1/stats/cohortes/', {'groupe': 'tranche_age', 'jours': 30})
+        self.assertEqual(seconde.json(), premiere.json())
+        # Autre définition, puis autre jour : nouvelles entrées
+        with self.assertNumQueries(2):
+            api.get('/api/v1/stats/cohortes/', {'groupe': 'tranche_age', 'jours': 31})
+        with mock.patch.object(timezone, 'localdate', return_value=timezone.localdate() + timedelta(days=1)):
+            with self.assertNumQueries(2):
+                api.get('/api/v1/stats/cohortes/', {'groupe': 'tranche_age', 'jours': 30})
+
+    def test_api_validation_et_acces(self):
+        api = APIClient()
+        api.force_authenticate(self.personnel)
+        self.assertEqual(api.get('/api/v1/stats/cohortes/', {'groupe': 'ville'}).status_code, 400)
+        for jours in ('0', '731', 'abc'):
+            self.assertEqual(api.get('/api/v1/stats/cohortes/', {'jours': jours}).status_code, 400)
+        api.force_authenticate(self.awa)
+        self.assertEqual(api.get('/api/v1/stats/cohortes/').status_code, 403)
+
+
+# ----------------------------------------------------------------------
+# MOTEUR DE TRIAGE DES RELEVÉS (medical_data/alertes.py)
+# ----------------------------------------------------------------------
+
+@override_settings(
+    ALERTES_SEUILS_DEFAUT={
+        'tension_systolique': {'min': 90, 'max': 180, 'variation': 40},
+        'glycemie': {'min': 0.7, 'max': 2.5, 'variation': None},
+    },
+    ALERTES_FENETRE_HEURES=72, ALERTES_VARIATION_HEURES=48,
+)
+class AlertesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.awa = Patient.objects.create(first_name='Awa', telephone='690000200')
+        cls.paul = Patient.objects.create(first_name='Paul', telephone='690000201')
+
+    def setUp(self):
+        self.maintenant = timezone.now()
+
+    def releve(self, patient, heures, **valeurs):
+        return ReleveVital.objects.create(patient=patient, date_releve=self.maintenant - timedelta(hours=heures), **valeurs)
+
+    def alertes(self, **filtres):
+        return sorted(
+            (a.releve_id, a.metrique, a.regle, a.niveau, a.valeur, a.seuil)
+            for a in Alerte.objects.filter(**filtres)
+        )
+
+    def test_bornes_min_et_max(self):
+        haut = self.releve(self.awa, 3, tension_systolique=190)
+        bas = self.releve(self.paul, 2, tension_systolique=85, glycemie='0.60')
+        self.releve(self.paul, 1, tension_systolique=120, glycemie='1.00')
+        self.assertEqual(alertes.evaluer(), 3)
+        self.assertEqual(self.alertes(), sorted([
+            (haut.pk, 'tension_systolique', 'max', 'C', 190, 180),
+            (bas.pk, 'tension_systolique', 'min', 'C', 85, 90),
+            (bas.pk, 'glycemie', 'min', 'C', 0.6, 0.7),
+        ]))
+
+    def test_variation_dans_l_horizon(self):
+        self.releve(self.awa, 100, tension_systolique=120)  # hors fenêtre : point de comparaison seulement
+        hausse = self.releve(self.awa, 70, tension_systolique=165)
+        self.releve(self.awa, 10, tension_systolique=150)  # 60 h après le précédent : hors horizon
+        baisse = self.releve(self.awa, 5, tension_systolique=105)
+        self.releve(self.awa, 4, glycemie='1.00')  # sans tension : ignoré par la règle
+        self.releve(self.paul, 3, tension_systolique=160)  # autre patient : pas comparé à Awa
+        alertes.evaluer()
+        self.assertEqual(self.alertes(regle='variation'), sorted([
+            (hausse.pk, 'tension_systolique', 'variation', 'A', 45, 40),
+            (baisse.pk, 'tension_systolique', 'variation', 'A', -45, 40),
+        ]))
+
+    def test_ecart_a_la_reference(self):
+        SeuilsAlerte.objects.create(patient=self.awa, regles={'glycemie': {'reference': 1.1, 'ecart': 0.5}})
+        haut = self.releve(self.awa, 3, glycemie='1.80')
+        self.releve(self.awa, 2, glycemie='1.50')
+        bas = self.releve(self.awa, 1, glycemie='0.55')
+        self.releve(self.paul, 1, glycemie='1.80')  # pas de référence : défauts du centre
+        alertes.evaluer()
+        self.assertEqual(self.alertes(regle='ecart'), sorted([
+            (haut.pk, 'glycemie', 'ecart', 'A', 0.7, 0.5),
+            (bas.pk, 'glycemie', 'ecart', 'A', -0.55, 0.5),
+        ]))
+        self.assertEqual(self.alertes(regle='min', patient=self.awa), [(bas.pk, 'glycemie', 'min', 'C', 0.55, 0.7)])
+
+    def test_seuils_du_patient_remplacent_les_defauts(self):
+        SeuilsAlerte.objects.create(patient=self.awa, regles={'tension_systolique': {'max': 200, 'min': None, 'variation': None}})
+        for patient in (self.awa, self.paul):
+            self.releve(patient, 3, tension_systolique=190)
+            self.releve(patient, 2, tension_systolique=185)
+            self.releve(patient, 1, tension_systolique=85)
+        alertes.evaluer()
+        self.assertEqual(Alerte.objects.filter(patient=self.awa).count(), 0)
+        self.assertEqual(
+            sorted(Alerte.objects.filter(patient=self.paul).values_list('regle', flat=True)),
+            ['max', 'max', 'min', 'variation'],
+        )
+
+    def test_reevaluation_sans_doublon(self):
+        self.releve(self.awa, 3, tension_systolique=190)
+        self.releve(self.awa, 1, tension_systolique=80)
+        self.assertEqual(alertes.evaluer(), 3)
+        self.assertEqual(alertes.evaluer(), 0)
+        alertes.evaluer(patient_ids=[self.awa.pk])
+        # Passe concurrente : elle n'a pas vu les alertes existantes, la contrainte unique tranche
+        aucune = Alerte.objects.none()
+        with mock.patch.object(Alerte.objects, 'filter', return_value=aucune):
+            alertes.evaluer()
+        self.assertEqual(Alerte.objects.count(), 3)
+
+    def test_evaluation_apres_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.releve(self.awa, 0, tension_systolique=200)
+        self.assertEqual(Alerte.objects.get().regle, 'max')
+
+    def test_regles_invalides(self):
+        for regles in (
+            [], {'pouls': {}}, {'glycemie': 1}, {'glycemie': {'plafond': 1}},
+            {'glycemie': {'max': '2'}}, {'glycemie': {'max': True}}, {'glycemie': {'reference': 1.1}},
+        ):
+            with self.assertRaises(ValueError, msg=regles):
+                alertes.valider_regles(regles)
+        alertes.valider_regles({'glycemie': {'max': None, 'reference': 1, 'ecart': 0.4}})
+
+
+# ----------------------------------------------------------------------
+# DISPONIBILITÉS ET RÉSERVATION (medical_data/agenda.py)
+# ----------------------------------------------------------------------
+
+@override_settings(HORAIRES_OUVERTURE={0: [('08:00', '10:00')]}, DUREE_CRENEAU_MINUTES=30)
+class AgendaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.personnel = Patient.objects.create(first_name='Dr', last_name='Essomba', telephone='690000100', is_personnel=True)
+        cls.praticien = Patient.objects.create(first_name='Dr', last_name='Ngo', telephone='690000101', is_personnel=True)
+        cls.patient = Patient.objects.create(first_name='Awa', telephone='690000200')
+        aujourd_hui = timezone.localdate()
+        cls.lundi = aujourd_hui + timedelta(days=7 - aujourd_hui.weekday())  # lundi prochain
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.personnel)
+
+    def a(self, heure, minute=0, jour=None):
+        return timezone.make_aware(datetime.combine(jour or self.lundi, time(heure, minute)))
+
+    def plage(self):
+        return agenda.fenetre(self.lundi)
+
+    def test_creneaux_libres(self):
+        RendezVous.objects.create(patient=self.patient, date_heure=self.a(8), motif='A')
+        RendezVous.objects.create(patient=self.patient, date_heure=self.a(9, 15), motif='B')  # hors grille : 2 créneaux
+        RendezVous.objects.create(patient=self.patient, date_heure=self.a(8, 30), motif='C', statut='A')  # annulé
+        RendezVous.objects.create(patient=self.patient, date_heure=self.a(8, 30), motif='D', praticien=self.praticien)
+        with self.assertNumQueries(1):
+            libres = agenda.creneaux_libres(*self.plage())
+        self.assertEqual(libres, [self.a(8, 30)])
+        self.assertEqual(
+            agenda.creneaux_libres(*self.plage(), praticien_id=self.praticien.pk),
+            [self.a(8), self.a(9), self.a(9, 30)],
+        )
+        # Mardi : centre fermé
+        self.assertEqual(agenda.creneaux_libres(*agenda.fenetre(self.lundi + timedelta(days=1))), [])
+
+    def test_creneau_invalide(self):
+        for date_heure in [self.a(8, 10), self.a(10), self.a(7, 30), self.a(8, jour=self.lundi + timedelta(days=1))]:
+            with self.assertRaises(agenda.CreneauInvalide):
+                agenda.reserver(patient=self.patient, date_heure=date_heure, motif='X')
+
+    def test_reservation_concurrente(self):
+        # Deux réservations passent la vérification au même instant : la contrainte d'unicité tranche
+        agenda.reserver(patient=self.patient, date_heure=self.a(9), motif='Premier')
+        with mock.patch.object(agenda, 'verifier_disponibilite'):
+            with self.assertRaises(agenda.CreneauIndisponible):
+                agenda.reserver(patient=self.patient, date_heure=self.a(9), motif='Second')
+            # Autre praticien ou créneau libéré par une annulation : accepté
+            agenda.reserver(patient=self.patient, date_heure=self.a(9), motif='Praticien', praticien=self.praticien)
+            RendezVous.objects.filter(motif='Premier').update(statut='A')
+            agenda.reserver(patient=self.patient, date_heure=self.a(9), motif='Remplaçant')
+        self.assertEqual(RendezVous.objects.filter(date_heure=self.a(9)).exclude(statut='A').count(), 2)
+
+    def test_api_reservation_et_conflit(self):
+        donnees = {'patient': self.patient.pk, 'date_heure': self.a(9).isoformat(), 'motif': 'Contrôle'}
+        self.assertEqual(self.api.post('/api/v1/rendezvous/', donnees).status_code, 201)
+        self.assertEqual(self.api.post('/api/v1/rendezvous/', donnees).status_code, 409)
+        donnees['date_heure'] = self.a(9, 10).isoformat()
+        self.assertEqual(self.api.post('/api/v1/rendezvous/', donnees).status_code, 400)
+
+    def test_fenetres(self):
+        instant = lambda *jour: timezone.make_aware(datetime(*jour))
+        self.assertEqual(agenda.fenetre(date(2026, 3, 4)), (instant(2026, 3, 4), instant(2026, 3, 5)))
+        # Semaine : du lundi au lundi suivant, y compris depuis un lundi ou un dimanche
+        for jour in (date(2026, 3, 2), date(2026, 3, 4), date(2026, 3, 8)):
+            self.assertEqual(agenda.fenetre(jour, 'semaine'), (instant(2026, 3, 2), instant(2026, 3, 9)))
+        # Mois : du 1er au 1er du mois suivant, changement d'année compris
+        self.assertEqual(agenda.fenetre(date(2026, 2, 28), 'mois'), (instant(2026, 2, 1), instant(2026, 3, 1)))
+        self.assertEqual(agenda.fenetre(date(2026, 12, 1), 'mois'), (instant(2026, 12, 1), instant(2027, 1, 1)))
+        with self.assertRaises(ValueError):
+            agenda.fenetre(date(2026, 3, 4), 'annee')
+
+    def test_api_agenda_semaine_et_mois(self):
+        debut, fin = agenda.fenetre(self.lundi, 'semaine')
+        bornes = [
+            (debut - timedelta(seconds=1), 'Dimanche soir'), (debut, 'Lundi minuit'),
+            (fin - timedelta(seconds=1), 'Dimanche 23:59:59'), (fin, 'Lundi suivant'),
+        ]
+        for date_heure, motif in bornes:
+            RendezVous.objects.create(patient=self.patient, date_heure=date_heure, motif=motif)
+
+        def motifs(**params):
+            reponse = self.api.get('/api/v1/rendezvous/agenda/', dict(params, date=(self.lundi + timedelta(days=3)).isoformat()))
+            self.assertEqual(reponse.status_code, 200)
+            return [rdv['motif'] for rdv in reponse.json()['rendez_vous']]
+
+        # Fin exclue : le lundi suivant à minuit appartient à la semaine d'après
+        self.assertEqual(motifs(vue='semaine'), ['Lundi minuit', 'Dimanche 23:59:59'])
+        mois_debut, mois_fin = agenda.fenetre(self.lundi + timedelta(days=3), 'mois')
+        self.assertEqual(motifs(vue='mois'), [motif for date_heure, motif in bornes if mois_debut <= date_heure < mois_fin])
+        self.assertEqual(self.api.get('/api/v1/rendezvous/agenda/', {'vue': 'annee'}).status_code, 400)
+        self.assertEqual(self.api.get('/api/v1/rendezvous/agenda/', {'date': 'xx'}).status_code, 400)
+
+    def test_api_agenda_filtres(self):
+        RendezVous.objects.create(patient=self.patient, date_heure=self.a(8), motif='Planifié', statut='P')
+        RendezVous.objects.create(patient=self.patient, date_heure=self.a(8, 30), motif='Confirmé', statut='C')
+        RendezVous.objects.create(patient=self.patient, date_heure=self.a(9), motif='Annulé', statut='A')
+        RendezVous.objects.create(
+            patient=self.patient, date_heure=self.a(9, 30), motif='Praticien', statut='C', praticien=self.praticien,
+        )
+
+        def motifs(**params):
+            params = dict(params, date=self.lundi.isoformat())
+            agenda_complet = self.api.get('/api/v1/rendezvous/agenda/', params).json()['rendez_vous']
+            liste = self.api.get('/api/v1/rendezvous/', params).json()['results']  # même filtrage, paginé
+            self.assertEqual([rdv['id'] for rdv in liste], [rdv['id'] for rdv in agenda_complet])
+            return [rdv['motif'] for rdv in agenda_complet]
+
+        self.assertEqual(motifs(), ['Planifié', 'Confirmé', 'Annulé', 'Praticien'])
+        self.assertEqual(motifs(statut='C'), ['Confirmé', 'Praticien'])
+        self.assertEqual(motifs(statut='P,A'), ['Planifié', 'Annulé'])
+        self.assertEqual(motifs(praticien=self.praticien.pk), ['Praticien'])
+        self.assertEqual(motifs(statut='P', praticien=self.praticien.pk), [])
+
+    def test_api_disponibilites(self):
+        reponse = self.api.get('/api/v1/rendezvous/disponibilites/', {'debut': self.lundi.isoformat()})
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(len(reponse.json()['creneaux']), 4)
+        for params in [{'debut': 'xx'}, {'fin': 'xx'}, {'debut': '2026-13-40'},
+                       {'debut': self.lundi.isoformat(), 'fin': (self.lundi + timedelta(days=63)).isoformat()}]:
+            self.assertEqual(self.api.get('/api/v1/rendezvous/disponibilites/', params).status_code, 400, params)
+
+
+# ----------------------------------------------------------------------
+# INGESTION PAR LOTS DES APPAREILS (medical_data/ingestion.py)
+# ----------------------------------------------------------------------
+
+class IngestionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = Patient.objects.create(first_name='Awa', telephone='690000200')
+
+    def setUp(self):
+        cache.clear()
+        caches[analytique.ALIAS].clear()
+        self.api = APIClient()
+        self.api.force_authenticate(self.patient)
+        self.maintenant = timezone.now().replace(microsecond=0)
+
+    def envoyer(self, releves, appareil_id='gluco-1'):
+        reponse = self.api.post(
+            f'/api/v1/patients/{self.patient.pk}/releves/', {'appareil_id': appareil_id, 'releves': releves}, format='json',
+        )
+        self.assertIn(reponse.status_code, (200, 201), reponse.content)
+        return reponse.json()
+
+    def releve(self, heures, **valeurs):
+        return dict({'date_releve': (self.maintenant - timedelta(hours=heures)).isoformat(), 'glycemie': '1.10'}, **valeurs)
+
+    def test_dedoublonnage(self):
+        premier = self.envoyer([self.releve(1), self.releve(2), self.releve(1), {'date_releve': 'xx'}])
+        self.assertEqual((premier['crees'], premier['doublons'], premier['invalides']), (2, 1, 1))
+        self.assertEqual([r['statut'] for r in premier['resultats']], ['cree', 'cree', 'doublon', 'invalide'])
+
+        second = self.envoyer([self.releve(1), self.releve(3)])
+        self.assertEqual([r['statut'] for r in second['resultats']], ['doublon', 'cree'])
+        # Même horodatage, autre appareil : relevé distinct
+        self.assertEqual(self.envoyer([self.releve(1)], appareil_id='gluco-2')['crees'], 1)
+        self.assertEqual(ReleveVital.objects.filter(patient=self.patient).count(), 4)
+
+    def test_conflit_concurrent_devient_doublon(self):
+        # Relevé inséré par une autre synchronisation après la vérification du lot
+        ReleveVital.objects.create(
+            patient=self.patient, appareil_id='gluco-1', date_releve=self.maintenant - timedelta(hours=1), glycemie='1.1',
+        )
+        with mock.patch.object(ingestion, '_existants', return_value=set()):
+            resultat = self.envoyer([self.releve(2), self.releve(1), self.releve(3)])
+        self.assertEqual([r['statut'] for r in resultat['resultats']], ['cree', 'doublon', 'cree'])
+        self.assertEqual(ReleveVital.objects.filter(patient=self.patient).count(), 3)
+
+    def test_mises_a_jour_explicites(self):
+        stats.rafraichir()
+        hier = timezone.localdate() - timedelta(days=1)
+        cle_serie = f'analytique:patients_actifs:jour:{hier.isoformat()}'
+        caches[analytique.ALIAS].set(cle_serie, 0, timeout=None)
+        version = version_patient(self.patient.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.envoyer([
+                self.releve(0, glycemie='3.20'),  # au-dessus du seuil par défaut (2.5)
+                {'date_releve': timezone.make_aware(datetime.combine(hier, time(12))).isoformat(), 'glycemie': '1.00'},
+            ])
+
+        self.assertNotEqual(version_patient(self.patient.pk), version)
+        self.assertEqual(AgregatJournalierPatient.objects.get(patient=self.patient, jour=hier).glycemie_nombre, 1)
+        self.assertEqual(AgregatJournalierPatient.objects.filter(patient=self.patient).count(), 2)
+        self.assertTrue(Alerte.objects.filter(patient=self.patient, metrique='glycemie', regle='max').exists())
+        self.assertIsNone(caches[analytique.ALIAS].get(cle_serie))
+        self.assertEqual(stats.stats_globales()['patients_suivi_actif_30j'], 1)
+
+
+# ----------------------------------------------------------------------
+# SÉRIES SOUS-ÉCHANTILLONNÉES (medical_data/echantillonnage.py)
+# ----------------------------------------------------------------------
+
+class EchantillonnageTests(SimpleTestCase):
+
+    def test_lttb(self):
+        x = np.arange(1000, dtype=np.float64)
+        y = np.sin(x / 50)
+        y[437] = 25.0  # pic isolé
+        indices = echantillonnage.lttb(x, y, 50)
+        self.assertEqual(len(indices), 50)
+        self.assertEqual((indices[0], indices[-1]), (0, 999))
+        self.assertTrue(np.all(np.diff(indices) > 0))
+        self.assertIn(437, indices)
+
+    def test_lttb_sans_reduction(self):
+        x = np.arange(5, dtype=np.float64)
+        self.assertEqual(echantillonnage.lttb(x, x, 5).tolist(), [0, 1, 2, 3, 4])
+        self.assertEqual(echantillonnage.lttb(x, x, 300).tolist(), [0, 1, 2, 3, 4])
+        self.assertEqual(echantillonnage.lttb(x, x, 3).tolist()[::2], [0, 4])
+
+    def test_minmax(self):
+        x = np.array([0, 1, 2, 5, 9, 10], dtype=np.float64)  # 10 = fin : rangé dans le dernier intervalle
+        y = np.array([4, 8, 6, 1, 3, 7], dtype=np.float64)
+        debuts, minimum, maximum, moyenne, nombre = echantillonnage.minmax(x, y, 5, 0, 10)
+        # Intervalles [0,2) [2,4) [4,6) [6,8) [8,10] ; [6,8) vide, exclu
+        self.assertEqual(debuts.tolist(), [0, 2, 4, 8])
+        self.assertEqual(minimum.tolist(), [4, 6, 1, 3])
+        self.assertEqual(maximum.tolist(), [8, 6, 1, 7])
+        self.assertEqual(moyenne.tolist(), [6, 6, 1, 5])
+        self.assertEqual(nombre.tolist(), [2, 1, 1, 2])
+
+
+class SeriesRelevesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = Patient.objects.create(first_name='Awa', telephone='690000200')
+        maintenant = timezone.now()
+        for i in range(40):
+            ReleveVital.objects.create(
+                patient=cls.patient, date_releve=maintenant - timedelta(hours=6 * i),
+                tension_systolique=120 + i % 7, tension_diastolique=80, glycemie=None if i % 2 else '1.10',
+            )
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.patient)
+        self.url = f'/api/v1/patients/{self.patient.pk}/series/'
+
+    def test_parametres_invalides(self):
+        for params in [
+            {'fin': 'xx'}, {'debut': 'xx'}, {'fin': '2026-13-40'}, {'debut': '2026-02-10', 'fin': '2026-02-01'},
+            {'points': '2'}, {'points': 'x'}, {'methode': 'autre'}, {'metriques': 'temperature'},
+        ]:
+            self.assertEqual(self.api.get(self.url, params).status_code, 400, params)
+
+    def test_methodes(self):
+        for methode in echantillonnage.METHODES:
+            reponse = self.api.get(self.url, {'points': 5, 'methode': methode, 'metriques': 'tension_systolique,glycemie'})
+            self.assertEqual(reponse.status_code, 200, methode)
+            series = reponse.json()['series']
+            self.assertEqual(series['tension_systolique']['releves'], 40, methode)
+            self.assertEqual(series['glycemie']['releves'], 20, methode)
+        self.assertEqual(len(series['glycemie']['t']), len(series['glycemie']['moyenne']))
+        reponse = self.api.get(self.url, {'points': 5, 'metriques': 'tension_systolique'})
+        self.assertEqual(len(reponse.json()['series']['tension_systolique']['v']), 5)
+
+
+# ----------------------------------------------------------------------
+# RECHERCHE PLEIN TEXTE DES NOTES CLINIQUES (medical_data/recherche.py)
+# ----------------------------------------------------------------------
+
+class RechercheNotesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.personnel = Patient.objects.create(first_name='Dr', last_name='Essomba', telephone='690000300', is_personnel=True)
+        cls.patient = Patient.objects.create(first_name='Awa', last_name='Bella', telephone='690000301')
+        cls.fievre = Suivi.objects.create(
+            patient=cls.patient, motif='Fièvre persistante',
+            notes_medecin='Douleurs thoraciques à l\'effort, patient diabétique.', prescriptions='Paracétamol 500mg',
+        )
+        cls.controle = Suivi.objects.create(
+            patient=cls.patient, motif='Contrôle', notes_medecin='Douleur abdominale, thoracique normale.',
+        )
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.personnel)
+
+    def lister(self, search):
+        reponse = self.api.get('/api/v1/suivis/', {'search': search})
+        self.assertEqual(reponse.status_code, 200)
+        return {resultat['id'] for resultat in reponse.json()['results']}
+
+    def trouves(self, requete):
+        return [suivi.pk for suivi, _, _ in recherche.rechercher(requete)]
+
+    def test_racinisation(self):
+        self.assertEqual(recherche.raciniser('traitements'), 'trait')
+        self.assertEqual(recherche.raciniser('hopitaux'), 'hopital')
+        self.assertEqual(recherche.raciniser('diabetique'), recherche.raciniser('diabete'))
+        self.assertEqual(recherche.racines('Les douleurs de la patiente'), ['douleur', 'patient'])
+        self.assertEqual(recherche.analyser('aspirine "douleur thoracique" de'), [['aspirin'], ['douleur', 'thorac']])
+
+    def test_phrases(self):
+        # Mots séparés : les deux suivis ; phrase : les mots doivent se suivre
+        self.assertCountEqual(self.trouves('douleur thoracique'), [self.fievre.pk, self.controle.pk])
+        self.assertEqual(self.trouves('"douleurs thoraciques"'), [self.fievre.pk])
+        self.assertEqual(self.trouves('diabete'), [self.fievre.pk])
+        self.assertEqual(self.trouves('le de la'), [])
+
+    def test_extraits(self):
+        [(suivi, score, extraits)] = recherche.rechercher('fievre paracetamol')
+        self.assertEqual(suivi, self.fievre)
+        self.assertIsNotNone(score)
+        self.assertEqual(extraits['motif'], '<mark>Fièvre</mark> persistante')
+        self.assertEqual(extraits['prescriptions'], '<mark>Paracétamol</mark> 500mg')
+        self.assertNotIn('notes_medecin', extraits)
+        toux = {recherche.raciniser('toux')}
+        self.assertEqual(recherche.extrait('Toux & fièvre <b>', toux), '<mark>Toux</mark> &amp; fièvre &lt;b&gt;')
+        self.assertIsNone(recherche.extrait('Angine', toux))
+        long = ' '.join(f'mot{i}' for i in range(60)) + ' fièvre ' + ' '.join(f'fin{i}' for i in range(60))
+        morceau = recherche.extrait(long, {'fievr'}, taille=10)
+        self.assertTrue(morceau.startswith('… ') and morceau.endswith(' …'))
+        self.assertIn('<mark>fièvre</mark>', morceau)
+
+    def test_index_suit_les_signaux(self):
+        suivi = Suivi.objects.create(patient=self.patient, motif='Toux sèche', notes_medecin='Sirop.')
+        self.assertEqual(self.trouves('toux'), [suivi.pk])
+        suivi.motif = 'Angine'
+        suivi.save()
+        self.assertEqual(self.trouves('toux'), [])
+        self.assertEqual(self.trouves('angine'), [suivi.pk])
+        suivi.delete()
+        self.assertEqual(self.trouves('angine'), [])
+
+    def test_filtre_des_listes_par_prefixe(self):
+        for search in ('parac', 'fiev', '500', 'Paracétamol 500mg', '"douleurs thor"'):
+            with self.subTest(search=search):
+                self.assertEqual(self.lister(search), {self.fievre.pk})
+        self.assertEqual(self.lister('thorac'), {self.fievre.pk, self.controle.pk})
+        self.assertEqual(self.lister('bell'), {self.fievre.pk, self.controle.pk})  # nom du patient
+        self.assertEqual(self.lister('angine'), set())
+        # la recherche classée reste sur les mots entiers
+        self.assertEqual(self.trouves('parac'), [])
+
+
+# ----------------------------------------------------------------------
+# CACHE FICHIERS LRU DES DOSSIERS (centre/cache.py)
+# ----------------------------------------------------------------------
+
+class FichiersLRUCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        repertoire = tempfile.TemporaryDirectory()
+        self.addCleanup(repertoire.cleanup)
+        self.repertoire = repertoire.name
+
+    def creer(self, entrees, frequence=2):
+        return FichiersLRUCache(self.repertoire, {'OPTIONS': {'MAX_ENTRIES': entrees, 'CULL_FREQUENCY': frequence}})
+
+    def dater(self, cache, cle, age):
+        instant = horloge.time() - age
+        os.utime(cache._key_to_file(cle), (instant, instant))
+
+    def test_lecture_rafraichit_la_date(self):
+        cache = self.creer(10)
+        cache.set('a', 1)
+        self.dater(cache, 'a', 3600)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertAlmostEqual(os.path.getmtime(cache._key_to_file('a')), horloge.time(), delta=5)
+        self.assertEqual(cache.get('absente', 'defaut'), 'defaut')
+
+    def test_eviction_des_moins_recemment_lues(self):
+        cache = self.creer(4)
+        for age, cle in enumerate('dcba'):
+            cache.set(cle, cle)
+            self.dater(cache, cle, 10 * (age + 1))  # a la plus ancienne, d la plus récente
+        cache.get('a')
+        cache.set('e', 'e')  # 4 fichiers : les 2 moins récemment utilisés sont retirés
+        self.assertEqual(cache.get_many('abcde'), {'a': 'a', 'd': 'd', 'e': 'e'})
+
+    def test_entree_expiree(self):
+        cache = self.creer(10)
+        cache.set('a', 1, timeout=0)
+        self.assertIsNone(cache.get('a'))
+        self.assertFalse(os.path.exists(cache._key_to_file('a')))
+
+    def test_partage_entre_workers(self):
+        # Deux processus sur le même répertoire : une invalidation de l'un est vue par l'autre
+        premier, second = self.creer(10), self.creer(10)
+        premier.set('version_patient:1', 1)
+        self.assertEqual(second.get('version_patient:1'), 1)
+        premier.set('version_patient:1', 2)
+        self.assertEqual(second.get('version_patient:1'), 2)
+
+    def test_decompte_des_fichiers_espace(self):
+        cache = self.creer(1000)  # décompte toutes les 10 écritures
+        with mock.patch.object(cache, '_list_cache_files', wraps=cache._list_cache_files) as lister:
+            cache.set_many({f'cle{i}': i for i in range(25)})
+        self.assertEqual(lister.call_count, 2)
@@ -0,0 +1,57 @@
+"""
+Compteur de version par patient, stocké dans le cache 'dossiers'.
+
+Toute écriture sur les données d'un patient (fiche, détails, relevés, suivis,
+rendez-vous) renouvelle sa version (après le commit, voir medical_data/signals.py).
+Les entrées de cache dérivées de ces données incluent la version dans leur clé :
+une écriture les rend inaccessibles sans suppression explicite ni vidage global,
+et les anciennes entrées expirent ou sont évincées d'elles-mêmes (LRU).
+"""
+import hashlib
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+
+ALIAS = 'dossiers'
+
+
+def _cle(patient_id):
+    return f'version_patient:{patient_id}'
+
+
+def version_patient(patient_id):
+    """Version courante des données du patient."""
+    cache = caches[ALIAS]
+    cle = _cle(patient_id)
+    version = cache.get(cle)
+    if version is None:
+        # Valeur initiale horodatée : après une éviction, une ancienne version ne peut pas être réutilisée
+        cache.add(cle, time.time_ns(), timeout=None)
+        version = cache.get(cle)
+    return version
+
+
+def incrementer_version(patient_id):
+    """Invalide toutes les entrées de cache versionnées du patient, une fois la transaction validée."""
+    def _incrementer():
+        # Nouvelle valeur plutôt qu'un incr() : le backend fichiers n'a pas d'incrément atomique,
+        # et deux écritures concurrentes produisent quand même deux versions distinctes
+        caches[ALIAS].set(_cle(patient_id), time.time_ns(), timeout=None)
+
+    transaction.on_commit(_incrementer)
+
+
+def lire(nom, patient_id, calcul, *parties):
+    """
+    Lecture à travers le cache : valeur de `calcul()` pour (nom, patient, version, parties).
+    `parties` distingue les variantes d'une même lecture (URL, paramètres...).
+    """
+    cache = caches[ALIAS]
+    empreinte = hashlib.sha1('|'.join(map(str, parties)).encode()).hexdigest()
+    cle = f'{nom}:{patient_id}:{version_patient(patient_id)}:{empreinte}'
+    valeur = cache.get(cle)
+    if valeur is None:
+        valeur = calcul()
+        cache.set(cle, valeur)
+    return valeur
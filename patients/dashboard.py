@@ -0,0 +1,93 @@
+"""
+Chargement des données du tableau de bord patient (patient_dashboard_view).
+
+Chaque jeu de données est lu une seule fois (3 requêtes au total) puis
+réutilisé : dernier suivi, suivis additionnels et tableaux des graphiques
+sont dérivés des listes déjà chargées, sans nouvelle requête.
+
+Le contexte complet (listes et tableaux JSON déjà encodés) est mis en cache
+par patient, sous une clé incluant la version de ses données
+(medical_data/versions.py) : tant qu'aucun relevé, suivi ou rendez-vous du
+patient n'est écrit, les affichages suivants n'interrogent pas la base et
+ne refont pas l'encodage JSON.
+"""
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from medical_data.models import Suivi, RendezVous, ReleveVital
+from medical_data.versions import version_patient
+
+NB_SUIVIS = 5
+NB_RELEVES_GRAPHIQUE = 15
+
+
+def donnees_graphiques(releves):
+    """Tableaux JSON des graphiques, du plus ancien au plus récent, à partir des relevés déjà chargés."""
+    dates = []
+    tension_systolique_data = []
+    tension_diastolique_data = []
+    glycemie_data = []
+
+    for r in reversed(releves):
+        dates.append(r.date_releve.strftime("%d/%m %Hh"))
+        tension_systolique_data.append(r.tension_systolique)
+        tension_diastolique_data.append(r.tension_diastolique)
+        # Decimal -> float ; None est ignoré par Chart.js
+        glycemie_data.append(float(r.glycemie) if r.glycemie is not None else None)
+
+    return {
+        'chart_data_labels_json': json.dumps(dates),
+        'chart_data_tension_s_json': json.dumps(tension_systolique_data),
+        'chart_data_tension_d_json': json.dumps(tension_diastolique_data),
+        'chart_data_glycemie_json': json.dumps(glycemie_data),
+    }
+
+
+def charger_tableau_de_bord(patient, maintenant=None):
+    """Contexte du tableau de bord : 3 requêtes (suivis, prochain rendez-vous, relevés)."""
+    maintenant = maintenant or timezone.now()
+
+    # 1. Les 5 derniers suivis (du plus récent au plus ancien)
+    derniers_suivis = list(
+        Suivi.objects.filter(patient=patient).order_by('-date_suivi')[:NB_SUIVIS]
+    )
+
+    # 2. Prochain rendez-vous planifié ou confirmé
+    prochain_rdv = RendezVous.objects.filter(
+        patient=patient,
+        date_heure__gte=maintenant,
+        statut__in=['P', 'C'],
+    ).order_by('date_heure').first()
+
+    # 3. Les 15 derniers relevés (graphiques + indicateur "dernier relevé")
+    releves = list(
+        ReleveVital.objects.filter(patient=patient).order_by('-date_releve')[:NB_RELEVES_GRAPHIQUE]
+    )
+
+    context = {
+        'derniers_suivis': derniers_suivis,
+        'dernier_suivi': derniers_suivis[0] if derniers_suivis else None,
+        'suivis_additionnels': derniers_suivis[1:] or None,
+        'prochain_rdv': prochain_rdv,
+        'dernier_releve': releves[0] if releves else None,
+    }
+    context.update(donnees_graphiques(releves))
+    return context
+
+
+def tableau_de_bord(patient):
+    """Contexte du tableau de bord, servi depuis le cache tant que la version du patient est inchangée."""
+    cle = f'tableau_de_bord:{patient.pk}:{version_patient(patient.pk)}'
+    context = cache.get(cle)
+    if context is None:
+        maintenant = timezone.now()
+        context = charger_tableau_de_bord(patient, maintenant)
+        duree = getattr(settings, 'TABLEAU_DE_BORD_CACHE_SECONDES', 600)
+        if context['prochain_rdv'] is not None:
+            # Le "prochain rendez-vous" cesse de l'être à son heure : l'entrée expire à ce moment
+            duree = min(duree, max(1, int((context['prochain_rdv'].date_heure - maintenant).total_seconds())))
+        cache.set(cle, context, duree)
+    return context
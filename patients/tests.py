@@ -1,3 +1,149 @@
-from django.test import TestCase
+import re
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from medical_data import pagination
+from medical_data.models import Suivi, RendezVous, ReleveVital
+from users.models import Patient
+
+from .dashboard import charger_tableau_de_bord, tableau_de_bord
+
+
+class TableauDeBordTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = Patient.objects.create(first_name='Awa', last_name='Mbida', telephone='690000000')
+        for i in range(8):
+            Suivi.objects.create(patient=cls.patient, motif=f'Motif {i}', notes_medecin='RAS')
+        for i in range(20):
+            ReleveVital.objects.create(
+                patient=cls.patient, tension_systolique=120 + i, tension_diastolique=80, glycemie='1.05',
+            )
+        RendezVous.objects.create(
+            patient=cls.patient, date_heure=timezone.now() + timedelta(days=2), motif='Contrôle',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_chargeur_nombre_de_requetes_fixe(self):
+        with self.assertNumQueries(3):
+            context = charger_tableau_de_bord(self.patient)
+            # Les valeurs dérivées ne déclenchent aucune requête supplémentaire
+            self.assertEqual(context['dernier_suivi'], context['derniers_suivis'][0])
+            self.assertEqual(len(context['suivis_additionnels']), 4)
+            self.assertEqual(context['dernier_releve'].tension_systolique, 139)
+            self.assertIsNotNone(context['prochain_rdv'])
+
+        self.assertEqual(len(context['derniers_suivis']), 5)
+        self.assertIn('139', context['chart_data_tension_s_json'])
+        self.assertTrue(context['chart_data_tension_s_json'].endswith('139]'))
+
+    def test_chargeur_patient_sans_donnees(self):
+        nouveau = Patient.objects.create(first_name='Sans', telephone='690000001')
+        with self.assertNumQueries(3):
+            context = charger_tableau_de_bord(nouveau)
+        self.assertIsNone(context['dernier_suivi'])
+        self.assertIsNone(context['dernier_releve'])
+        self.assertEqual(context['chart_data_labels_json'], '[]')
+
+    def test_vue_nombre_de_requetes_fixe(self):
+        self.client.force_login(self.patient)
+        # Session + utilisateur + les 3 requêtes du chargeur
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('patient_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['dernier_suivi'].motif, 'Motif 7')
+
+    def test_vue_servie_depuis_le_cache(self):
+        self.client.force_login(self.patient)
+        self.client.get(reverse('patient_dashboard'))
+        # Session + utilisateur uniquement : données et graphiques viennent du cache
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('patient_dashboard'))
+        self.assertEqual(response.context['dernier_releve'].tension_systolique, 139)
+
+    def test_cache_invalide_par_nouveau_releve(self):
+        tableau_de_bord(self.patient)
+        with self.captureOnCommitCallbacks(execute=True):
+            ReleveVital.objects.create(patient=self.patient, tension_systolique=150, tension_diastolique=95)
+        with self.assertNumQueries(3):
+            context = tableau_de_bord(self.patient)
+        self.assertEqual(context['dernier_releve'].tension_systolique, 150)
+        self.assertTrue(context['chart_data_tension_s_json'].endswith('150]'))
+
+
+@override_settings(HISTORIQUE_TAILLE_PAGE=3)
+class HistoriquePaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = Patient.objects.create(first_name='Awa', last_name='Mbida', telephone='690000000')
+        cls.autre = Patient.objects.create(first_name='Paul', last_name='Ngoa', telephone='690000001')
+        instant = timezone.now().replace(microsecond=0)
+        # Sept relevés au même instant, encadrés par des relevés plus récents et plus anciens
+        dates = [instant + timedelta(hours=1)] + [instant] * 7 + [instant - timedelta(hours=h) for h in (1, 2)]
+        for i, date in enumerate(dates):
+            ReleveVital.objects.create(patient=cls.patient, date_releve=date, notes_patient=f'R{i:02d}')
+        ReleveVital.objects.create(patient=cls.autre, date_releve=instant, notes_patient='AUTRE')
+        cls.attendu = [
+            releve.notes_patient
+            for releve in ReleveVital.objects.filter(patient=cls.patient).order_by('-date_releve', '-pk')
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.patient)
+
+    def page(self, section='releves', **params):
+        return self.client.get(reverse('patient_historique_page', args=[section]), params)
+
+    def test_continuite_a_dates_egales(self):
+        queryset = ReleveVital.objects.filter(patient=self.patient)
+        lus, curseur = [], None
+        while True:
+            elements, curseur = pagination.page_keyset(queryset, 'date_releve', curseur, taille=3)
+            lus.extend(releve.notes_patient for releve in elements)
+            if curseur is None:
+                break
+        self.assertEqual(lus, self.attendu)
+
+    def test_pages_json_enchainees(self):
+        lus, params = [], {}
+        for _ in range(10):
+            reponse = self.page(**params)
+            self.assertEqual(reponse.status_code, 200)
+            corps = reponse.json()
+            marques = re.findall(r'R\d\d', corps['html'])
+            self.assertEqual(len(marques), corps['nombre'])
+            lus.extend(marques)
+            if corps['curseur_suivant'] is None:
+                break
+            params = {'curseur': corps['curseur_suivant']}
+        self.assertEqual(lus, self.attendu)  # ni doublon ni trou
+
+    def test_curseur_invalide(self):
+        for curseur in ('xx', 'bm9uLXVuLWN1cnNldXI', pagination.encoder_curseur(timezone.now(), 1)[:-4]):
+            reponse = self.page(curseur=curseur)
+            self.assertEqual(reponse.status_code, 400, curseur)
+            self.assertIn('error', reponse.json())
+        with self.assertRaises(ValueError):
+            pagination.decoder_curseur('xx')
+
+    def test_section_inconnue(self):
+        self.assertEqual(self.page('ordonnances').status_code, 404)
+
+    def test_historique_d_un_autre_patient(self):
+        # Le curseur ne désigne qu'une position : les éléments viennent toujours du patient connecté
+        curseur = self.page().json()['curseur_suivant']
+        self.client.force_login(self.autre)
+        for params in ({}, {'curseur': curseur}):
+            corps = self.page(**params).json()
+            self.assertNotRegex(corps['html'], r'R\d\d')
+        self.assertIn('AUTRE', self.page().json()['html'])
+        self.client.logout()
+        self.assertEqual(self.page().status_code, 302)  # connexion requise
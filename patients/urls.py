@@ -7,6 +7,7 @@ urlpatterns = [
     path('tableau-de-bord/', views.patient_dashboard_view, name='patient_dashboard'),
     path('deconnexion/', views.patient_logout_view, name='patient_logout'),
     path('historique/', views.patient_historique_view, name='patient_historique'),
+    path('historique/<str:section>/', views.patient_historique_page, name='patient_historique_page'),
     
 
     #### Soumission de relevé
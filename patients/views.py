@@ -1,15 +1,20 @@
 from django.shortcuts import render
 from django.shortcuts import render, redirect
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout, get_user_model
 from django.utils import timezone
 from django.utils.timezone import make_aware
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 from decimal import Decimal
 
 from medical_data.models import Suivi, RendezVous, ReleveVital
+from medical_data import agenda, pagination
+from .dashboard import tableau_de_bord
 from users.models import DetailsPatient
 PatientModel=get_user_model()
 
@@ -39,81 +44,15 @@ def patient_login_view(request):
 @login_required
 def patient_dashboard_view(request):
     
-    current_time = timezone.now()
     current_patient = request.user
-    
-    # 1. Récupération des 5 derniers Suivis/Observations (ordonnés par date décroissante)
-    derniers_suivis = Suivi.objects.filter(
-        patient=current_patient
-    ).all()[:5]
-
-    # NOUVEAU : On prend le plus récent pour l'indicateur clé
-    dernier_suivi = derniers_suivis.first()
-    suivis_additionnels = derniers_suivis[1:] if derniers_suivis.count() > 1 else None 
-    
-    # 2. Récupération du prochain Rendez-vous
-    prochain_rdv = RendezVous.objects.filter(
-        patient=current_patient,
-        date_heure__gte=current_time,
-        statut__in=['P', 'C']
-    ).order_by('date_heure').first()
-
-    # 3. Récupération des données de télésurveillance (Glycémie/Tension)
-    # ... (le code de récupération et préparation des données de graphiques reste inchangé)
-    # (Nous assumons que les variables 'dernier_releve', 'dates', etc. sont préparées ici)
-    dernier_releve = None
-    dates = []
-    tension_systolique_data = []
-    tension_diastolique_data = []
-    glycemie_data = []
-
-    if ReleveVital:
-        releves_vitaux = ReleveVital.objects.filter(
-            patient=current_patient
-        ).order_by('-date_releve')[:15]
-        
-        if releves_vitaux.exists(): 
-            releves_vitaux_ordonnes = list(reversed(releves_vitaux)) 
-
-            for r in releves_vitaux_ordonnes:
-                dates.append(r.date_releve.strftime("%d/%m %Hh"))
-                
-                # Conversion des valeurs DecimalField en float ou s'assurer que None est utilisé
-                
-                # Tension (souvent IntegerField, mais on assure la conversion)
-                tension_systolique_data.append(r.tension_systolique)
-                tension_diastolique_data.append(r.tension_diastolique)
-                
-                # GLYCÉMIE : Conversion nécessaire si r.glycemie est un objet Decimal
-                if r.glycemie is not None:
-                    # Convertit l'objet Decimal en float standard
-                    glycemie_data.append(float(r.glycemie))
-                else:
-                    # Ajoute None pour que Chart.js ignore ce point de données
-                    glycemie_data.append(None) 
-
-    # SÉRIALISATION JSON : Utilisation de json.dumps() pour générer des chaînes JSON valides.
-    # Puisque nous avons converti les Decimals en floats ci-dessus, cette étape fonctionne.
-    chart_data_labels_json = json.dumps(dates)
-    chart_data_tension_s_json = json.dumps(tension_systolique_data)
-    chart_data_tension_d_json = json.dumps(tension_diastolique_data)
-    chart_data_glycemie_json = json.dumps(glycemie_data)
 
-
-    context = {
+    # Suivis, prochain rendez-vous et relevés : chaque jeu de données n'est lu qu'une fois,
+    # puis servi depuis le cache jusqu'à la prochaine écriture (voir patients/dashboard.py)
+    context = dict(tableau_de_bord(current_patient))
+    context.update({
         'patient_name': current_patient.get_full_name() or current_patient.username,
-        'prochain_rdv': prochain_rdv,
-        'derniers_suivis': derniers_suivis,
-        'suivis additionels':suivis_additionnels,
         'active_page': 'overview',
-        
-        'dernier_releve': releves_vitaux.first() if ReleveVital and releves_vitaux.exists() else None,
-        
-        'chart_data_labels_json': chart_data_labels_json,
-        'chart_data_tension_s_json': chart_data_tension_s_json,
-        'chart_data_tension_d_json': chart_data_tension_d_json,
-        'chart_data_glycemie_json': chart_data_glycemie_json,
-    }
+    })
     
     return render(request, 'patients/patient_dashboard_overview.html', context)
 
@@ -185,10 +124,16 @@ def patient_demande_rdv_view(request):
     
     """
     Affiche la page du formulaire de demande de Rendez-vous.
+    Propose les prochains créneaux libres de l'agenda commun (suggestions du champ date/heure).
     """
+    debut, _ = agenda.fenetre(timezone.localdate())
+    creneaux_libres = agenda.creneaux_libres(debut, debut + timedelta(days=14))[:40]
+
     context = {
         'active_page': 'demande_rdv', 
         'patient_name': request.user.get_full_name() or request.user.username,
+        'creneaux_libres': [timezone.localtime(c) for c in creneaux_libres],
+        'duree_creneau_secondes': int(agenda.duree_creneau().total_seconds()),
     }
     return render(request, 'patients/patient_demande_rdv.html', context)
 
@@ -212,7 +157,8 @@ def patient_submit_rdv(request):
                  return redirect('patient_demande_rdv')
             
             # 2. Création de l'instance RendezVous
-            RendezVous.objects.create(
+            # Réservation atomique : créneau d'ouverture aligné et libre, sinon CreneauInvalide/CreneauIndisponible
+            agenda.reserver(
                 patient=request.user,
                 date_heure=date_heure_demande,
                 motif=motif,
@@ -228,6 +174,9 @@ def patient_submit_rdv(request):
             
             return redirect('patient_dashboard') 
 
+        except (agenda.CreneauInvalide, agenda.CreneauIndisponible) as e:
+            messages.error(request, str(e))
+            return redirect('patient_demande_rdv')
         except ValueError:
             messages.error(request, "Erreur de format de date/heure. Veuillez réessayer.")
             return redirect('patient_demande_rdv')
@@ -240,28 +189,37 @@ def patient_submit_rdv(request):
 #Fin Rendez-vous Patient
 
 ## Historique
+# section -> (modèle, champ date, gabarit du fragment)
+SECTIONS_HISTORIQUE = {
+    'suivis': (Suivi, 'date_suivi', 'patients/partials/historique_suivis.html'),
+    'rdv': (RendezVous, 'date_heure', 'patients/partials/historique_rdv.html'),
+    'releves': (ReleveVital, 'date_releve', 'patients/partials/historique_releves.html'),
+}
+
+
+def _page_historique(patient, section, curseur=None):
+    """Une page d'une section de l'historique : (éléments, curseur suivant)."""
+    modele, champ_date, _ = SECTIONS_HISTORIQUE[section]
+    return pagination.page_keyset(
+        modele.objects.filter(patient=patient),
+        champ_date,
+        curseur=curseur,
+        taille=settings.HISTORIQUE_TAILLE_PAGE,
+    )
+
+
 @login_required
 def patient_historique_view(request):
     """
-    Affiche l'historique complet des Suivis, Rendez-vous et Relevés Vitaux du patient.
+    Affiche la première page de l'historique des Suivis, Rendez-vous et Relevés Vitaux du patient.
+    Les pages suivantes sont chargées à la demande (patient_historique_page).
     """
     current_patient = request.user
-    
-    # 1. Récupération de l'historique des Suivis (du plus récent au plus ancien)
-    historique_suivis = Suivi.objects.filter(
-        patient=current_patient
-    ).order_by('-date_suivi')
-
-    # 2. Récupération de l'historique des Rendez-vous (tous les statuts)
-    historique_rdv = RendezVous.objects.filter(
-        patient=current_patient
-    ).order_by('-date_heure')
-
-    # 3. Récupération de l'historique des Relevés Vitaux (tous les enregistrements)
-    historique_releves = ReleveVital.objects.filter(
-        patient=current_patient
-    ).order_by('-date_releve')
 
+    # Chaque section : les N plus récents + le curseur de la page suivante (None si tout est affiché)
+    historique_suivis, suivis_suivant = _page_historique(current_patient, 'suivis')
+    historique_rdv, rdv_suivant = _page_historique(current_patient, 'rdv')
+    historique_releves, releves_suivant = _page_historique(current_patient, 'releves')
 
     context = {
         'patient_name': current_patient.get_full_name() or current_patient.username,
@@ -270,10 +228,34 @@ def patient_historique_view(request):
         'historique_suivis': historique_suivis,
         'historique_rdv': historique_rdv,
         'historique_releves': historique_releves,
+        'suivis_suivant': suivis_suivant,
+        'rdv_suivant': rdv_suivant,
+        'releves_suivant': releves_suivant,
     }
     
     return render(request, 'patients/patient_historique.html', context)
 
+
+@login_required
+def patient_historique_page(request, section):
+    """
+    Page suivante d'une section de l'historique ("Charger plus").
+    Retourne le fragment HTML des éléments et le curseur de la page d'après.
+    """
+    if section not in SECTIONS_HISTORIQUE:
+        raise Http404("Section d'historique inconnue.")
+    try:
+        elements, suivant = _page_historique(request.user, section, request.GET.get('curseur'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    html = render_to_string(SECTIONS_HISTORIQUE[section][2], {'elements': elements}, request=request)
+    return JsonResponse({
+        'html': html,
+        'curseur_suivant': suivant,
+        'nombre': len(elements),
+    })
+
 ## Paramètres et édition du profil
 @login_required
 def patient_parametres_view(request):
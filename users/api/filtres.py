@@ -0,0 +1,41 @@
+from django.db.models import Q
+from rest_framework import filters
+
+from medical_data import recherche as recherche_notes
+from users import recherche
+from users.models import Patient
+
+
+class RecherchePatientFilter(filters.SearchFilter):
+    """
+    ?search= servi par l'index de recherche des patients (users/recherche.py) au lieu
+    d'un OR de icontains sur chaque champ (parcours complet de la table).
+    Les résultats sont annotés de leur rang ; PatientCursorPagination trie alors par pertinence
+    (keyset sur le couple rang, id).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        requete = self.get_search_terms(request)
+        if not requete:
+            return queryset
+        return recherche.filtrer(queryset, requete)
+
+
+class RechercheSuiviFilter(filters.SearchFilter):
+    """
+    ?search= sur les suivis : chaque terme doit figurer dans le nom du patient ou dans les notes
+    cliniques (motif, notes, prescriptions), ces dernières via l'index plein texte
+    (medical_data/recherche.py) au lieu d'un LIKE '%terme%' sur toutes les consultations.
+    Le dernier mot de chaque terme est un préfixe (« parac » trouve « Paracétamol ») ;
+    un terme entre guillemets reste une phrase.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        for terme in self.get_search_terms(request):
+            # DRF retire les guillemets : un terme de plusieurs mots est une phrase
+            notes = recherche_notes.filtre('"' + terme.replace('"', ' ') + '"')
+            if not notes:
+                continue  # mot vide (« de », « la »...) : ne filtre rien
+            noms = Patient.objects.filter(Q(first_name__icontains=terme) | Q(last_name__icontains=terme))
+            queryset = queryset.filter(Q(patient__in=noms.values('pk')) | notes)
+        return queryset
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+# ----------------------------------------------------------------------
+# PAGINATION PAR CURSEUR (KEYSET) POUR LES LISTES DE L'API
+# ----------------------------------------------------------------------
+# Pas de COUNT(*) et pas d'OFFSET : chaque page est un simple
+# "WHERE champ > position ORDER BY champ LIMIT n", quelle que soit la profondeur.
+# La taille de page par défaut vient de settings.API_PAGE_SIZE et peut
+# être ajustée par le client avec ?page_size=<n> (borné par max_page_size).
+
+class BaseCursorPagination(CursorPagination):
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
+class PatientCursorPagination(BaseCursorPagination):
+    ordering = 'id'
+    # Recherche (?search=) : tri par pertinence, départagé par l'id
+    ordering_recherche = ('rang_recherche', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        if 'rang_recherche' in queryset.query.annotations:
+            return self.ordering_recherche
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Recherche : keyset sur le couple (rang, id), calculé par la base (users/recherche.py).
+        La page est un "WHERE (rang, id) > position ORDER BY rang, id LIMIT n + 1" : DRF ne
+        filtre que sur le premier champ du tri, qui n'est pas unique ici. Chaque position
+        étant unique, les liens suivant/précédent de DRF n'ont jamais besoin d'offset.
+        """
+        if 'rang_recherche' not in queryset.query.annotations:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.ordering_recherche
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, position = self.cursor or (0, False, None)
+
+        if reverse:
+            queryset = queryset.order_by('-rang_recherche', '-id')
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            rang, pk = self.lire_position(position)
+            sens = 'lt' if reverse else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'rang_recherche__{sens}': rang}) | Q(rang_recherche=rang, **{f'id__{sens}': pk})
+            )
+
+        resultats = list(queryset[offset:offset + self.page_size + 1])
+        self.page = resultats[:self.page_size]
+        suivante = self._get_position_from_instance(resultats[-1], self.ordering) if len(resultats) > len(self.page) else None
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None or offset > 0, suivante is not None
+            self.next_position, self.previous_position = position, suivante
+        else:
+            self.has_next, self.has_previous = suivante is not None, position is not None or offset > 0
+            self.next_position, self.previous_position = suivante, position
+        self.display_page_controls = self.has_previous or self.has_next
+        return self.page
+
+    def lire_position(self, position):
+        rang, _, pk = position.rpartition(':')
+        try:
+            return float(rang), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        if ordering != self.ordering_recherche:
+            return super()._get_position_from_instance(instance, ordering)
+        if isinstance(instance, dict):
+            rang, pk = instance['rang_recherche'], instance['id']
+        else:
+            rang, pk = instance.rang_recherche, instance.id
+        # repr() d'un float est exact : la position relue désigne le même rang
+        return f'{float(rang)!r}:{pk}'
+
+
+class SuiviCursorPagination(BaseCursorPagination):
+    ordering = '-date_suivi'
+
+
+class RendezVousCursorPagination(BaseCursorPagination):
+    ordering = 'date_heure'
+
+
+class AlerteCursorPagination(BaseCursorPagination):
+    ordering = '-date_releve'
@@ -0,0 +1,12 @@
+from rest_framework import permissions
+
+
+class IsPersonnel(permissions.BasePermission):
+    """
+    Réservé au personnel du centre (Patient.is_personnel),
+    pour les opérations en masse ou les vues de supervision.
+    """
+    message = "Action réservée au personnel du centre."
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.is_personnel)
@@ -0,0 +1,110 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+# ----------------------------------------------------------------------
+# RESTRICTION DES CHAMPS (?fields= / ?omit=) DES LECTURES DE L'API
+# ----------------------------------------------------------------------
+# ?fields=id,first_name,last_name : seuls ces champs ; ?omit=adresse,last_vital_signs : tous sauf
+# ceux-là (les deux se combinent). La restriction va jusqu'au SQL : only() sur les colonnes
+# lues par les champs retenus, jointures (select_related) et préchargements (prefetch_related)
+# limités à ceux dont ils ont besoin, champs calculés non demandés jamais évalués.
+# Les colonnes lues par un SerializerMethodField sont déclarées dans Meta.sources_calculees
+# du sérialiseur ({'champ': ['chemin__de__lookup', ...]}).
+
+ACTIONS_PROJECTION = ('list', 'retrieve')
+
+
+class ChampsDynamiquesMixin:
+    """Sérialiseur réduit aux champs de context['champs'] quand il est fourni."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        champs = self.context.get('champs')
+        if champs is not None:
+            for nom in set(self.fields) - set(champs):
+                self.fields.pop(nom)
+
+
+def _liste(valeur):
+    return [nom.strip() for nom in valeur.split(',') if nom.strip()]
+
+
+def chemins(serializer, champs):
+    """Lookups ORM lus par les champs `champs` de `serializer`."""
+    calculees = getattr(serializer.Meta, 'sources_calculees', {})
+    for nom in champs:
+        champ = serializer.fields[nom]
+        if isinstance(champ, serializers.SerializerMethodField):
+            yield from calculees.get(nom, [])
+        elif champ.source != '*':
+            yield champ.source.replace('.', '__')
+
+
+def projeter(queryset, lookups):
+    """Queryset restreint aux colonnes, jointures et préchargements nécessaires à `lookups`."""
+    opts = queryset.model._meta
+    colonnes, jointures, prechargements = set(), set(), set()
+    for lookup in lookups:
+        racine = lookup.split('__')[0]
+        try:
+            champ = opts.get_field(racine)
+        except FieldDoesNotExist:
+            continue  # propriété ou méthode du modèle : rien à restreindre
+        if champ.one_to_many or champ.many_to_many:
+            prechargements.add(racine)
+            continue
+        colonnes.add(lookup)
+        if '__' in lookup:
+            jointures.add(racine)
+
+    # Colonnes du tri : la pagination par curseur lit la position sur les objets
+    for tri in queryset.query.order_by:
+        nom = str(tri).lstrip('-')
+        if nom not in queryset.query.annotations:
+            colonnes.add(nom)
+
+    gardes = [
+        lookup for lookup in queryset._prefetch_related_lookups
+        if getattr(lookup, 'prefetch_through', lookup).split('__')[0] in prechargements
+    ]
+    queryset = queryset.select_related(None).prefetch_related(None).prefetch_related(*gardes)
+    if jointures:  # select_related() sans argument suivrait toutes les relations
+        queryset = queryset.select_related(*jointures)
+    return queryset.only(*colonnes)
+
+
+class ProjectionMixin:
+    """?fields= / ?omit= sur les lectures (liste et détail) d'un ModelViewSet."""
+
+    def get_champs(self):
+        """Noms des champs demandés ; None sans restriction."""
+        if getattr(self, '_champs', False) is not False:
+            return self._champs
+        self._champs = None
+        params = self.request.query_params if self.request is not None else {}
+        if self.action in ACTIONS_PROJECTION and ('fields' in params or 'omit' in params):
+            disponibles = list(self.get_serializer_class()(context={'request': self.request}).fields)
+            demandes = _liste(params['fields']) if 'fields' in params else disponibles
+            omis = _liste(params.get('omit', ''))
+            inconnus = [nom for nom in [*demandes, *omis] if nom not in disponibles]
+            if inconnus:
+                raise ValidationError({'fields': [f"Champs inconnus : {', '.join(inconnus)}."]})
+            self._champs = [nom for nom in disponibles if nom in demandes and nom not in omis]
+        return self._champs
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        champs = self.get_champs()
+        if champs is not None:
+            context['champs'] = champs
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        champs = self.get_champs()
+        if champs is None:
+            return queryset
+        serializer = self.get_serializer_class()(context={'request': self.request})
+        return projeter(queryset, chemins(serializer, champs))
@@ -0,0 +1,160 @@
+from functools import lru_cache
+
+from django.conf import settings
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+# ----------------------------------------------------------------------
+# LISTES EN LECTURE RAPIDE (values_list -> dicts, sans instances de modèle)
+# ----------------------------------------------------------------------
+# Un ModelSerializer instancie un objet par ligne puis appelle get_attribute et
+# to_representation champ par champ. Ici, la liste est lue avec values_list() (tuples
+# nommés : la pagination par curseur y lit sa position), et chaque ligne devient un
+# dict par un plan précompilé une fois par (sérialiseur, champs) : position de la colonne
+# et convertisseur de chaque champ. Le JSON produit est identique, octet pour octet, à
+# celui du sérialiseur (vérifié par users/tests.py et la commande bench_listes).
+# Les champs calculés (SerializerMethodField) ont une version par lot déclarée dans
+# Meta.calculs_rapides du sérialiseur ({'champ': fonction(lignes) -> [valeur par ligne]}),
+# qui lit les colonnes de Meta.sources_calculees. Sans elle, la liste passe par le sérialiseur.
+
+# Types dont to_representation se réduit à une fonction native (valeur non nulle)
+CONVERSIONS_NATIVES = {
+    serializers.CharField: str,
+    serializers.EmailField: str,
+    serializers.IntegerField: int,
+    serializers.ReadOnlyField: None,
+    serializers.PrimaryKeyRelatedField: None,  # values_list donne déjà la clé
+}
+
+
+class DateHeureISO:
+    """
+    DateTimeField.to_representation au format ISO 8601, fuseau du champ résolu une fois
+    par liste (preparer) au lieu d'une fois par valeur.
+    """
+
+    def __init__(self, champ):
+        self.champ = champ
+
+    def preparer(self):
+        champ = self.champ
+        fuseau = champ.timezone if hasattr(champ, 'timezone') else champ.default_timezone()
+        if fuseau is None:
+            return champ.to_representation
+
+        def convertir(valeur):
+            if isinstance(valeur, str) or valeur.utcoffset() is None:
+                return champ.to_representation(valeur)
+            texte = valeur.astimezone(fuseau).isoformat()
+            return texte[:-6] + 'Z' if texte.endswith('+00:00') else texte
+        return convertir
+
+
+def convertisseur(champ):
+    """Fonction appliquée à une valeur non nulle du champ (None : valeur inchangée)."""
+    if type(champ) in CONVERSIONS_NATIVES:
+        return CONVERSIONS_NATIVES[type(champ)]
+    if type(champ) is serializers.DateTimeField:
+        format_sortie = getattr(champ, 'format', api_settings.DATETIME_FORMAT)
+        if format_sortie is not None and format_sortie.lower() == ISO_8601:
+            return DateHeureISO(champ)
+    return champ.to_representation
+
+
+def _est_colonne(opts, lookup):
+    relation = opts.get_field(lookup.split('__')[0])
+    return not (relation.one_to_many or relation.many_to_many)
+
+
+class LectureRapide:
+
+    def __init__(self, serializer_class, champs=None):
+        serializer = serializer_class()
+        meta = serializer.Meta
+        opts = meta.model._meta
+        calculs = getattr(meta, 'calculs_rapides', {})
+        sources = getattr(meta, 'sources_calculees', {})
+
+        colonnes = [opts.pk.name]
+        self.plan = []  # (nom, position de la colonne ou None si calculé, convertisseur)
+        self.calculs = []
+        for champ in serializer._readable_fields:
+            nom = champ.field_name
+            if champs is not None and nom not in champs:
+                continue
+            if isinstance(champ, serializers.SerializerMethodField):
+                if nom not in calculs:
+                    raise LookupError(nom)
+                colonnes.extend(lookup for lookup in sources.get(nom, []) if _est_colonne(opts, lookup))
+                self.calculs.append((nom, calculs[nom]))
+                self.plan.append((nom, None, None))
+            else:
+                lookup = champ.source.replace('.', '__')
+                colonnes.append(lookup)
+                self.plan.append((nom, lookup, convertisseur(champ)))
+        self.colonnes = list(dict.fromkeys(colonnes))
+        self.plan = [
+            (nom, None if lookup is None else self.colonnes.index(lookup), conversion)
+            for nom, lookup, conversion in self.plan
+        ]
+
+    def lignes(self, queryset, tri=()):
+        """values_list nommé des colonnes du plan et des colonnes de tri (position du curseur)."""
+        noms = [*self.colonnes, *(t.lstrip('-') for t in tri)]
+        return queryset.prefetch_related(None).values_list(*dict.fromkeys(noms), named=True)
+
+    def convertir(self, lignes):
+        lignes = list(lignes)
+        calcules = {nom: calcul(lignes) for nom, calcul in self.calculs}
+        plan = [
+            (nom, position, conversion.preparer() if hasattr(conversion, 'preparer') else conversion)
+            for nom, position, conversion in self.plan
+        ]
+        resultat = []
+        for i, ligne in enumerate(lignes):
+            donnees = {}
+            for nom, position, conversion in plan:
+                if position is None:
+                    donnees[nom] = calcules[nom][i]
+                else:
+                    valeur = ligne[position]
+                    donnees[nom] = valeur if valeur is None or conversion is None else conversion(valeur)
+            resultat.append(donnees)
+        return resultat
+
+
+@lru_cache(maxsize=64)
+def lecture(serializer_class, champs=None):
+    """Plan compilé pour `serializer_class` réduit à `champs` (tuple) ; None si impossible."""
+    try:
+        return LectureRapide(serializer_class, champs)
+    except LookupError:
+        return None
+
+
+class ListeRapideMixin:
+    """Action list d'un ModelViewSet servie par LectureRapide (settings.API_LISTES_RAPIDES)."""
+
+    def get_lecture_rapide(self):
+        if not getattr(settings, 'API_LISTES_RAPIDES', True):
+            return None
+        champs = self.get_champs() if hasattr(self, 'get_champs') else None
+        return lecture(self.get_serializer_class(), None if champs is None else tuple(champs))
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_lecture_rapide()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        tri = ()
+        if self.paginator is not None and hasattr(self.paginator, 'get_ordering'):
+            tri = self.paginator.get_ordering(request, queryset, self)
+        lignes = plan.lignes(queryset, tri)
+
+        page = self.paginate_queryset(lignes)
+        if page is not None:
+            return self.get_paginated_response(plan.convertir(page))
+        return Response(plan.convertir(lignes))
@@ -1,9 +1,12 @@
 from rest_framework import serializers
 from users.models import Patient, DetailsPatient
-from medical_data.models import Suivi, RendezVous, ReleveVital
+from medical_data.models import Suivi, RendezVous, ReleveVital, Alerte, SeuilsAlerte
+from medical_data import alertes
 from django.db import transaction
 from django.utils import timezone
+from datetime import timedelta
 from django.contrib.auth.hashers import make_password 
+from .projection import ChampsDynamiquesMixin
 
 # Liste des clés du Serializer qui correspondent aux champs du modèle DetailsPatient
 NESTED_FIELDS = [
@@ -26,10 +29,51 @@ RELATION_CHOIX = {
     "": "AU",
 }
 
+def resume_releve(releve):
+    """Dernières mesures d'un patient telles que renvoyées par l'API (last_vital_signs)."""
+    return {
+        'date_releve': releve.date_releve.isoformat(),
+        'tension_systolique': releve.tension_systolique,
+        'tension_diastolique': releve.tension_diastolique,
+        # Conversion des DecimalFields en float pour la sérialisation JSON
+        'glycemie': float(releve.glycemie) if releve.glycemie is not None else None,
+        'poids': float(releve.poids) if releve.poids is not None else None,
+    }
+
+
+# ----------------------------------------------------------------------
+# CHAMPS CALCULÉS PAR LOT (listes en lecture rapide, users/api/rapide.py)
+# ----------------------------------------------------------------------
+# Même résultat que les méthodes get_* des sérialiseurs, pour toute une page de
+# lignes values_list (tuples nommés d'après les lookups de Meta.sources_calculees).
+
+def derniers_releves_par_lot(lignes):
+    # resume_releve ne lit que des attributs : des tuples nommés suffisent
+    releves = {
+        releve.patient_id: resume_releve(releve)
+        for releve in ReleveVital.objects.derniers_par_patient().filter(patient_id__in=[l.id for l in lignes])
+        .values_list('patient_id', 'date_releve', 'tension_systolique', 'tension_diastolique', 'glycemie', 'poids', named=True)
+    }
+    return [releves.get(ligne.id) for ligne in lignes]
+
+
+def noms_patients_par_lot(lignes):
+    return [f"{ligne.patient__first_name} {ligne.patient__last_name}" for ligne in lignes]
+
+
+def noms_complets_patients_par_lot(lignes):
+    # AbstractUser.get_full_name
+    return [f"{ligne.patient__first_name} {ligne.patient__last_name}".strip() for ligne in lignes]
+
+
+def telephones_patients_par_lot(lignes):
+    return [ligne.patient__telephone for ligne in lignes]
+
+
 # ----------------------------------------------------------------------
 # SERIALIZER DE LECTURE/LISTE (LA BASE SANS CHAMPS DE MOT DE PASSE) 🚨 SAFE 🚨
 # ----------------------------------------------------------------------
-class PatientSerializer(serializers.ModelSerializer):
+class PatientSerializer(ChampsDynamiquesMixin, serializers.ModelSerializer):
     """
     Sérialiseur par défaut pour la lecture et la liste (LIST/RETRIEVE). 
     """
@@ -53,18 +97,19 @@ class PatientSerializer(serializers.ModelSerializer):
         enregistrées pour ce patient.
         """
         try:
-            # Récupère le dernier ReleveVital du patient (le related_name par défaut est 'releves_vitaux')
-            last_releve = obj.releves_vitaux.latest('date_releve') 
+            # Dernier relevé pré-chargé par PatientViewSet (Prefetch 'dernier_releve_liste').
+            # Sinon (retrieve après update, usage hors viewset), requête unitaire comme avant.
+            prefetched = getattr(obj, 'dernier_releve_liste', None)
+            if prefetched is not None:
+                if not prefetched:
+                    return None
+                last_releve = prefetched[0]
+            else:
+                # Récupère le dernier ReleveVital du patient (le related_name par défaut est 'releves_vitaux')
+                last_releve = obj.releves_vitaux.latest('date_releve') 
             
             # Retourne les données formatées pour l'API
-            return {
-                'date_releve': last_releve.date_releve.isoformat(),
-                'tension_systolique': last_releve.tension_systolique,
-                'tension_diastolique': last_releve.tension_diastolique,
-                # Conversion des DecimalFields en float pour la sérialisation JSON
-                'glycemie': float(last_releve.glycemie) if last_releve.glycemie is not None else None,
-                'poids': float(last_releve.poids) if last_releve.poids is not None else None,
-            }
+            return resume_releve(last_releve)
         except ReleveVital.DoesNotExist:
             return None # Retourne None si aucun relevé n'est trouvé
         except Exception:
@@ -84,6 +129,9 @@ class PatientSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ('id', 'username',) 
         extra_kwargs = {} # Obligatoire pour la classe enfant PatientCreateSerializer
+        # Lookups lus par les champs calculés (?fields= / ?omit=, users/api/projection.py)
+        sources_calculees = {'last_vital_signs': ['releves_vitaux']}
+        calculs_rapides = {'last_vital_signs': derniers_releves_par_lot}
 
 
 # ----------------------------------------------------------------------
@@ -112,11 +160,12 @@ class PatientCreateSerializer(PatientSerializer):
             if urgence_telephone:
                 validated_data['numero_urgence'] = urgence_telephone
 
-            patient_instance_created = Patient.objects.create(**validated_data) 
-            
+            # Mot de passe fourni : un seul hachage et une seule écriture
+            # (Patient.save ne génère un mot de passe que si aucun hash n'est présent)
             if password:
-                patient_instance_created.set_password(password)
-                patient_instance_created.save()
+                validated_data['password'] = make_password(password)
+
+            patient_instance_created = Patient.objects.create(**validated_data) 
             
             client_lien_string = details_data.get('contact_urgence_lien', '')
             if client_lien_string:
@@ -191,10 +240,37 @@ class ReleveVitalSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['id', 'patient', 'date_releve'] 
 
+# ----------------------------------------------------------------------
+# SERIALIZER POUR L'INGESTION DE RELEVÉS PAR LES APPAREILS
+# ----------------------------------------------------------------------
+class ReleveIngestionSerializer(serializers.ModelSerializer):
+    """
+    Un relevé d'un lot synchronisé par un appareil, avec son horodatage d'origine.
+    Validé élément par élément ; le dédoublonnage se fait par lot (medical_data/ingestion.py).
+    """
+    # Tolérance sur l'horloge des appareils
+    AVANCE_MAX = timedelta(minutes=5)
+
+    date_releve = serializers.DateTimeField()
+
+    class Meta:
+        model = ReleveVital
+        fields = [
+            'date_releve', 'appareil_id',
+            'tension_systolique', 'tension_diastolique', 'glycemie', 'poids', 'notes_patient',
+        ]
+        # Unicité (patient, appareil, date) vérifiée par lot, pas une requête par relevé
+        validators = []
+
+    def validate_date_releve(self, value):
+        if value > timezone.now() + self.AVANCE_MAX:
+            raise serializers.ValidationError("La date du relevé est dans le futur.")
+        return value
+
 # ----------------------------------------------------------------------
 # SERIALIZER POUR LE SUIVI (Inchangé)
 # ----------------------------------------------------------------------
-class FollowUpSerializer(serializers.ModelSerializer):
+class FollowUpSerializer(ChampsDynamiquesMixin, serializers.ModelSerializer):
     
     class Meta:
         model = Suivi
@@ -207,7 +283,7 @@ class FollowUpSerializer(serializers.ModelSerializer):
 # ----------------------------------------------------------------------
 # SERIALIZER POUR LE RENDEZ-VOUS 🚨 CORRECTION read_only_fields 🚨
 # ----------------------------------------------------------------------
-class RendezVousSerializer(serializers.ModelSerializer):
+class RendezVousSerializer(ChampsDynamiquesMixin, serializers.ModelSerializer):
     
     patient_full_name = serializers.SerializerMethodField(read_only=True)
     patient_name = serializers.SerializerMethodField()
@@ -217,11 +293,26 @@ class RendezVousSerializer(serializers.ModelSerializer):
         model = RendezVous
         fields = [
             'id', 'patient', 'patient_full_name', 'date_heure', 
-            'motif', 'statut', 'notes_internes',
+            'motif', 'statut', 'notes_internes', 'praticien',
             'patient_name', 'patient_phone'
         ]
         # 🚨 CORRECTION : Les deux définitions précédentes de read_only_fields ont été fusionnées en une seule.
         read_only_fields = ('id', 'patient_full_name', 'statut', 'patient_name', 'patient_phone',) 
+        # Les contraintes d'unicité par créneau sont conditionnelles (statut, praticien) :
+        # vérifiées par medical_data/agenda.py (409 en cas de conflit), pas par les validateurs DRF.
+        validators = []
+        extra_kwargs = {'date_heure': {'validators': []}}
+        # Lookups lus par les champs calculés (?fields= / ?omit=, users/api/projection.py)
+        sources_calculees = {
+            'patient_full_name': ['patient__first_name', 'patient__last_name'],
+            'patient_name': ['patient__first_name', 'patient__last_name'],
+            'patient_phone': ['patient__telephone'],
+        }
+        calculs_rapides = {
+            'patient_full_name': noms_complets_patients_par_lot,
+            'patient_name': noms_patients_par_lot,
+            'patient_phone': telephones_patients_par_lot,
+        }
     
     def get_patient_name(self, obj):
         patient = obj.patient
@@ -236,4 +327,38 @@ class RendezVousSerializer(serializers.ModelSerializer):
         return "N/A"
 
     def get_patient_full_name(self, obj):
-        return obj.patient.get_full_name()
\ No newline at end of file
+        return obj.patient.get_full_name()
+# ----------------------------------------------------------------------
+# SERIALIZERS POUR LES ALERTES (FILE DE TRIAGE)
+# ----------------------------------------------------------------------
+class AlerteSerializer(serializers.ModelSerializer):
+    patient_name = serializers.SerializerMethodField()
+    niveau_display = serializers.CharField(source='get_niveau_display', read_only=True)
+    regle_display = serializers.CharField(source='get_regle_display', read_only=True)
+
+    class Meta:
+        model = Alerte
+        fields = [
+            'id', 'patient', 'patient_name', 'releve', 'date_releve',
+            'metrique', 'regle', 'regle_display', 'niveau', 'niveau_display',
+            'valeur', 'seuil', 'statut', 'date_creation', 'traitee_par', 'date_traitement',
+        ]
+        # Seul le statut se modifie (prise en charge par le personnel)
+        read_only_fields = [f for f in fields if f != 'statut']
+
+    def get_patient_name(self, obj):
+        return f"{obj.patient.first_name} {obj.patient.last_name}".strip() or obj.patient.username
+
+
+class SeuilsAlerteSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = SeuilsAlerte
+        fields = ['patient', 'regles', 'date_modification']
+        read_only_fields = ['patient', 'date_modification']
+
+    def validate_regles(self, value):
+        try:
+            return alertes.valider_regles(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
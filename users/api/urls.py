@@ -1,16 +1,19 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PatientViewSet, CustomAuthToken, SuiviViewSet, RendezVousViewSet, GlobalStatsView 
+from .views import PatientViewSet, CustomAuthToken, SuiviViewSet, RendezVousViewSet, GlobalStatsView, StatsSeriesView, AlerteViewSet, CohortesView
 
 router = DefaultRouter()
 router.register(r'patients', PatientViewSet)
 #router.register(r'suivis', SuiviViewSet)
 router.register(r'rendezvous', RendezVousViewSet,basename='rendez-vous')
 router.register(r'suivis', SuiviViewSet, basename='suivis')
+router.register(r'alertes', AlerteViewSet, basename='alertes')
 
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/login/', CustomAuthToken.as_view(), name='api_login'),
     path('stats/global/', GlobalStatsView.as_view(), name='stats-global'),
+    path('stats/series/', StatsSeriesView.as_view(), name='stats-series'),
+    path('stats/cohortes/', CohortesView.as_view(), name='stats-cohortes'),
 ]
\ No newline at end of file
@@ -1,40 +1,92 @@
-from rest_framework import viewsets,permissions,generics,status
+from rest_framework import viewsets,permissions,generics,status,mixins
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework import filters
+from rest_framework.parsers import MultiPartParser
+from rest_framework.exceptions import APIException, PermissionDenied, ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
 from rest_framework.views import APIView
 from rest_framework import status
-from django.db.models import Count
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Prefetch
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import datetime
 
 from datetime import datetime, timedelta
 # Import des modèles et sérialiseurs nécessaires
 from users.models import Patient, DetailsPatient
-from medical_data.models import Suivi, RendezVous,ReleveVital
-from .serializers import PatientSerializer, FollowUpSerializer, RendezVousSerializer
+from medical_data.models import Suivi, RendezVous,ReleveVital, Alerte, SeuilsAlerte
+from medical_data import agenda, analytique, chronologie, cohortes, echantillonnage, ingestion, stats, versions
+from .serializers import (
+    PatientSerializer, FollowUpSerializer, RendezVousSerializer, ReleveVitalSerializer, ReleveIngestionSerializer,
+    AlerteSerializer, SeuilsAlerteSerializer,
+)
+from .pagination import (
+    BaseCursorPagination, PatientCursorPagination, SuiviCursorPagination, RendezVousCursorPagination,
+    AlerteCursorPagination,
+)
+from .filtres import RecherchePatientFilter, RechercheSuiviFilter
+from .permissions import IsPersonnel
+from .projection import ProjectionMixin
+from .rapide import ListeRapideMixin
+from medical_data import recherche as recherche_notes
+from users import autocompletion, recherche
+from users.hachage import ServiceHachage
+from users.importation import TAILLE_LOT_DEFAUT, deviner_format, importer_patients, lire_lignes, ouvrir_texte
 from medical_data.api.serializers import SuiviSerializer
 
 User = get_user_model()
 
 
-class PatientViewSet(viewsets.ModelViewSet):
+class LectureDossierMixin:
+    """
+    Lectures d'un dossier patient servies depuis le cache versionné (medical_data/versions.py) :
+    toute écriture sur le patient, ses détails, relevés, suivis ou rendez-vous change la clé.
+    """
+
+    def reponse_dossier(self, patient_id, vue, *args, **kwargs):
+        request = self.request
+        donnees = versions.lire(
+            f'api:{self.basename}:{self.action}', patient_id,
+            lambda: vue(request, *args, **kwargs).data,
+            request.build_absolute_uri(),
+        )
+        return Response(donnees)
+
+
+class PatientViewSet(ProjectionMixin, ListeRapideMixin, LectureDossierMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les opérations CRUD sur le modèle Patient.
     """
     # Utilisation de 'details_dossier' comme related_name
-    queryset = Patient.objects.filter(is_personnel=False).select_related('details_dossier').order_by('id') 
+    # Le dernier relevé de chaque patient est chargé en une seule requête (fonction fenêtre)
+    # pour éviter un latest() par ligne dans PatientSerializer.get_last_vital_signs.
+    queryset = Patient.objects.filter(is_personnel=False).select_related('details_dossier').prefetch_related(
+        Prefetch(
+            'releves_vitaux',
+            queryset=ReleveVital.objects.derniers_par_patient(),
+            to_attr='dernier_releve_liste',
+        )
+    ).order_by('id') 
     
     serializer_class = PatientSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PatientCursorPagination
+
+    filter_backends = [RecherchePatientFilter]
+    search_fields = recherche.CHAMPS
 
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['username', 'last_name', 'first_name', 'telephone']
+    def retrieve(self, request, *args, **kwargs):
+        pk = str(kwargs.get('pk', ''))
+        if not pk.isdigit():
+            return super().retrieve(request, *args, **kwargs)
+        return self.reponse_dossier(int(pk), super().retrieve, *args, **kwargs)
     
     def update(self, request, *args, **kwargs):
         """
@@ -139,19 +191,207 @@ class PatientViewSet(viewsets.ModelViewSet):
             return Response({'details': error_message}, status=status.HTTP_400_BAD_REQUEST)
 
         # Re-sérialise l'instance complète pour le retour
-        instance.refresh_from_db() 
+        instance.refresh_from_db()
+        # Le relevé pré-chargé par get_object() est périmé si un ReleveVital vient d'être créé
+        instance.__dict__.pop('dernier_releve_liste', None)
         print("--- Fin MAJ Patient ---")
         return Response(self.get_serializer(instance).data)
 
 
     def perform_update(self, serializer):
         serializer.save()
+
+    @action(detail=False, methods=['post'], url_path='import',
+            permission_classes=[IsPersonnel], parser_classes=[MultiPartParser])
+    def importer(self, request):
+        """
+        Import en masse (multipart, champ 'fichier' en CSV ou NDJSON).
+        Retourne le rapport : compteurs, débit et erreurs par ligne. Les identifiants générés
+        (mots de passe en clair) n'y figurent que sur demande explicite (champ 'identifiants=1') ;
+        pour un gros fichier, préférer la commande importer_patients --identifiants.
+        """
+        fichier = request.FILES.get('fichier')
+        if fichier is None:
+            return Response({'details': "Fichier manquant (champ 'fichier')."}, status=status.HTTP_400_BAD_REQUEST)
+
+        format_fichier = request.data.get('format') or deviner_format(fichier.name)
+        if format_fichier not in ('csv', 'ndjson'):
+            return Response({'details': f"Format inconnu : {format_fichier}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            taille_lot = int(request.data.get('taille_lot', TAILLE_LOT_DEFAUT))
+        except (TypeError, ValueError):
+            taille_lot = TAILLE_LOT_DEFAUT
+
+        identifiants = [] if request.data.get('identifiants') in ('1', 'true', 'oui') else None
+        # Hachage en série : pas de pool de processus forké depuis un worker HTTP (connexions
+        # ouvertes, thread de l'autocomplétion). Le pool reste réservé à la commande importer_patients.
+        with ServiceHachage(processus=1) as hachage:
+            rapport = importer_patients(
+                lire_lignes(ouvrir_texte(fichier), format_fichier), taille_lot=max(1, taille_lot),
+                hachage=hachage, identifiants=None if identifiants is None else identifiants.extend,
+            )
+        donnees = rapport.as_dict()
+        if identifiants is not None:
+            donnees['identifiants'] = [
+                {'username': username, 'mot_de_passe_clair': mot_de_passe} for username, mot_de_passe in identifiants
+            ]
+        return Response(donnees, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsPersonnel])
+    def autocompletion(self, request):
+        """
+        Suggestions de l'accueil à chaque frappe (début de nom, de username PAT-000xx ou de téléphone).
+        ?q=dup&limite=10 -> {"q": "dup", "results": [[id, "Prénom Nom", "PAT-000xx"], ...]}
+        Servi par l'index en mémoire (users/autocompletion.py), sans requête ni sérialiseur.
+        """
+        requete = request.query_params.get('q', '').strip()
+        try:
+            limite = int(request.query_params.get('limite', autocompletion.LIMITE_DEFAUT))
+        except ValueError:
+            limite = 0
+        if not 1 <= limite <= autocompletion.LIMITE_MAX:
+            raise ValidationError({'limite': [f"Entier entre 1 et {autocompletion.LIMITE_MAX} attendu."]})
+        return Response({'q': requete, 'results': autocompletion.suggerer(requete, limite) if requete else []})
+
+    @action(detail=True, methods=['post'], url_path='releves')
+    def ingerer_releves(self, request, pk=None):
+        """
+        Synchronisation d'un appareil : lot de relevés horodatés.
+        Corps : [relevé, ...] ou {"appareil_id": "...", "releves": [relevé, ...]}.
+        Retourne un résultat par relevé (cree / doublon / invalide), dans l'ordre reçu.
+        """
+        patient = generics.get_object_or_404(Patient.objects.filter(is_personnel=False).only('pk'), pk=pk)
+        if not (request.user.is_personnel or request.user.pk == patient.pk):
+            raise PermissionDenied("Seul le patient ou le personnel peut transmettre ses relevés.")
+
+        donnees = request.data
+        appareil_id = None
+        if isinstance(donnees, dict):
+            appareil_id = donnees.get('appareil_id')
+            donnees = donnees.get('releves')
+        if not isinstance(donnees, list) or not donnees:
+            raise ValidationError({'releves': ["Liste de relevés attendue."]})
+        if len(donnees) > settings.INGESTION_RELEVES_MAX:
+            raise ValidationError({'releves': [f"{settings.INGESTION_RELEVES_MAX} relevés au maximum par envoi."]})
+
+        elements = []
+        for brut in donnees:
+            if isinstance(brut, dict) and appareil_id and 'appareil_id' not in brut:
+                brut = dict(brut, appareil_id=appareil_id)
+            serializer = ReleveIngestionSerializer(data=brut)
+            if serializer.is_valid():
+                elements.append(serializer.validated_data)
+            else:
+                elements.append({'erreurs': serializer.errors})
+
+        resultats = ingestion.ingerer_releves(patient.pk, elements)
+        compteurs = {statut: 0 for statut in (ingestion.CREE, ingestion.DOUBLON, ingestion.INVALIDE)}
+        for resultat in resultats:
+            compteurs[resultat['statut']] += 1
+        return Response({
+            'crees': compteurs[ingestion.CREE],
+            'doublons': compteurs[ingestion.DOUBLON],
+            'invalides': compteurs[ingestion.INVALIDE],
+            'resultats': resultats,
+        }, status=status.HTTP_201_CREATED if compteurs[ingestion.CREE] else status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'], url_path='series')
+    def series_releves(self, request, pk=None):
+        """
+        Relevés vitaux sous-échantillonnés pour les graphiques longue durée.
+        ?debut=AAAA-MM-JJ&fin=AAAA-MM-JJ (fin incluse ; par défaut les 365 derniers jours)
+        &metriques=glycemie,tension_systolique&points=300&methode=lttb|minmax|agregats
+        """
+        patient = generics.get_object_or_404(Patient.objects.filter(is_personnel=False).only('pk'), pk=pk)
+        params = request.query_params
+        try:
+            # parse_date : None si le format ne correspond pas, ValueError si la date n'existe pas
+            fin = parse_date(params['fin']) if 'fin' in params else timezone.localdate()
+            debut = None
+            if fin is not None:
+                debut = parse_date(params['debut']) if 'debut' in params else fin - timedelta(days=364)
+            points = int(params.get('points', echantillonnage.POINTS_DEFAUT))
+        except ValueError:
+            debut = fin = None
+            points = 0
+        metriques = params.get('metriques')
+        metriques = metriques.split(',') if metriques else echantillonnage.METRIQUES
+        methode = params.get('methode', 'lttb')
+        if (
+            debut is None or fin is None or debut > fin
+            or not 3 <= points <= echantillonnage.POINTS_MAX
+            or methode not in echantillonnage.METHODES
+            or any(m not in echantillonnage.METRIQUES for m in metriques)
+        ):
+            raise ValidationError({'details': (
+                "Paramètres invalides (debut/fin AAAA-MM-JJ, "
+                f"points entre 3 et {echantillonnage.POINTS_MAX}, methode={'|'.join(echantillonnage.METHODES)}, "
+                f"metriques parmi {','.join(echantillonnage.METRIQUES)})."
+            )})
+
+        debut_plage, _ = agenda.fenetre(debut)
+        _, fin_plage = agenda.fenetre(fin)
+        return Response({
+            'debut': debut,
+            'fin': fin,
+            'methode': methode,
+            'points': points,
+            'series': echantillonnage.series(patient.pk, debut_plage, fin_plage, metriques, points, methode),
+        })
+
+    @action(detail=True, methods=['get', 'put'], permission_classes=[IsPersonnel])
+    def seuils(self, request, pk=None):
+        """Règles d'alerte propres au patient (complètent settings.ALERTES_SEUILS_DEFAUT)."""
+        patient = generics.get_object_or_404(Patient.objects.filter(is_personnel=False).only('pk'), pk=pk)
+        seuils, _ = SeuilsAlerte.objects.get_or_create(patient=patient)
+        if request.method == 'PUT':
+            serializer = SeuilsAlerteSerializer(seuils, data=request.data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        else:
+            serializer = SeuilsAlerteSerializer(seuils)
+        return Response(dict(serializer.data, defauts=settings.ALERTES_SEUILS_DEFAUT))
+
+    @action(detail=True, methods=['get'])
+    def chronologie(self, request, pk=None):
+        """
+        Flux unique Suivis + Rendez-vous + Relevés, du plus récent au plus ancien.
+        ?curseur=<jeton>&page_size=<n>&types=suivi,rendez_vous,releve
+        """
+        patient = generics.get_object_or_404(Patient.objects.filter(is_personnel=False).only('pk'), pk=pk)
+        pagination = BaseCursorPagination()
+        taille = pagination.get_page_size(request)
+
+        types = request.query_params.get('types')
+        types = [t for t in types.split(',') if t in chronologie.SOURCES] if types else None
+        try:
+            evenements, suivant = chronologie.page(patient.pk, request.query_params.get('curseur'), taille, types)
+        except ValueError as e:
+            raise ValidationError({'curseur': [str(e)]})
+
+        serialiseurs = {
+            'suivi': FollowUpSerializer,
+            'rendez_vous': RendezVousSerializer,
+            'releve': ReleveVitalSerializer,
+        }
+        return Response({
+            'curseur_suivant': suivant,
+            'results': [
+                {
+                    'type': type_evenement,
+                    'date': date,
+                    'donnees': serialiseurs[type_evenement](objet, context=self.get_serializer_context()).data,
+                }
+                for type_evenement, date, objet in evenements
+            ],
+        })
     
 # ----------------------------------------------------------------------
 # ViewSets pour les données médicales (SUIVI et RENDEZ-VOUS)
 # ----------------------------------------------------------------------
 
-class SuiviViewSet(viewsets.ModelViewSet):
+class SuiviViewSet(ProjectionMixin, ListeRapideMixin, LectureDossierMixin, viewsets.ModelViewSet):
     """
     ViewSet pour les suivis des patients.
     Permet de filtrer les suivis par ID patient via la query parameter `?patient=<ID>`.
@@ -159,20 +399,63 @@ class SuiviViewSet(viewsets.ModelViewSet):
     queryset = Suivi.objects.all().select_related('patient').order_by('-date_suivi')
     serializer_class = FollowUpSerializer 
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = SuiviCursorPagination
     
     # 🚨 Points de Configuration CLÉS pour le filtrage :
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, RechercheSuiviFilter]
     filterset_fields = ['patient_id'] # <-- Ceci permet de filtrer par patient ID
     # --------------------------------------------------------------------
     
-    search_fields = ['patient__first_name', 'patient__last_name', 'motif', 'notes_medecin']
+    search_fields = ['patient__first_name', 'patient__last_name', 'motif', 'notes_medecin', 'prescriptions']
 
+    def list(self, request, *args, **kwargs):
+        # Suivis d'un patient (dossier) : depuis le cache ; liste globale : base de données
+        patient_id = request.query_params.get('patient_id', '')
+        if not patient_id.isdigit():
+            return super().list(request, *args, **kwargs)
+        return self.reponse_dossier(int(patient_id), super().list, *args, **kwargs)
 
-class RendezVousViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def recherche(self, request):
+        """
+        Recherche plein texte classée dans les notes cliniques, avec extraits surlignés.
+        ?q=aspirine "douleur thoracique"&patient_id=<id>&limite=20
+        """
+        requete = request.query_params.get('q', '').strip()
+        if not requete:
+            raise ValidationError({'q': ["Ce paramètre est obligatoire."]})
+        patient_id = request.query_params.get('patient_id')
+        if patient_id is not None and not patient_id.isdigit():
+            raise ValidationError({'patient_id': ["Identifiant invalide."]})
+        try:
+            limite = int(request.query_params.get('limite', recherche_notes.LIMITE_DEFAUT))
+        except ValueError:
+            limite = 0
+        if not 1 <= limite <= recherche_notes.LIMITE_MAX:
+            raise ValidationError({'limite': [f"Entier entre 1 et {recherche_notes.LIMITE_MAX} attendu."]})
+
+        resultats = recherche_notes.rechercher(requete, patient_id, limite)
+        return Response({
+            'q': requete,
+            'results': [
+                {**self.get_serializer(suivi).data, 'score': score, 'extraits': extraits}
+                for suivi, score, extraits in resultats
+            ],
+        })
+
+
+class CreneauOccupe(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Ce créneau est déjà réservé."
+    default_code = 'creneau_occupe'
+
+
+class RendezVousViewSet(ProjectionMixin, ListeRapideMixin, LectureDossierMixin, viewsets.ModelViewSet):
     """Gère les opérations CRUD sur le modèle RendezVous."""
     
     serializer_class = RendezVousSerializer 
     permission_classes = [IsAuthenticated] 
+    pagination_class = RendezVousCursorPagination
     
     def get_queryset(self):
         # 1. Base QuerySet : Optimisation de la performance
@@ -184,15 +467,142 @@ class RendezVousViewSet(viewsets.ModelViewSet):
         if patient_id is not None:
             queryset = queryset.filter(patient_id=patient_id)
             
-        # 3. Filtrage par Date (pour l'Agenda)
-        # Ceci vous permettra de filtrer les RDV pour une date spécifique dans l'AgendaWidget
+        # 3. Filtrage par fenêtre (pour l'Agenda) : ?date=AAAA-MM-JJ&vue=jour|semaine|mois
+        # Plage demi-ouverte sur date_heure (index utilisable), au lieu de date_heure__date=...
         date_filter = self.request.query_params.get('date')
         if date_filter is not None:
-           
-            queryset = queryset.filter(date_heure__date=date_filter)
+            debut, fin = self.get_fenetre(date_filter)
+            queryset = agenda.filtrer(
+                queryset, debut, fin,
+                statut=self.request.query_params.get('statut'),
+                praticien_id=self.request.query_params.get('praticien'),
+            )
 
         return queryset.order_by('date_heure')
 
+    def list(self, request, *args, **kwargs):
+        # Rendez-vous d'un patient (dossier) : depuis le cache ; agenda : base de données
+        patient_id = request.query_params.get('patient_id', '')
+        if not patient_id.isdigit():
+            return super().list(request, *args, **kwargs)
+        return self.reponse_dossier(int(patient_id), super().list, *args, **kwargs)
+
+    def get_fenetre(self, date_filter=None):
+        """Fenêtre (début, fin) demandée ; aujourd'hui par défaut."""
+        try:
+            jour = parse_date(date_filter) if date_filter else timezone.localdate()
+        except ValueError:
+            jour = None
+        vue = self.request.query_params.get('vue', 'jour')
+        if jour is None or vue not in agenda.VUES:
+            raise ValidationError({'details': "Paramètres d'agenda invalides (date=AAAA-MM-JJ, vue=jour|semaine|mois)."})
+        return agenda.fenetre(jour, vue)
+
+    def perform_create(self, serializer):
+        self._enregistrer_sur_creneau(serializer)
+
+    def perform_update(self, serializer):
+        instance = serializer.instance
+        date_heure = serializer.validated_data.get('date_heure', instance.date_heure)
+        praticien = serializer.validated_data.get('praticien', instance.praticien)
+        if date_heure != instance.date_heure or praticien != instance.praticien:
+            self._enregistrer_sur_creneau(serializer, exclure_pk=instance.pk)
+        else:
+            serializer.save()
+
+    def _enregistrer_sur_creneau(self, serializer, exclure_pk=None):
+        """Sauvegarde atomique : refuse un créneau invalide (400) ou déjà pris (409)."""
+        instance = serializer.instance
+        date_heure = serializer.validated_data.get('date_heure', getattr(instance, 'date_heure', None))
+        praticien = serializer.validated_data.get('praticien', getattr(instance, 'praticien', None))
+        try:
+            agenda.enregistrer(serializer.save, date_heure, getattr(praticien, 'pk', None), exclure_pk)
+        except agenda.CreneauInvalide as e:
+            raise ValidationError({'date_heure': [str(e)]})
+        except agenda.CreneauIndisponible as e:
+            raise CreneauOccupe(str(e))
+
+    @action(detail=False, methods=['get'])
+    def disponibilites(self, request):
+        """
+        Créneaux libres d'une plage (par défaut : les 7 prochains jours).
+        ?debut=AAAA-MM-JJ&fin=AAAA-MM-JJ (fin incluse)&praticien=<id>
+        """
+        try:
+            # parse_date : None si le format ne correspond pas, ValueError si la date n'existe pas
+            debut = parse_date(request.query_params['debut']) if 'debut' in request.query_params else timezone.localdate()
+            fin = None
+            if debut is not None:
+                fin = parse_date(request.query_params['fin']) if 'fin' in request.query_params else debut + timedelta(days=6)
+        except ValueError:
+            debut = fin = None
+        if debut is None or fin is None or debut > fin or (fin - debut).days > 62:
+            raise ValidationError({'details': "Plage invalide (debut/fin au format AAAA-MM-JJ, 62 jours au maximum)."})
+
+        debut_plage, _ = agenda.fenetre(debut)
+        _, fin_plage = agenda.fenetre(fin)
+        praticien_id = request.query_params.get('praticien')
+        return Response({
+            'duree_minutes': int(agenda.duree_creneau().total_seconds() // 60),
+            'praticien': praticien_id,
+            'creneaux': agenda.creneaux_libres(debut_plage, fin_plage, praticien_id),
+        })
+
+    @action(detail=False, methods=['get'], url_path='agenda')
+    def consulter_agenda(self, request):
+        """
+        Agenda complet d'une fenêtre, sans pagination.
+        ?vue=jour|semaine|mois&date=AAAA-MM-JJ&statut=P,C&praticien=<id>
+        """
+        debut, fin = self.get_fenetre(request.query_params.get('date'))
+        queryset = agenda.filtrer(
+            RendezVous.objects.select_related('patient'), debut, fin,
+            statut=request.query_params.get('statut'),
+            praticien_id=request.query_params.get('praticien'),
+        ).order_by('date_heure')
+        return Response({
+            'vue': request.query_params.get('vue', 'jour'),
+            'debut': debut,
+            'fin': fin,
+            'rendez_vous': self.get_serializer(queryset, many=True).data,
+        })
+
+class AlerteViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.UpdateModelMixin,
+                    viewsets.GenericViewSet):
+    """
+    File des alertes produites par le moteur de triage (medical_data/alertes.py).
+    Par défaut : alertes nouvelles, les plus récentes d'abord.
+    ?statut=N|T&niveau=C|A&patient_id=<id> ; PATCH {"statut": "T"} pour marquer une alerte traitée.
+    """
+    serializer_class = AlerteSerializer
+    permission_classes = [IsPersonnel]
+    pagination_class = AlerteCursorPagination
+    http_method_names = ['get', 'patch', 'head', 'options']
+
+    def get_queryset(self):
+        queryset = Alerte.objects.select_related('patient')
+        params = self.request.query_params
+        queryset = queryset.filter(statut=params.get('statut', 'N'))
+        if params.get('niveau'):
+            queryset = queryset.filter(niveau=params['niveau'])
+        if params.get('patient_id'):
+            queryset = queryset.filter(patient_id=params['patient_id'])
+        return queryset
+
+    def get_object(self):
+        # Une alerte traitée reste accessible par son id, quel que soit le filtre de statut
+        alerte = generics.get_object_or_404(Alerte.objects.select_related('patient'), pk=self.kwargs['pk'])
+        self.check_object_permissions(self.request, alerte)
+        return alerte
+
+    def perform_update(self, serializer):
+        traitee = serializer.validated_data.get('statut') == 'T'
+        serializer.save(
+            traitee_par=self.request.user if traitee else None,
+            date_traitement=timezone.now() if traitee else None,
+        )
+
+
 class CustomAuthToken(ObtainAuthToken):
     """
     Vue personnalisée pour retourner le Token et les données utilisateur lors de la connexion.
@@ -220,39 +630,20 @@ class GlobalStatsView(APIView):
 
     def get(self, request, format=None):
         try:
-            # 1. Patients
-            total_patients = Patient.objects.filter(is_personnel=False).count() 
-
-            # 2. Rendez-vous (Logique RendezVous déjà corrigée)
-            today = timezone.now().date()
-            start_of_week = today - timedelta(days=today.weekday())
-            
-            rdv_this_week = RendezVous.objects.filter(
-                date_heure__date__gte=start_of_week, 
-                date_heure__date__lte=start_of_week + timedelta(days=6)
-            ).count()
-
-            # 3. Suivis (dernier mois)
-            one_month_ago = timezone.now() - timedelta(days=30)
-            suivis_last_month = Suivi.objects.filter(
-                date_suivi__gte=one_month_ago
-            ).count()
+            # Compteurs servis depuis le cache, tenus à jour par les signaux
+            # (recalcul complet au plus tous les STATS_FRAICHEUR_SECONDES, voir medical_data/stats.py)
+            valeurs = stats.stats_globales()
 
             # 🚨 CORRECTION DÉFINITIVE : Suppression de la requête 'statut' 🚨
             suivi_status_counts = [] # Retourne une liste vide au lieu de planter
-            
-            #4. Compte des relevés actifs (utilisant le nouveau modèle ReleveVital)
-            # Ajout d'une stat pour suivre les patients actifs 
-            patients_actifs_30j = ReleveVital.objects.filter(
-                date_releve__gte=timezone.now() - timezone.timedelta(days=30)
-            ).values('patient').annotate(num_releves=Count('patient')).count()
 
             return Response({
-                'total_patients': total_patients,
-                'rdv_this_week': rdv_this_week,
-                'suivis_last_month': suivis_last_month,
+                'total_patients': valeurs['total_patients'],
+                'rdv_this_week': valeurs['rdv_this_week'],
+                'suivis_last_month': valeurs['suivis_last_month'],
                 'suivi_status_counts': suivi_status_counts, # Donnée safe
-                'patients_suivi_actif_30j': patients_actifs_30j,
+                'patients_suivi_actif_30j': valeurs['patients_suivi_actif_30j'],
+                'as_of': valeurs['as_of'],
             })
         except Exception as e:
         # Ceci garantit qu'une réponse JSON d'erreur est toujours envoyée en cas de crash
@@ -260,4 +651,72 @@ class GlobalStatsView(APIView):
             return Response(
                 {"error": f"Erreur interne lors de la récupération des statistiques. Détail: {str(e)}"}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+class StatsSeriesView(APIView):
+    """
+    Séries temporelles pour les graphiques du tableau de bord.
+    ?periode=jour|semaine|mois&debut=AAAA-MM-JJ&fin=AAAA-MM-JJ&metriques=suivis,rendez_vous
+    """
+    permission_classes = [IsAuthenticated]
+
+    # Plage par défaut et plage maximale selon la granularité
+    PLAGES_DEFAUT = {'jour': timedelta(days=30), 'semaine': timedelta(weeks=12), 'mois': timedelta(days=365)}
+    PLAGES_MAX = {'jour': timedelta(days=366), 'semaine': timedelta(weeks=156), 'mois': timedelta(days=3653)}
+
+    def get(self, request, format=None):
+        periode = request.query_params.get('periode', 'jour')
+        if periode not in analytique.PERIODES:
+            return Response({'details': f"Période inconnue : {periode}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        metriques = request.query_params.get('metriques')
+        metriques = metriques.split(',') if metriques else analytique.METRIQUES
+        inconnues = [m for m in metriques if m not in analytique.METRIQUES]
+        if inconnues:
+            return Response({'details': f"Métriques inconnues : {', '.join(inconnues)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        params = request.query_params
+        try:
+            # parse_date : None si le format ne correspond pas, ValueError si la date n'existe pas
+            fin = parse_date(params['fin']) if 'fin' in params else timezone.localdate()
+            if fin is None:
+                raise ValueError
+            debut = parse_date(params['debut']) if 'debut' in params else fin - self.PLAGES_DEFAUT[periode]
+            if debut is None or debut > fin:
+                raise ValueError
+        except ValueError:
+            return Response({'details': "Dates invalides (format AAAA-MM-JJ, debut <= fin)."}, status=status.HTTP_400_BAD_REQUEST)
+        if fin - debut > self.PLAGES_MAX[periode]:
+            return Response(
+                {'details': f"Plage trop longue : {self.PLAGES_MAX[periode].days} jours au maximum par {periode}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            return Response(analytique.series(periode, debut, fin, metriques))
+        except ValueError as e:
+            return Response({'details': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class CohortesView(APIView):
+    """
+    Distributions des relevés par cohorte (rapports qualité), servies depuis le cache.
+    ?groupe=groupe_sanguin|tranche_age|aucun&jours=90
+    """
+    permission_classes = [IsPersonnel]
+
+    def get(self, request, format=None):
+        groupe = request.query_params.get('groupe', 'groupe_sanguin')
+        if groupe not in cohortes.GROUPES:
+            return Response({'details': f"Groupe inconnu : {groupe}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            jours = int(request.query_params.get('jours', cohortes.JOURS_DEFAUT))
+        except ValueError:
+            jours = 0
+        if not 1 <= jours <= cohortes.JOURS_MAX:
+            return Response(
+                {'details': f"'jours' doit être compris entre 1 et {cohortes.JOURS_MAX}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(cohortes.rapport(groupe, jours))
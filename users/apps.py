@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        # Table FTS5 (SQLite) ou index trigramme (PostgreSQL) de la recherche de patients
+        from django.db.models.signals import post_migrate
+        from . import recherche
+        post_migrate.connect(recherche.installer, sender=self)
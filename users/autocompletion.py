@@ -0,0 +1,209 @@
+"""
+Index de préfixes en mémoire pour l'autocomplétion de l'accueil (une frappe = une requête).
+
+Chaque processus garde deux tableaux triés parallèles (clés normalisées, id du patient)
+parcourus par bisect : une suggestion ne touche ni la base ni PatientSerializer.
+Clés d'un patient (normalisation de users/recherche.py) : chaque mot du nom et du prénom,
+« prénom nom » et « nom prénom » entiers, le username sans ponctuation ('pat00012') et les
+chiffres du téléphone, avec et sans indicatif. Seuls les patients (hors personnel) sont indexés.
+
+Tenue à jour :
+- écritures du processus : signaux Patient (medical_data/signals.py) et import en masse ;
+- écritures des autres processus : à la première consultation après
+  settings.AUTOCOMPLETION_PATIENTS_SECONDES, les patients créés depuis sont ajoutés
+  (id supérieur au plus grand id connu), et l'index est reconstruit entièrement toutes
+  les settings.AUTOCOMPLETION_PATIENTS_RECONSTRUCTION secondes (modifications, suppressions),
+  en tâche de fond : les consultations continuent sur l'index courant pendant ce temps.
+Préchauffé au démarrage (centre/wsgi.py), sinon construit à la première consultation.
+"""
+import bisect
+import threading
+import time
+from array import array
+from functools import lru_cache
+
+from django.conf import settings
+
+from users.recherche import chiffres_telephone, normaliser
+
+LIMITE_DEFAUT = 10
+LIMITE_MAX = 50
+
+
+def compacter(texte):
+    """Forme sans séparateurs : 'PAT-00012' -> 'pat00012', '6 90 12' -> '69012'."""
+    return normaliser(texte).replace(' ', '')
+
+
+# Prénoms et noms se répètent beaucoup d'un patient à l'autre : normalisation mémorisée
+_normaliser_nom = lru_cache(maxsize=20000)(normaliser)
+
+
+def cles(prenom, nom, username, telephone):
+    """Clés de préfixe d'un patient."""
+    prenom, nom = _normaliser_nom(prenom), _normaliser_nom(nom)
+    resultat = set(prenom.split()) | set(nom.split())
+    resultat.update(f'{a} {b}' for a, b in [(prenom, nom), (nom, prenom)] if a and b)
+    resultat.add(compacter(username))
+    resultat.update(chiffres_telephone(telephone))
+    resultat.discard('')
+    return resultat
+
+
+class IndexPrefixes:
+
+    CHAMPS = ['id', 'first_name', 'last_name', 'username', 'telephone']
+
+    def __init__(self):
+        self._verrou = threading.Lock()
+        self._cles = []           # clés triées
+        self._ids = array('q')    # id du patient de chaque clé
+        self._patients = {}       # id -> (id, nom, username)
+        self._cles_patient = {}   # id -> clés indexées (pour retirer un patient)
+        self._id_max = 0
+        self._construit = 0.0     # horodatages (time.monotonic) de la dernière reconstruction
+        self._synchronise = 0.0   # lancée et du dernier ajout des nouveaux patients
+        self._journal = None      # écritures reçues pendant une reconstruction, rejouées ensuite
+
+    # ------------------------------------------------------------------
+    # Construction et mises à jour
+    # ------------------------------------------------------------------
+
+    def _lignes(self, **filtres):
+        from users.models import Patient
+
+        return Patient.objects.filter(is_personnel=False, **filtres).values_list(*self.CHAMPS).iterator(chunk_size=5000)
+
+    def construire(self):
+        """Reconstruit l'index depuis la base (tri unique plutôt que des insertions une à une)."""
+        with self._verrou:
+            if self._journal is not None:
+                return  # reconstruction déjà en cours
+            self._journal = []
+        try:
+            self._construire()
+        finally:
+            with self._verrou:
+                self._journal = None
+
+    def _construire(self):
+        paires, patients, cles_patient, id_max = [], {}, {}, 0
+        for pk, prenom, nom, username, telephone in self._lignes():
+            cles_patient[pk] = cles(prenom, nom, username, telephone)
+            patients[pk] = (pk, f'{prenom} {nom}'.strip(), username)
+            paires.extend((cle, pk) for cle in cles_patient[pk])
+            id_max = max(id_max, pk)
+        paires.sort()
+        with self._verrou:
+            self._cles = [cle for cle, _ in paires]
+            self._ids = array('q', (pk for _, pk in paires))
+            self._patients, self._cles_patient, self._id_max = patients, cles_patient, id_max
+            self._construit = self._synchronise = time.monotonic()
+            # Écritures validées pendant la lecture : peut-être absentes de ce qui vient d'être lu
+            for operation, arguments in self._journal:
+                operation(*arguments)
+
+    def _retirer(self, pk):
+        for cle in self._cles_patient.pop(pk, ()):
+            i = bisect.bisect_left(self._cles, cle)
+            while i < len(self._cles) and self._cles[i] == cle:
+                if self._ids[i] == pk:
+                    del self._cles[i]
+                    del self._ids[i]
+                    break
+                i += 1
+        self._patients.pop(pk, None)
+
+    def _inserer(self, pk, prenom, nom, username, telephone):
+        self._retirer(pk)
+        self._cles_patient[pk] = cles(prenom, nom, username, telephone)
+        self._patients[pk] = (pk, f'{prenom} {nom}'.strip(), username)
+        for cle in self._cles_patient[pk]:
+            i = bisect.bisect_left(self._cles, cle)
+            self._cles.insert(i, cle)
+            self._ids.insert(i, pk)
+        self._id_max = max(self._id_max, pk)
+
+    def mettre_a_jour(self, patients):
+        """(Ré)indexe des instances Patient ; un membre du personnel est retiré."""
+        if not self._construit and self._journal is None:
+            return  # pas encore construit : la construction lira l'état courant
+        with self._verrou:
+            for patient in patients:
+                if patient.is_personnel:
+                    self._appliquer(self._retirer, patient.pk)
+                else:
+                    self._appliquer(self._inserer, *(getattr(patient, champ) for champ in self.CHAMPS))
+
+    def retirer(self, ids):
+        with self._verrou:
+            for pk in ids:
+                self._appliquer(self._retirer, pk)
+
+    def _appliquer(self, operation, *arguments):
+        # Sous le verrou
+        operation(*arguments)
+        if self._journal is not None:
+            self._journal.append((operation, arguments))
+
+    def synchroniser(self):
+        """Rattrape les écritures des autres processus selon l'âge de l'index."""
+        maintenant = time.monotonic()
+        reconstruction = settings.AUTOCOMPLETION_PATIENTS_RECONSTRUCTION
+        if not self._construit:
+            self.construire()
+        elif maintenant - self._construit >= reconstruction:
+            with self._verrou:
+                lancer = self._journal is None and maintenant - self._construit >= reconstruction
+                if lancer:
+                    # Tentative datée dès le lancement : un échec n'en relance pas une à chaque frappe
+                    self._construit = maintenant
+            if lancer:
+                threading.Thread(target=self._reconstruire_en_fond, daemon=True).start()
+        elif maintenant - self._synchronise >= settings.AUTOCOMPLETION_PATIENTS_SECONDES:
+            nouveaux = list(self._lignes(id__gt=self._id_max))
+            with self._verrou:
+                for ligne in nouveaux:
+                    self._appliquer(self._inserer, *ligne)
+                self._synchronise = maintenant
+
+    def _reconstruire_en_fond(self):
+        from django.db import connection
+
+        try:
+            self.construire()
+        finally:
+            connection.close()  # connexion propre à ce thread
+
+    # ------------------------------------------------------------------
+    # Consultation
+    # ------------------------------------------------------------------
+
+    def suggerer(self, requete, limite=LIMITE_DEFAUT):
+        """
+        Patients dont une clé commence par `requete` (normalisée, puis sans séparateurs) :
+        [(id, nom, username)], par ordre des clés.
+        """
+        self.synchroniser()
+        prefixes = list(dict.fromkeys(p for p in (normaliser(requete), compacter(requete)) if p))
+        resultats = {}
+        with self._verrou:
+            for prefixe in prefixes:
+                i = bisect.bisect_left(self._cles, prefixe)
+                while i < len(self._cles) and len(resultats) < limite and self._cles[i].startswith(prefixe):
+                    pk = self._ids[i]
+                    resultats.setdefault(pk, self._patients[pk])
+                    i += 1
+        return list(resultats.values())
+
+
+index = IndexPrefixes()
+
+
+def prechauffer():
+    """Construit l'index au démarrage du processus (centre/wsgi.py)."""
+    index.construire()
+
+
+def suggerer(requete, limite=LIMITE_DEFAUT):
+    return index.suggerer(requete, limite)
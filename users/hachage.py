@@ -0,0 +1,83 @@
+"""
+Service de hachage des mots de passe générés pour les patients.
+
+Le PBKDF2 de make_password est volontairement coûteux en CPU : pour les
+créations en masse (import), les hachages sont répartis sur un pool de
+processus afin d'utiliser tous les cœurs au lieu d'un seul worker.
+
+Hachage différé : avec `iterations` réduit, le hash PBKDF2 est moins coûteux
+à produire. Django le met à niveau automatiquement à la première connexion
+(check_password détecte que le nombre d'itérations diffère de celui du hasher
+et ré-enregistre le mot de passe avec les paramètres courants).
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+
+# En dessous de ce nombre de mots de passe, le pool coûte plus qu'il ne rapporte
+SEUIL_POOL = 8
+
+
+def _initialiser_processus():
+    """Configure Django dans les processus du pool (nécessaire en mode 'spawn')."""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def hacher(mot_de_passe, iterations=None):
+    """Hache un mot de passe ; `iterations` réduit produit un hash à mettre à niveau à la connexion."""
+    if iterations is None:
+        return make_password(mot_de_passe)
+    hasher = PBKDF2PasswordHasher()
+    return hasher.encode(mot_de_passe, hasher.salt(), iterations=iterations)
+
+
+def _hacher_tranche(mots_de_passe, iterations):
+    return [hacher(m, iterations) for m in mots_de_passe]
+
+
+class ServiceHachage:
+    """
+    Hache des lots de mots de passe, en série ou dans un pool de processus.
+    Le pool est créé au premier lot et réutilisé jusqu'à fermer() (ou la sortie du `with`).
+    """
+
+    def __init__(self, processus=None, differe=False):
+        if processus is None:
+            processus = getattr(settings, 'HACHAGE_PROCESSUS', None) or os.cpu_count() or 1
+        self.processus = max(1, processus)
+        self.iterations = getattr(settings, 'HACHAGE_ITERATIONS_DIFFEREES', 1000) if differe else None
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def fermer(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def hacher_lot(self, mots_de_passe):
+        """Retourne les hashes dans l'ordre des mots de passe fournis."""
+        mots_de_passe = list(mots_de_passe)
+        if self.processus == 1 or len(mots_de_passe) < SEUIL_POOL:
+            return _hacher_tranche(mots_de_passe, self.iterations)
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.processus, initializer=_initialiser_processus)
+
+        # Une tranche par processus : limite les allers-retours (pickle) entre processus
+        taille = -(-len(mots_de_passe) // self.processus)
+        tranches = [mots_de_passe[i:i + taille] for i in range(0, len(mots_de_passe), taille)]
+        hashes = []
+        for resultat in self._pool.map(_hacher_tranche, tranches, [self.iterations] * len(tranches)):
+            hashes.extend(resultat)
+        return hashes
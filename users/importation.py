@@ -0,0 +1,281 @@
+"""
+Import en masse de patients (CSV ou NDJSON).
+
+Contrairement à PatientCreateSerializer.create (INSERT + UPDATE du username
++ INSERT DetailsPatient par patient), les lignes sont traitées par lots :
+les identifiants (id, username PAT-XXXXX, numero_patient) sont réservés
+à l'avance, puis Patient et DetailsPatient sont insérés avec bulk_create.
+Le fichier est lu ligne par ligne, il n'est jamais chargé entièrement en mémoire ;
+les identifiants générés sont transmis lot par lot à l'appelant (`identifiants`),
+jamais conservés dans le rapport.
+"""
+import csv
+import io
+import json
+import time
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Max
+
+from medical_data import stats
+from users import autocompletion, recherche
+from users.hachage import ServiceHachage
+from users.models import Patient, DetailsPatient
+from users.api.serializers import RELATION_CHOIX
+
+# Colonnes acceptées dans le fichier (les autres sont ignorées)
+CHAMPS_PATIENT = [
+    'first_name', 'last_name', 'email', 'adresse', 'date_naissance',
+    'telephone', 'numero_urgence', 'groupe_sanguin', 'numero_patient',
+]
+CHAMPS_DETAILS = [
+    'taille_cm', 'antecedents_medicaux', 'allergies',
+    'contact_urgence_nom', 'contact_urgence_telephone', 'contact_urgence_lien',
+]
+
+TAILLE_LOT_DEFAUT = 500
+
+
+class RapportImport:
+    """Compteurs et erreurs d'un import, mis à jour au fil des lots."""
+
+    def __init__(self, max_erreurs=1000):
+        self.lignes_lues = 0
+        self.patients_crees = 0
+        self.nb_erreurs = 0
+        self.erreurs = []  # [(numéro de ligne, {champ: [messages]})], tronquée à max_erreurs
+        self.max_erreurs = max_erreurs
+        self.debut = time.monotonic()
+        self.fin = None
+
+    def ajouter_erreur(self, numero_ligne, erreurs):
+        self.nb_erreurs += 1
+        if len(self.erreurs) < self.max_erreurs:
+            self.erreurs.append((numero_ligne, erreurs))
+
+    @property
+    def duree(self):
+        return (self.fin or time.monotonic()) - self.debut
+
+    @property
+    def debit(self):
+        """Patients créés par seconde."""
+        duree = self.duree
+        return self.patients_crees / duree if duree > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            'lignes_lues': self.lignes_lues,
+            'patients_crees': self.patients_crees,
+            'nb_erreurs': self.nb_erreurs,
+            'erreurs': [{'ligne': ligne, 'erreurs': erreurs} for ligne, erreurs in self.erreurs],
+            'duree_s': round(self.duree, 3),
+            'debit_par_s': round(self.debit, 1),
+        }
+
+
+# ----------------------------------------------------------------------
+# LECTURE EN FLUX
+# ----------------------------------------------------------------------
+
+def lire_lignes(flux_texte, format_fichier='csv'):
+    """
+    Itère sur (numéro de ligne, dict) sans charger le fichier.
+    Une ligne NDJSON invalide est renvoyée comme une exception ValueError (gérée par l'import).
+    """
+    if format_fichier == 'csv':
+        lecteur = csv.DictReader(flux_texte)
+        for ligne in lecteur:
+            yield lecteur.line_num, ligne
+    elif format_fichier == 'ndjson':
+        for numero, brut in enumerate(flux_texte, start=1):
+            brut = brut.strip()
+            if not brut:
+                continue
+            try:
+                ligne = json.loads(brut)
+                if not isinstance(ligne, dict):
+                    raise ValueError("Objet JSON attendu.")
+            except ValueError as e:
+                yield numero, e
+                continue
+            yield numero, ligne
+    else:
+        raise ValueError(f"Format d'import inconnu : {format_fichier}")
+
+
+def ouvrir_texte(flux_binaire, encoding='utf-8-sig'):
+    """Enveloppe un fichier binaire (upload, fichier disque) en flux texte ligne à ligne."""
+    return io.TextIOWrapper(flux_binaire, encoding=encoding, newline='')
+
+
+def deviner_format(nom_fichier):
+    return 'ndjson' if nom_fichier.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+# ----------------------------------------------------------------------
+# VALIDATION D'UNE LIGNE
+# ----------------------------------------------------------------------
+
+def _nettoyer(modele, donnees):
+    """Chaînes vides -> None pour les champs nullables, espaces supprimés."""
+    propres = {}
+    for nom, valeur in donnees.items():
+        if isinstance(valeur, str):
+            valeur = valeur.strip()
+            if valeur == '' and modele._meta.get_field(nom).null:
+                valeur = None
+        propres[nom] = valeur
+    return propres
+
+
+def _preparer_ligne(ligne):
+    """
+    Construit (Patient, DetailsPatient) non sauvegardés à partir d'une ligne du fichier.
+    Lève ValidationError. Aucune requête SQL ici : l'unicité est vérifiée par lot.
+    """
+    donnees_patient = _nettoyer(Patient, {c: ligne[c] for c in CHAMPS_PATIENT if ligne.get(c) is not None})
+    donnees_details = _nettoyer(DetailsPatient, {c: ligne[c] for c in CHAMPS_DETAILS if ligne.get(c) is not None})
+
+    # Même règles que PatientCreateSerializer.create
+    if donnees_details.get('contact_urgence_telephone'):
+        donnees_patient['numero_urgence'] = donnees_details['contact_urgence_telephone']
+    lien = donnees_details.get('contact_urgence_lien')
+    if lien and lien not in dict(DetailsPatient.RELATION_CHOIX):
+        donnees_details['contact_urgence_lien'] = RELATION_CHOIX.get(lien, 'AU')
+    elif not lien:
+        donnees_details.pop('contact_urgence_lien', None)
+
+    if not donnees_patient.get('numero_patient'):
+        donnees_patient['numero_patient'] = str(uuid.uuid4())
+
+    patient = Patient(**donnees_patient)
+    details = DetailsPatient(**donnees_details)
+
+    erreurs = {}
+    try:
+        patient.clean_fields(exclude=['password', 'username'])
+    except ValidationError as e:
+        erreurs.update(e.message_dict)
+    try:
+        details.clean_fields(exclude=['patient'])
+    except ValidationError as e:
+        erreurs.update(e.message_dict)
+    if erreurs:
+        raise ValidationError(erreurs)
+    return patient, details
+
+
+# ----------------------------------------------------------------------
+# RÉSERVATION DES IDENTIFIANTS
+# ----------------------------------------------------------------------
+
+def _reserver_ids(nombre):
+    """
+    Réserve `nombre` clés primaires Patient consécutives ou non.
+    PostgreSQL : valeurs tirées de la séquence (sûr en concurrence).
+    Autres moteurs (SQLite) : à partir de MAX(id), dans la transaction du lot.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                [Patient._meta.db_table, nombre],
+            )
+            return [row[0] for row in cursor.fetchall()]
+    dernier = Patient.objects.aggregate(m=Max('id'))['m'] or 0
+    return list(range(dernier + 1, dernier + 1 + nombre))
+
+
+# ----------------------------------------------------------------------
+# IMPORT
+# ----------------------------------------------------------------------
+
+def _inserer_lot(lot, rapport, hachage, identifiants=None):
+    """
+    Insère un lot de (numéro de ligne, Patient, DetailsPatient) déjà validés.
+    Si la base refuse le lot (IntegrityError : insertion concurrente, clé réservée
+    par un autre import sur SQLite...), ses lignes sont comptées en erreur et l'import continue.
+    """
+    numeros = [p.numero_patient for _, p, _ in lot]
+    retenus = []
+    try:
+        with transaction.atomic():
+            existants = set(
+                Patient.objects.filter(numero_patient__in=numeros).values_list('numero_patient', flat=True)
+            )
+            vus = set()
+            for numero_ligne, patient, details in lot:
+                if patient.numero_patient in existants or patient.numero_patient in vus:
+                    rapport.ajouter_erreur(numero_ligne, {'numero_patient': ["Ce numéro de patient existe déjà."]})
+                    continue
+                vus.add(patient.numero_patient)
+                retenus.append((numero_ligne, patient, details))
+
+            if not retenus:
+                return
+
+            mots_de_passe = [patient.generate_simple_password(length=7) for _, patient, _ in retenus]
+            hashes = hachage.hacher_lot(mots_de_passe)
+
+            for (_, patient, details), pk, hash_ in zip(retenus, _reserver_ids(len(retenus)), hashes):
+                patient.pk = pk
+                patient.username = f"PAT-{pk:05d}"
+                patient.index_recherche = recherche.document(patient)
+                patient.password = hash_
+                details.patient_id = pk
+
+            Patient.objects.bulk_create([p for _, p, _ in retenus])
+            DetailsPatient.objects.bulk_create([d for _, _, d in retenus])
+            # bulk_create ne déclenche pas les signaux : mise à jour explicite des compteurs
+            stats.ajuster('total_patients', len(retenus))
+            # ... et de l'index d'autocomplétion de ce processus
+            nouveaux = [p for _, p, _ in retenus]
+            transaction.on_commit(lambda: autocompletion.index.mettre_a_jour(nouveaux))
+    except IntegrityError as e:
+        for numero_ligne, _, _ in retenus:
+            rapport.ajouter_erreur(numero_ligne, {'lot': [f"Lot rejeté par la base de données : {e}"]})
+        return
+
+    rapport.patients_crees += len(retenus)
+    if identifiants is not None:
+        identifiants([(patient.username, mot_de_passe) for (_, patient, _), mot_de_passe in zip(retenus, mots_de_passe)])
+
+
+def importer_patients(lignes, taille_lot=TAILLE_LOT_DEFAUT, rapport=None, progression=None, hachage=None,
+                      identifiants=None):
+    """
+    Importe les patients fournis par `lignes` (voir lire_lignes) par lots de `taille_lot`.
+    `progression(rapport)` est appelé après chaque lot. Retourne le RapportImport.
+    `hachage` : ServiceHachage à utiliser (par défaut : pool selon settings.HACHAGE_PROCESSUS).
+    `identifiants(paires)` reçoit les (username, mot de passe en clair) de chaque lot inséré.
+    """
+    rapport = rapport or RapportImport()
+    if hachage is None:
+        with ServiceHachage() as hachage:
+            return importer_patients(lignes, taille_lot, rapport, progression, hachage, identifiants)
+    lot = []
+    for numero_ligne, ligne in lignes:
+        rapport.lignes_lues += 1
+        if isinstance(ligne, Exception):
+            rapport.ajouter_erreur(numero_ligne, {'ligne': [str(ligne)]})
+            continue
+        try:
+            patient, details = _preparer_ligne(ligne)
+        except ValidationError as e:
+            rapport.ajouter_erreur(numero_ligne, e.message_dict)
+            continue
+        lot.append((numero_ligne, patient, details))
+        if len(lot) >= taille_lot:
+            _inserer_lot(lot, rapport, hachage, identifiants)
+            lot = []
+            if progression:
+                progression(rapport)
+    if lot:
+        _inserer_lot(lot, rapport, hachage, identifiants)
+        if progression:
+            progression(rapport)
+    rapport.fin = time.monotonic()
+    return rapport
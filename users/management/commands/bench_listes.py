@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.settings import api_settings
+
+from medical_data.models import RendezVous
+from users.api.rapide import lecture
+from users.api.serializers import FollowUpSerializer, PatientSerializer, RendezVousSerializer
+from users.api.views import PatientViewSet, SuiviViewSet
+
+LISTES = {
+    'patients': (lambda: PatientViewSet.queryset.all(), PatientSerializer),
+    'suivis': (lambda: SuiviViewSet.queryset.all(), FollowUpSerializer),
+    'rendez-vous': (lambda: RendezVous.objects.select_related('patient').order_by('date_heure'), RendezVousSerializer),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare, sur les données de la base, la sérialisation DRF et la lecture rapide "
+        "(users/api/rapide.py) des listes de l'API : durées et identité du JSON produit."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lignes', type=int, default=10000, help="Lignes sérialisées par liste.")
+        parser.add_argument('--repetitions', type=int, default=3, help="Meilleure durée sur n essais.")
+        parser.add_argument('--liste', choices=list(LISTES), action='append', help="Par défaut : toutes.")
+
+    def mesurer(self, fonction, repetitions):
+        meilleure, resultat = None, None
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            resultat = fonction()
+            duree = time.perf_counter() - debut
+            meilleure = duree if meilleure is None else min(meilleure, duree)
+        return meilleure, resultat
+
+    def handle(self, *args, **options):
+        lignes, repetitions = options['lignes'], max(1, options['repetitions'])
+        rendu = api_settings.DEFAULT_RENDERER_CLASSES[0]().render  # rendu JSON de l'API
+        differences = []
+
+        for nom in options['liste'] or list(LISTES):
+            queryset, serializer_class = LISTES[nom]
+            plan = lecture(serializer_class)
+
+            duree_drf, json_drf = self.mesurer(
+                lambda: rendu(serializer_class(list(queryset()[:lignes]), many=True).data), repetitions,
+            )
+            duree_rapide, json_rapide = self.mesurer(
+                lambda: rendu(plan.convertir(plan.lignes(queryset())[:lignes])), repetitions,
+            )
+
+            identique = json_drf == json_rapide
+            if not identique:
+                differences.append(nom)
+            nombre = json_drf.count(b'"id":')
+            self.stdout.write(
+                f"{nom:<12} {nombre:>6} lignes  DRF {duree_drf * 1000:8.1f} ms  "
+                f"rapide {duree_rapide * 1000:8.1f} ms  x{duree_drf / duree_rapide:4.1f}  "
+                f"{len(json_drf)} octets  {'identique' if identique else 'DIFFÉRENT'}"
+            )
+
+        if differences:
+            raise CommandError(f"JSON différent entre les deux chemins : {', '.join(differences)}")
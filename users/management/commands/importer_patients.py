@@ -0,0 +1,75 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.hachage import ServiceHachage
+from users.importation import (
+    TAILLE_LOT_DEFAUT, deviner_format, importer_patients, lire_lignes, ouvrir_texte,
+)
+
+
+class Command(BaseCommand):
+    help = "Importe en masse des patients depuis un fichier CSV ou NDJSON (par lots, en flux)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help="Chemin du fichier CSV ou NDJSON.")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="Par défaut : déduit de l'extension.")
+        parser.add_argument('--taille-lot', type=int, default=TAILLE_LOT_DEFAUT)
+        parser.add_argument(
+            '--processus', type=int,
+            help="Processus de hachage des mots de passe (défaut : settings.HACHAGE_PROCESSUS ou nombre de cœurs).",
+        )
+        parser.add_argument(
+            '--hachage-differe', action='store_true',
+            help="Hash PBKDF2 allégé, remis à niveau automatiquement à la première connexion du patient.",
+        )
+        parser.add_argument(
+            '--identifiants',
+            help="Fichier CSV où écrire les identifiants générés (username, mot de passe en clair).",
+        )
+
+    def handle(self, *args, **options):
+        format_fichier = options['format'] or deviner_format(options['fichier'])
+
+        def progression(rapport):
+            self.stdout.write(
+                f"{rapport.lignes_lues} lignes lues, {rapport.patients_crees} patients créés, "
+                f"{rapport.nb_erreurs} erreurs ({rapport.debit:.0f} patients/s)"
+            )
+
+        try:
+            flux = open(options['fichier'], 'rb')
+        except OSError as e:
+            raise CommandError(f"Impossible d'ouvrir le fichier : {e}")
+
+        # Identifiants écrits lot par lot : rien n'est conservé en mémoire
+        sortie = open(options['identifiants'], 'w', newline='', encoding='utf-8') if options['identifiants'] else None
+        ecrire_identifiants = None
+        if sortie is not None:
+            ecrivain = csv.writer(sortie)
+            ecrivain.writerow(['username', 'mot_de_passe_clair'])
+            ecrire_identifiants = ecrivain.writerows
+
+        hachage = ServiceHachage(processus=options['processus'], differe=options['hachage_differe'])
+        try:
+            with flux, hachage:
+                rapport = importer_patients(
+                    lire_lignes(ouvrir_texte(flux), format_fichier),
+                    taille_lot=options['taille_lot'],
+                    progression=progression,
+                    hachage=hachage,
+                    identifiants=ecrire_identifiants,
+                )
+        finally:
+            if sortie is not None:
+                sortie.close()
+
+        for numero_ligne, erreurs in rapport.erreurs:
+            self.stderr.write(f"Ligne {numero_ligne} : {erreurs}")
+        if rapport.nb_erreurs > len(rapport.erreurs):
+            self.stderr.write(f"... {rapport.nb_erreurs - len(rapport.erreurs)} autres erreurs non affichées.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Import terminé : {rapport.patients_crees} patients créés sur {rapport.lignes_lues} lignes "
+            f"en {rapport.duree:.1f} s ({rapport.debit:.0f} patients/s), {rapport.nb_erreurs} erreurs."
+        ))
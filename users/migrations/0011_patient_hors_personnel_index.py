@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0010_alter_patient_email'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(condition=models.Q(('is_personnel', False)), fields=['id'], name='patient_hors_personnel_idx'),
+        ),
+    ]
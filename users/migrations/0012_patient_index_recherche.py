@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:48
+
+from django.db import migrations, models
+
+TAILLE_LOT = 1000
+
+
+def remplir_index_recherche(apps, schema_editor):
+    # Documents des patients existants ; la table FTS5 / l'index trigramme sont
+    # créés ensuite par users.recherche.installer (post_migrate)
+    from users.recherche import document
+
+    Patient = apps.get_model('users', 'Patient')
+    lot = []
+    for patient in Patient.objects.only('id', 'username', 'first_name', 'last_name', 'telephone').iterator(chunk_size=TAILLE_LOT):
+        patient.index_recherche = document(patient)
+        lot.append(patient)
+        if len(lot) >= TAILLE_LOT:
+            Patient.objects.bulk_update(lot, ['index_recherche'])
+            lot = []
+    Patient.objects.bulk_update(lot, ['index_recherche'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_patient_hors_personnel_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='index_recherche',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(remplir_index_recherche, migrations.RunPython.noop),
+    ]
@@ -6,6 +6,8 @@ import random
 import string
 import uuid
 
+from users import recherche
+
 class Patient(AbstractUser):
     
     # Gestionnaire d'utilisateurs
@@ -53,6 +55,9 @@ class Patient(AbstractUser):
     # Indicateur pour différencier le personnel des patients si nécessaire
     is_personnel = models.BooleanField(default=False)
 
+    # Document de recherche normalisé (users/recherche.py), recalculé à chaque enregistrement
+    index_recherche = models.TextField(blank=True, default='', editable=False)
+
     def generate_simple_password(self, length=7):
         # On utilise des lettres minuscules et des chiffres
         characters = string.ascii_lowercase + string.digits
@@ -64,13 +69,20 @@ class Patient(AbstractUser):
         # Flag pour savoir si c'est une nouvelle création (pas encore d'ID)
         is_new = not self.pk
         
-        # 1. GESTION DU MOT DE PASSE (Seulement lors de la création ou si non haché)
-        if is_new or not self.password.startswith(('pbkdf2', 'bcrypt')):
+        # 1. GESTION DU MOT DE PASSE (Seulement si aucun hash n'est fourni)
+        # Un hash déjà calculé (set_password, import, ServiceHachage) est conservé tel quel.
+        if not self.password or not self.password.startswith(('pbkdf2', 'bcrypt')):
             # Génère et stocke le mot de passe en clair (pour l'affichage client)
             self.mot_de_passe_clair = self.generate_simple_password(length=7) 
             # Hache le mot de passe avant de le stocker
             self.password = make_password(self.mot_de_passe_clair)
             
+        # Document de recherche : suit toute modification d'un champ indexé
+        self.index_recherche = recherche.document(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(recherche.CHAMPS):
+            kwargs['update_fields'] = {*update_fields, 'index_recherche'}
+
         # 2. PREMIÈRE SAUVEGARDE (Crée l'ID self.pk)
         super().save(*args, **kwargs)
 
@@ -82,15 +94,23 @@ class Patient(AbstractUser):
             # Vérifie si le username généré est différent de l'actuel
             if self.username != new_username:
                 self.username = new_username
+                self.index_recherche = recherche.document(self)
                 # ⚠️ Deuxième sauvegarde pour mettre à jour le username
                 kwargs.pop('force_insert', None)
                 kwargs.pop('force_update', None)
-                super().save(update_fields=['username'], *args, **kwargs)
+                kwargs.pop('update_fields', None)
+                super().save(update_fields=['username', 'index_recherche'], *args, **kwargs)
 
 
     class Meta:
         verbose_name = 'Patient'
         verbose_name_plural = 'Patients'
+        # Listes de patients triées par id, hors personnel (API paginée, cohortes).
+        # Index partiel : le filtre is_personnel=False s'écrit NOT is_personnel en SQL,
+        # condition qu'un index composite (is_personnel, id) ne sait pas servir sous SQLite.
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(is_personnel=False), name='patient_hors_personnel_idx'),
+        ]
 
     def __str__(self):
         # Affiche le nom, prénom et numéro de patient
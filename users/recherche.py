@@ -0,0 +1,189 @@
+"""
+Recherche dans l'annuaire des patients (accueil : nom, prénom, username, téléphone).
+
+Chaque patient porte un document de recherche normalisé (Patient.index_recherche :
+minuscules, sans accents, téléphones réduits à leurs chiffres), recalculé à chaque
+enregistrement. Le backend est choisi selon la base (settings.RECHERCHE_PATIENTS_BACKEND,
+'auto' par défaut) :
+- 'fts5' (SQLite) : table virtuelle FTS5 à tokenizer trigramme, synchronisée par
+  triggers sur users_patient ; recherche de sous-chaînes indexée, classement bm25 ;
+- 'trigrammes' (PostgreSQL) : index GIN pg_trgm sur index_recherche, classement par similarité ;
+- 'simple' : LIKE sur index_recherche, sans classement (autres bases, termes trop courts).
+Le contrat de ?search= est conservé : chaque terme doit apparaître dans l'un des champs,
+et tous les patients correspondants sont accessibles, page après page. Le backend annote
+chaque patient de son rang dans la requête SQL elle-même ; la page est lue par keyset sur
+(rang, id) avec un LIMIT (PatientCursorPagination), sans charger la liste des résultats.
+"""
+import re
+import sqlite3
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+
+CHAMPS = ['username', 'first_name', 'last_name', 'telephone']
+INDICATIF = '237'
+LONGUEUR_TRIGRAMME = 3
+
+
+# ----------------------------------------------------------------------
+# NORMALISATION
+# ----------------------------------------------------------------------
+
+def normaliser(texte):
+    """Minuscules, sans accents ni ponctuation : 'Émilie-Noëlle' -> 'emilie noelle'."""
+    texte = unicodedata.normalize('NFKD', str(texte or ''))
+    texte = ''.join(c for c in texte if not unicodedata.combining(c)).lower()
+    return ' '.join(re.findall(r'[a-z0-9]+', texte))
+
+
+def chiffres_telephone(telephone):
+    """Formes indexées d'un numéro : chiffres seuls, avec et sans indicatif ('+237 6 90..' -> 237690.., 690..)."""
+    chiffres = re.sub(r'\D', '', str(telephone or ''))
+    formes = [chiffres] if chiffres else []
+    if chiffres.startswith(INDICATIF) and len(chiffres) > 9:
+        formes.append(chiffres[len(INDICATIF):])
+    return formes
+
+
+def document(patient):
+    """Document de recherche d'un patient (valeur de Patient.index_recherche)."""
+    parties = [normaliser(getattr(patient, champ)) for champ in CHAMPS]
+    parties.extend(chiffres_telephone(patient.telephone))
+    return ' '.join(partie for partie in parties if partie)
+
+
+def termes(requete):
+    """Termes normalisés d'une recherche ; un terme composé ('jean-paul') donne plusieurs termes."""
+    return [mot for terme in requete for mot in normaliser(terme).split()]
+
+
+# ----------------------------------------------------------------------
+# BACKENDS
+# ----------------------------------------------------------------------
+
+class RechercheSimple:
+    """LIKE '%terme%' sur index_recherche, par ordre d'id (toutes bases)."""
+
+    def installer(self, connexion):
+        pass
+
+    def annoter(self, queryset, mots):
+        """
+        Patients de `queryset` contenant tous les `mots`, annotés de rang_recherche
+        (plus petit = plus pertinent ; ici constant, l'ordre est celui des id).
+        """
+        for mot in mots:
+            queryset = queryset.filter(index_recherche__contains=mot)
+        return queryset.annotate(rang_recherche=Value(0.0, output_field=FloatField()))
+
+
+class RechercheFTS5(RechercheSimple):
+    """SQLite : table FTS5 (tokenizer trigramme) en contenu externe de users_patient."""
+    TABLE = 'users_patient_fts'
+    INSTALLATION = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+        f"index_recherche, content='users_patient', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {TABLE}_ai AFTER INSERT ON users_patient BEGIN "
+        f"INSERT INTO {TABLE}(rowid, index_recherche) VALUES (new.id, new.index_recherche); END",
+        f"CREATE TRIGGER IF NOT EXISTS {TABLE}_ad AFTER DELETE ON users_patient BEGIN "
+        f"INSERT INTO {TABLE}({TABLE}, rowid, index_recherche) VALUES ('delete', old.id, old.index_recherche); END",
+        f"CREATE TRIGGER IF NOT EXISTS {TABLE}_au AFTER UPDATE OF index_recherche ON users_patient BEGIN "
+        f"INSERT INTO {TABLE}({TABLE}, rowid, index_recherche) VALUES ('delete', old.id, old.index_recherche); "
+        f"INSERT INTO {TABLE}(rowid, index_recherche) VALUES (new.id, new.index_recherche); END",
+    ]
+
+    def installer(self, connexion):
+        # Idempotent : aussi rejoué après chaque migrate, car la reconstruction d'une table
+        # par l'éditeur de schéma SQLite (ALTER) supprime les triggers qui y sont attachés
+        with connexion.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s", [f'{self.TABLE}_%'])
+            complet = cursor.fetchone()[0] == 3
+            for instruction in self.INSTALLATION:
+                cursor.execute(instruction)
+            if not complet:
+                cursor.execute(f"INSERT INTO {self.TABLE}({self.TABLE}) VALUES ('rebuild')")
+
+    def annoter(self, queryset, mots):
+        longs = [mot for mot in mots if len(mot) >= LONGUEUR_TRIGRAMME]
+        if not longs:
+            # Le tokenizer trigramme ne sait pas chercher moins de 3 caractères
+            return super().annoter(queryset, mots)
+        requete = ' AND '.join(f'"{mot}"' for mot in longs)
+        queryset = queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {self.TABLE} WHERE {self.TABLE} MATCH %s", [requete])
+        )
+        for mot in mots:
+            if len(mot) < LONGUEUR_TRIGRAMME:
+                queryset = queryset.filter(index_recherche__contains=mot)
+        # Rang bm25 (négatif, plus petit = plus pertinent) lu dans l'index pour chaque ligne retenue
+        return queryset.annotate(rang_recherche=RawSQL(
+            f"SELECT rank FROM {self.TABLE} WHERE {self.TABLE} MATCH %s AND rowid = users_patient.id",
+            [requete], output_field=FloatField(),
+        ))
+
+
+class RechercheTrigrammes(RechercheSimple):
+    """PostgreSQL : index GIN pg_trgm (LIKE '%terme%' indexé), classement par similarité."""
+
+    def installer(self, connexion):
+        with connexion.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS patient_recherche_trgm_idx '
+                'ON users_patient USING gin (index_recherche gin_trgm_ops)'
+            )
+
+    def annoter(self, queryset, mots):
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        for mot in mots:
+            queryset = queryset.filter(index_recherche__contains=mot)
+        return queryset.annotate(rang_recherche=-TrigramSimilarity('index_recherche', ' '.join(mots)))
+
+
+BACKENDS = {
+    'simple': RechercheSimple,
+    'fts5': RechercheFTS5,
+    'trigrammes': RechercheTrigrammes,
+}
+
+
+def backend(connexion=connection):
+    nom = getattr(settings, 'RECHERCHE_PATIENTS_BACKEND', 'auto')
+    if nom == 'auto':
+        if connexion.vendor == 'sqlite' and sqlite3.sqlite_version_info >= (3, 34):
+            nom = 'fts5'  # tokenizer trigramme : SQLite 3.34+
+        elif connexion.vendor == 'postgresql':
+            nom = 'trigrammes'
+        else:
+            nom = 'simple'
+    return BACKENDS[nom]()
+
+
+def installer(sender=None, using='default', **kwargs):
+    """Crée les structures du backend (post_migrate)."""
+    from django.db import connections
+
+    connexion = connections[using]
+    with connexion.cursor() as cursor:
+        colonnes = [c.name for c in connexion.introspection.get_table_description(cursor, 'users_patient')]
+    if 'index_recherche' in colonnes:  # absente si la base a été ramenée avant la migration du champ
+        backend(connexion).installer(connexion)
+
+
+# ----------------------------------------------------------------------
+# FILTRAGE
+# ----------------------------------------------------------------------
+
+def filtrer(queryset, requete):
+    """
+    Patients de `queryset` correspondant aux termes de `requete`, annotés de leur rang
+    (rang_recherche : plus petit = plus pertinent, à départager par l'id).
+    """
+    mots = termes(requete)
+    if not mots:
+        return queryset
+    return backend().annoter(queryset, mots)
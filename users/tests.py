@@ -1,3 +1,799 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import uuid
+import zoneinfo
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password
+from django.core.cache import caches
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from centre import parsers, renderers
+from centre.parsers import ORJSONParser
+from centre.renderers import ORJSONRenderer
+from medical_data.models import Alerte, Suivi, RendezVous, ReleveVital, SeuilsAlerte
+from users import autocompletion, importation, recherche
+from users.api.pagination import BaseCursorPagination
+from users.api.rapide import lecture
+from users.api.serializers import PatientSerializer
+from users.hachage import SEUIL_POOL, ServiceHachage
+from users.importation import RapportImport, deviner_format, importer_patients, lire_lignes, ouvrir_texte
+from users.models import Patient, DetailsPatient
+
+
+# ----------------------------------------------------------------------
+# LISTE DES PATIENTS : DERNIER RELEVÉ PRÉ-CHARGÉ
+# ----------------------------------------------------------------------
+
+@override_settings(API_LISTES_RAPIDES=False)  # chemin du sérialiseur, celui qui lit le Prefetch
+class ListePatientsRequetesTests(TestCase):
+    """Le dernier relevé de chaque patient vient d'une seule requête, quel que soit le nombre de patients."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.personnel = Patient.objects.create(first_name='Dr', last_name='Essomba', telephone='690000100', is_personnel=True)
+        for i in range(6):
+            patient = Patient.objects.create(first_name=f'Patient {i}', telephone=f'69000040{i}')
+            for j in range(i % 3):  # 0, 1 ou 2 relevés
+                ReleveVital.objects.create(patient=patient, tension_systolique=120 + j, tension_diastolique=80 + i)
+
+    def setUp(self):
+        caches['dossiers'].clear()
+        self.api = APIClient()
+        self.api.force_authenticate(self.personnel)
+
+    def lister(self, **params):
+        reponse = self.api.get('/api/v1/patients/', params)
+        self.assertEqual(reponse.status_code, 200)
+        return reponse.json()['results']
+
+    def test_nombre_de_requetes_constant(self):
+        # patients + détails (select_related), puis relevés (Prefetch par fonction fenêtre)
+        with self.assertNumQueries(2):
+            self.lister(page_size=2)
+        with self.assertNumQueries(2):
+            resultats = self.lister()
+        self.assertEqual(len(resultats), 6)
+
+    def test_dernier_releve_de_chaque_patient(self):
+        for resultat in self.lister():
+            patient = Patient.objects.get(pk=resultat['id'])
+            dernier = patient.releves_vitaux.order_by('-date_releve', '-id').first()
+            if dernier is None:
+                self.assertIsNone(resultat['last_vital_signs'])
+            else:
+                self.assertEqual(resultat['last_vital_signs']['tension_systolique'], dernier.tension_systolique)
+
+
+# ----------------------------------------------------------------------
+# PAGINATION PAR CURSEUR (users/api/pagination.py)
+# ----------------------------------------------------------------------
+
+class PaginationCurseurTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.personnel = Patient.objects.create(first_name='Dr', last_name='Essomba', telephone='690000150', is_personnel=True)
+        Patient.objects.bulk_create([
+            Patient(username=f'LOT-{i:05d}', password='!', first_name=f'Patient {i}', telephone=f'69100{i:04d}')
+            for i in range(520)
+        ])
+
+    def setUp(self):
+        caches['dossiers'].clear()
+        self.api = APIClient()
+        self.api.force_authenticate(self.personnel)
+
+    def test_taille_de_page_bornee(self):
+        reponse = self.api.get('/api/v1/patients/', {'page_size': 10000})
+        self.assertEqual(reponse.status_code, 200)
+        corps = reponse.json()
+        self.assertEqual(len(corps['results']), BaseCursorPagination.max_page_size)
+        self.assertIsNotNone(corps['next'])
+        self.assertEqual(len(self.api.get(corps['next']).json()['results']), 20)
+        self.assertEqual(len(self.api.get('/api/v1/patients/', {'page_size': 7}).json()['results']), 7)
+
+    def test_ni_count_ni_offset(self):
+        for rapide in (True, False):
+            with self.subTest(rapide=rapide), override_settings(API_LISTES_RAPIDES=rapide):
+                with CaptureQueriesContext(connection) as requetes:
+                    premiere = self.api.get('/api/v1/patients/', {'page_size': 100}).json()
+                    self.api.get(premiere['next'])
+                sql = ' '.join(requete['sql'].upper() for requete in requetes.captured_queries)
+                self.assertNotIn('COUNT(', sql)
+                self.assertNotIn('OFFSET', sql)
+                self.assertIn('LIMIT 101', sql)  # page_size + 1 : présence d'une page suivante
+
+
+# ----------------------------------------------------------------------
+# RECHERCHE DE PATIENTS (users/recherche.py)
+# ----------------------------------------------------------------------
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class RecherchePatientsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.personnel = Patient.objects.create(first_name='Dr', last_name='Essomba', telephone='690000100', is_personnel=True)
+        cls.ngono = [
+            Patient.objects.create(first_name=f'Marie {i}', last_name='Ngono', telephone=f'+237 6 91 00 {i:04d}')
+            for i in range(215)
+        ]
+        cls.emilie = Patient.objects.create(first_name='Émilie-Noëlle', last_name='Atangana', telephone='677 12 34 56')
+
+    def setUp(self):
+        caches['dossiers'].clear()
+        self.api = APIClient()
+        self.api.force_authenticate(self.personnel)
+
+    def chercher(self, texte):
+        resultats = recherche.filtrer(Patient.objects.all(), [texte])
+        return list(resultats.order_by('rang_recherche', 'id').values_list('id', flat=True))
+
+    def parcourir(self, url, params=None, lien='next'):
+        ids = []
+        while url:
+            reponse = self.api.get(url, params)
+            self.assertEqual(reponse.status_code, 200)
+            corps = reponse.json()
+            ids.extend(resultat['id'] for resultat in corps['results'])
+            url, params = corps[lien], None
+        return ids
+
+    def test_normalisation(self):
+        self.assertEqual(recherche.normaliser('Émilie-Noëlle'), 'emilie noelle')
+        self.assertEqual(recherche.normaliser(None), '')
+        self.assertEqual(recherche.chiffres_telephone('+237 6 90 12 34 56'), ['237690123456', '690123456'])
+        self.assertEqual(recherche.chiffres_telephone('690 12 34 56'), ['690123456'])
+        self.assertEqual(recherche.chiffres_telephone(''), [])
+        self.assertEqual(recherche.termes(['Jean-Paul', 'ÉTOGA']), ['jean', 'paul', 'etoga'])
+        self.emilie.refresh_from_db()
+        document = self.emilie.index_recherche
+        self.assertIn('emilie noelle', document)
+        self.assertIn('atangana', document)
+        self.assertIn('677123456', document)
+
+    def test_index_suit_les_enregistrements(self):
+        self.assertEqual(self.chercher('noelle'), [self.emilie.pk])
+        self.emilie.last_name = 'Mbarga'
+        self.emilie.save()
+        self.assertEqual(self.chercher('atangana'), [])
+        self.assertEqual(self.chercher('mbarga'), [self.emilie.pk])
+        Patient.objects.filter(pk=self.emilie.pk).update(first_name='Brigitte')  # update() ne passe pas par save()
+        self.assertEqual(self.chercher('mbarga'), [self.emilie.pk])
+        self.emilie.delete()
+        self.assertEqual(self.chercher('mbarga'), [])
+
+    def test_recherche_par_sous_chaine_et_telephone(self):
+        self.assertEqual(self.chercher('tanga'), [self.emilie.pk])
+        self.assertEqual(self.chercher('Emilie ata'), [self.emilie.pk])
+        self.assertEqual(self.chercher('+237 677 12'), [])  # indicatif absent du numéro enregistré
+        self.assertEqual(self.chercher('77 12 34'), [self.emilie.pk])  # un terme par groupe de chiffres
+        self.assertEqual(self.chercher('7712'), [self.emilie.pk])
+        self.assertEqual(len(self.chercher('ngono')), 215)
+
+    def test_classement_annote_les_rangs(self):
+        ids = self.chercher('ngono')
+        self.assertEqual(sorted(ids), sorted(p.pk for p in self.ngono))
+        rangs = dict(recherche.filtrer(Patient.objects.all(), ['Ngono Marie']).values_list('pk', 'rang_recherche'))
+        self.assertEqual(set(rangs), set(ids))
+        self.assertTrue(all(isinstance(rang, float) for rang in rangs.values()))
+
+    def test_page_lue_par_keyset_en_sql(self):
+        for backend in ('fts5', 'simple'):
+            with self.subTest(backend=backend), override_settings(RECHERCHE_PATIENTS_BACKEND=backend):
+                premiere = self.api.get('/api/v1/patients/', {'search': 'ngono', 'page_size': 40}).json()
+                with CaptureQueriesContext(connection) as requetes:
+                    self.api.get(premiere['next'])
+                sql = ' '.join(requete['sql'].upper() for requete in requetes.captured_queries)
+                # Ni liste complète des résultats ni OFFSET : (rang, id) > position, LIMIT page_size + 1
+                self.assertIn('LIMIT 41', sql)
+                self.assertNotIn('OFFSET', sql)
+                self.assertNotIn('COUNT(', sql)
+
+    def test_pagination_au_dela_de_deux_cents_resultats(self):
+        for backend in ('fts5', 'simple'):
+            with self.subTest(backend=backend), override_settings(RECHERCHE_PATIENTS_BACKEND=backend):
+                ids = self.parcourir('/api/v1/patients/', {'search': 'ngono', 'page_size': 40})
+                self.assertEqual(ids, self.chercher('ngono'))
+                self.assertEqual(len(ids), 215)
+
+    def test_pagination_en_arriere(self):
+        reponse = self.api.get('/api/v1/patients/', {'search': 'ngono', 'page_size': 50})
+        for _ in range(3):
+            reponse = self.api.get(reponse.json()['next'])
+        derniere = [resultat['id'] for resultat in reponse.json()['results']]
+        precedentes = self.parcourir(reponse.json()['previous'], lien='previous')
+        ids = self.chercher('ngono')
+        self.assertEqual(derniere, ids[150:200])
+        # chaque page est rendue dans l'ordre ; les pages se succèdent à rebours
+        self.assertEqual(sorted(precedentes), sorted(ids[:150]))
+        self.assertEqual(precedentes[:50], ids[100:150])
+
+    def test_curseur_invalide(self):
+        curseur = base64.b64encode(b'p=abc').decode()  # position non numérique
+        reponse = self.api.get('/api/v1/patients/', {'search': 'ngono', 'cursor': curseur})
+        self.assertEqual(reponse.status_code, 404)
+
+
+# ----------------------------------------------------------------------
+# AUTOCOMPLÉTION DE L'ACCUEIL (users/autocompletion.py)
+# ----------------------------------------------------------------------
+
+class AutocompletionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.personnel = Patient.objects.create(first_name='Dr', last_name='Ngono', telephone='690000500', is_personnel=True)
+        cls.marie = Patient.objects.create(first_name='Marie-Thérèse', last_name='Ngono', telephone='+237 6 90 12 34 56')
+        cls.paul = Patient.objects.create(first_name='Paul', last_name='Ngoa', telephone='677000001')
+
+    def setUp(self):
+        self.index = autocompletion.IndexPrefixes()
+
+    def ids(self, requete):
+        return [pk for pk, _, _ in self.index.suggerer(requete)]
+
+    def test_prefixes(self):
+        self.index.construire()
+        self.assertCountEqual(self.ids('ngo'), [self.marie.pk, self.paul.pk])
+        self.assertEqual(self.ids('Thérè'), [self.marie.pk])
+        self.assertEqual(self.ids('marie therese ngo'), [self.marie.pk])
+        self.assertEqual(self.ids('ngono marie'), [self.marie.pk])
+        self.assertEqual(self.ids(self.paul.username.lower()), [self.paul.pk])
+        self.assertEqual(self.ids('690 12 34'), [self.marie.pk])  # sans indicatif
+        self.assertEqual(self.ids('+237 690'), [self.marie.pk])
+        self.assertEqual(self.ids('xyz'), [])
+        self.assertEqual(self.index.suggerer('ngoa'), [(self.paul.pk, 'Paul Ngoa', self.paul.username)])
+
+    def test_personnel_exclu(self):
+        self.index.construire()
+        self.assertNotIn(self.personnel.pk, self.ids('dr'))
+        self.paul.is_personnel = True
+        self.index.mettre_a_jour([self.paul])
+        self.assertEqual(self.ids('ngo'), [self.marie.pk])
+
+    def test_ecritures_pendant_la_reconstruction_rejouees(self):
+        lire = self.index._lignes
+        nouveau = Patient(pk=10_000, first_name='Awa', last_name='Bella', username='PAT-10000', telephone='')
+
+        def lignes_puis_ecritures(**filtres):
+            lignes = list(lire(**filtres))
+            # Écritures d'autres requêtes validées après la lecture, avant l'installation du nouvel index
+            self.index.mettre_a_jour([nouveau])
+            self.index.retirer([self.paul.pk])
+            return lignes
+
+        with mock.patch.object(self.index, '_lignes', lignes_puis_ecritures):
+            self.index.construire()
+        self.assertEqual(self.ids('bella'), [nouveau.pk])
+        self.assertEqual(self.ids('ngo'), [self.marie.pk])
+        self.assertIsNone(self.index._journal)
+
+    @override_settings(AUTOCOMPLETION_PATIENTS_RECONSTRUCTION=60)
+    def test_reconstruction_en_echec_non_relancee_a_chaque_frappe(self):
+        self.index.construire()
+        self.index._construit -= 120
+        with mock.patch('users.autocompletion.threading.Thread') as thread:
+            self.ids('ngo')
+            self.ids('ngon')
+            self.ids('ngono')
+        thread.assert_called_once()
+        self.assertEqual(self.ids('ngono'), [self.marie.pk])  # l'index courant reste servi
+
+
+# ----------------------------------------------------------------------
+# FILE DES ALERTES ET SEUILS PAR PATIENT (AlerteViewSet, PatientViewSet.seuils)
+# ----------------------------------------------------------------------
+
+class AlertesAPITests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.personnel = Patient.objects.create(first_name='Dr', last_name='Essomba', telephone='690000600', is_personnel=True)
+        cls.awa = Patient.objects.create(first_name='Awa', telephone='690000601')
+        cls.paul = Patient.objects.create(first_name='Paul', telephone='690000602')
+        maintenant = timezone.now()
+        cls.critique, cls.attention, cls.autre = [
+            Alerte.objects.create(
+                patient=patient, releve=ReleveVital.objects.create(patient=patient, date_releve=maintenant - timedelta(hours=h)),
+                date_releve=maintenant - timedelta(hours=h), metrique='glycemie', regle=regle, niveau=niveau,
+                valeur=3.1, seuil=2.5,
+            )
+            for patient, h, regle, niveau in ((cls.awa, 1, 'max', 'C'), (cls.awa, 2, 'variation', 'A'), (cls.paul, 3, 'max', 'C'))
+        ]
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.personnel)
+
+    def ids(self, **params):
+        reponse = self.api.get('/api/v1/alertes/', params)
+        self.assertEqual(reponse.status_code, 200)
+        return [alerte['id'] for alerte in reponse.json()['results']]
+
+    def test_file_et_filtres(self):
+        self.assertEqual(self.ids(), [self.critique.pk, self.attention.pk, self.autre.pk])  # plus récentes d'abord
+        self.assertEqual(self.ids(niveau='C'), [self.critique.pk, self.autre.pk])
+        self.assertEqual(self.ids(patient_id=self.awa.pk), [self.critique.pk, self.attention.pk])
+        self.assertEqual(self.ids(niveau='A', patient_id=self.paul.pk), [])
+        self.assertEqual(self.ids(statut='T'), [])
+
+    def test_prise_en_charge(self):
+        url = f'/api/v1/alertes/{self.critique.pk}/'
+        reponse = self.api.patch(url, {'statut': 'T', 'valeur': 0, 'niveau': 'A'}, format='json')
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(reponse.json()['traitee_par'], self.personnel.pk)
+        self.assertIsNotNone(reponse.json()['date_traitement'])
+        self.critique.refresh_from_db()
+        self.assertEqual((self.critique.statut, self.critique.valeur, self.critique.niveau), ('T', 3.1, 'C'))  # seul le statut change
+        self.assertEqual(self.ids(), [self.attention.pk, self.autre.pk])
+        self.assertEqual(self.ids(statut='T'), [self.critique.pk])
+        self.assertEqual(self.api.get(url).status_code, 200)  # toujours accessible par son id
+        # Remise en file : la prise en charge est effacée
+        reponse = self.api.patch(url, {'statut': 'N'}, format='json')
+        self.assertEqual((reponse.json()['traitee_par'], reponse.json()['date_traitement']), (None, None))
+        self.assertEqual(self.api.patch(url, {'statut': 'X'}, format='json').status_code, 400)
+        self.assertEqual(self.api.put(url, {'statut': 'T'}, format='json').status_code, 405)
+        self.assertEqual(self.api.delete(url).status_code, 405)
+
+    def test_reserve_au_personnel(self):
+        self.api.force_authenticate(self.awa)
+        self.assertEqual(self.api.get('/api/v1/alertes/').status_code, 403)
+        self.assertEqual(self.api.patch(f'/api/v1/alertes/{self.critique.pk}/', {'statut': 'T'}, format='json').status_code, 403)
+        self.assertEqual(self.api.get(f'/api/v1/patients/{self.awa.pk}/seuils/').status_code, 403)
+
+    @override_settings(ALERTES_SEUILS_DEFAUT={'glycemie': {'min': 0.7, 'max': 2.5, 'variation': 1.0}})
+    def test_seuils(self):
+        url = f'/api/v1/patients/{self.awa.pk}/seuils/'
+        corps = self.api.get(url).json()
+        self.assertEqual((corps['patient'], corps['regles']), (self.awa.pk, {}))
+        self.assertEqual(corps['defauts'], {'glycemie': {'min': 0.7, 'max': 2.5, 'variation': 1.0}})
+
+        regles = {'glycemie': {'max': 2.0, 'reference': 1.1, 'ecart': 0.5}, 'poids': {'variation': None}}
+        reponse = self.api.put(url, {'regles': regles}, format='json')
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(SeuilsAlerte.objects.get(patient=self.awa).regles, regles)
+        self.assertEqual(self.api.get(url).json()['regles'], regles)
+
+        for invalides in ({'pouls': {'max': 1}}, {'glycemie': {'max': 'haut'}}, {'glycemie': {'ecart': 0.5}}):
+            self.assertEqual(self.api.put(url, {'regles': invalides}, format='json').status_code, 400, invalides)
+        self.assertEqual(SeuilsAlerte.objects.get(patient=self.awa).regles, regles)
+        self.assertEqual(self.api.get(f'/api/v1/patients/{self.personnel.pk}/seuils/').status_code, 404)
+
+
+# ----------------------------------------------------------------------
+# LECTURES DU DOSSIER EN CACHE (LectureDossierMixin, medical_data/versions.py)
+# ----------------------------------------------------------------------
+
+class CacheDossierTests(TestCase):
+    """Une lecture répétée ne touche pas la base ; toute écriture sur le dossier l'invalide."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.personnel = Patient.objects.create(first_name='Dr', last_name='Essomba', telephone='690000800', is_personnel=True)
+        cls.awa = Patient.objects.create(first_name='Awa', telephone='690000801')
+        cls.paul = Patient.objects.create(first_name='Paul', telephone='690000802')
+        DetailsPatient.objects.create(patient=cls.awa, allergies='Pénicilline')
+        ReleveVital.objects.create(patient=cls.awa, tension_systolique=120, tension_diastolique=80)
+        Suivi.objects.create(patient=cls.awa, motif='Contrôle', notes_medecin='RAS')
+        RendezVous.objects.create(patient=cls.awa, date_heure=timezone.now() + timedelta(days=1), motif='Contrôle')
+
+    def setUp(self):
+        caches['dossiers'].clear()
+        self.api = APIClient()
+        self.api.force_authenticate(self.personnel)
+        self.urls = [
+            (f'/api/v1/patients/{self.awa.pk}/', {}),
+            ('/api/v1/suivis/', {'patient_id': self.awa.pk}),
+            ('/api/v1/rendezvous/', {'patient_id': self.awa.pk}),
+        ]
+
+    def lire(self, url, params):
+        reponse = self.api.get(url, params)
+        self.assertEqual(reponse.status_code, 200)
+        return reponse.json()
+
+    def verifier_invalidation(self, ecriture):
+        for url, params in self.urls:
+            self.lire(url, params)
+        with self.captureOnCommitCallbacks(execute=True):
+            ecriture()
+        for url, params in self.urls:
+            with self.subTest(url=url), CaptureQueriesContext(connection) as requetes:
+                self.lire(url, params)
+            self.assertTrue(requetes.captured_queries, url)
+
+    def test_seconde_lecture_sans_requete(self):
+        for url, params in self.urls:
+            with self.subTest(url=url):
+                premiere = self.lire(url, params)
+                with self.assertNumQueries(0):
+                    self.assertEqual(self.lire(url, params), premiere)
+
+    def test_ecriture_sur_un_autre_dossier(self):
+        for url, params in self.urls:
+            self.lire(url, params)
+        with self.captureOnCommitCallbacks(execute=True):
+            Suivi.objects.create(patient=self.paul, motif='Contrôle', notes_medecin='RAS')
+            self.paul.save()
+        for url, params in self.urls:
+            with self.subTest(url=url), self.assertNumQueries(0):
+                self.lire(url, params)
+
+    def test_invalidation_par_patient(self):
+        def ecriture():
+            self.awa.first_name = 'Awa-Marie'
+            self.awa.save()
+
+        self.verifier_invalidation(ecriture)
+        self.assertEqual(self.lire(*self.urls[0])['first_name'], 'Awa-Marie')
+
+    def test_invalidation_par_details(self):
+        self.verifier_invalidation(lambda: DetailsPatient.objects.filter(pk=self.awa.pk).get().save())
+
+    def test_invalidation_par_releve(self):
+        self.verifier_invalidation(
+            lambda: ReleveVital.objects.create(patient=self.awa, tension_systolique=150, tension_diastolique=95)
+        )
+        self.assertEqual(self.lire(*self.urls[0])['last_vital_signs']['tension_systolique'], 150)
+
+    def test_invalidation_par_suivi(self):
+        self.verifier_invalidation(lambda: Suivi.objects.create(patient=self.awa, motif='Fièvre', notes_medecin='RAS'))
+        self.assertEqual(len(self.lire(*self.urls[1])['results']), 2)
+
+    def test_invalidation_par_rendez_vous(self):
+        self.verifier_invalidation(
+            lambda: RendezVous.objects.create(patient=self.awa, date_heure=timezone.now() + timedelta(days=2), motif='Bilan')
+        )
+        self.assertEqual(len(self.lire(*self.urls[2])['results']), 2)
+
+
+# ----------------------------------------------------------------------
+# IMPORT EN MASSE (users/importation.py)
+# ----------------------------------------------------------------------
+
+def fichier_texte(contenu):
+    return ouvrir_texte(io.BytesIO(contenu.encode('utf-8')))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportationTests(TestCase):
+
+    CSV = (
+        "first_name,last_name,email,date_naissance,telephone,numero_patient,allergies,contact_urgence_lien\n"
+        "Awa,Mbida,awa@exemple.cm,1990-04-01,690000501,,Pénicilline,Parent\n"
+        "Paul,Biya,pas-un-email,1985-13-40,690000502,,,\n"
+        "Ines,Kamga,,,690000503,NUM-1,,\n"
+        "Jean,Kamga,,,690000504,NUM-1,,\n"
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.personnel = Patient.objects.create(first_name='Dr', last_name='Essomba', telephone='690000100', is_personnel=True)
+
+    def importer(self, contenu, format_fichier='csv', **kwargs):
+        with ServiceHachage(processus=1) as hachage:
+            return importer_patients(lire_lignes(fichier_texte(contenu), format_fichier), hachage=hachage, **kwargs)
+
+    def test_lecture_csv(self):
+        lignes = list(lire_lignes(fichier_texte(self.CSV)))
+        self.assertEqual([numero for numero, _ in lignes], [2, 3, 4, 5])
+        self.assertEqual(lignes[0][1]['first_name'], 'Awa')
+
+    def test_lecture_ndjson(self):
+        lignes = list(lire_lignes(fichier_texte('{"first_name": "Awa"}\n\n{invalide\n[1, 2]\n'), 'ndjson'))
+        self.assertEqual([numero for numero, _ in lignes], [1, 3, 4])
+        self.assertEqual(lignes[0][1], {'first_name': 'Awa'})
+        self.assertIsInstance(lignes[1][1], ValueError)
+        self.assertIsInstance(lignes[2][1], ValueError)
+        self.assertEqual(deviner_format('patients.NDJSON'), 'ndjson')
+        self.assertEqual(deviner_format('patients.csv'), 'csv')
+
+    def test_erreurs_par_ligne(self):
+        rapport = self.importer(self.CSV, taille_lot=2)
+        self.assertEqual((rapport.lignes_lues, rapport.patients_crees, rapport.nb_erreurs), (4, 2, 2))
+        erreurs = dict(rapport.erreurs)
+        self.assertEqual(set(erreurs), {3, 5})
+        self.assertIn('email', erreurs[3])
+        self.assertIn('date_naissance', erreurs[3])
+        self.assertIn('numero_patient', erreurs[5])
+
+        awa = Patient.objects.get(telephone='690000501')
+        self.assertEqual(awa.username, f'PAT-{awa.pk:05d}')
+        self.assertEqual(awa.details_dossier.allergies, 'Pénicilline')
+        self.assertEqual(awa.details_dossier.contact_urgence_lien, 'PR')
+        self.assertTrue(awa.numero_patient)
+
+    def test_rapport(self):
+        rapport = self.importer('{"first_name": "Awa", "telephone": "690000501"}\nnon json\n', 'ndjson')
+        donnees = rapport.as_dict()
+        self.assertEqual(donnees['lignes_lues'], 2)
+        self.assertEqual(donnees['patients_crees'], 1)
+        self.assertEqual(donnees['nb_erreurs'], 1)
+        self.assertEqual(donnees['erreurs'][0]['ligne'], 2)
+        self.assertNotIn('identifiants', donnees)
+        self.assertGreaterEqual(donnees['duree_s'], 0)
+
+        tronque = RapportImport(max_erreurs=1)
+        tronque.ajouter_erreur(1, {})
+        tronque.ajouter_erreur(2, {})
+        self.assertEqual((tronque.nb_erreurs, len(tronque.erreurs)), (2, 1))
+
+    def test_identifiants_transmis_par_lot(self):
+        lots = []
+        self.importer(self.CSV, taille_lot=1, identifiants=lots.append)
+        self.assertEqual(len(lots), 2)  # un appel par lot inséré, aucun pour les lignes rejetées
+        for (username, mot_de_passe), in lots:
+            self.assertTrue(Patient.objects.get(username=username).check_password(mot_de_passe))
+
+    def test_lot_rejete_par_la_base(self):
+        # Clé déjà prise (import concurrent sur SQLite) : le lot est compté en erreur, l'import continue
+        reserver_ids = importation._reserver_ids
+        appels = iter([lambda n: [self.personnel.pk] * n])
+        with mock.patch.object(importation, '_reserver_ids', lambda n: next(appels, reserver_ids)(n)):
+            lots = []
+            rapport = self.importer(self.CSV, taille_lot=1, identifiants=lots.append)
+        self.assertEqual((rapport.patients_crees, rapport.nb_erreurs), (1, 3))
+        self.assertIn('lot', dict(rapport.erreurs)[2])
+        self.assertFalse(Patient.objects.filter(telephone='690000501').exists())
+        self.assertTrue(Patient.objects.filter(telephone='690000503').exists())
+        self.assertEqual(len(lots), 1)
+
+    def test_api_identifiants_sur_demande(self):
+        api = APIClient()
+        api.force_authenticate(self.personnel)
+        contenu = "first_name,telephone\nAwa,690000501\n"
+        reponse = api.post('/api/v1/patients/import/', {'fichier': io.BytesIO(contenu.encode())})
+        self.assertEqual(reponse.status_code, 201)
+        self.assertEqual(reponse.json()['patients_crees'], 1)
+        self.assertNotIn('identifiants', reponse.json())
+
+        fichier = io.BytesIO(contenu.replace('501', '502').encode())
+        fichier.name = 'patients.csv'
+        reponse = api.post('/api/v1/patients/import/', {'fichier': fichier, 'identifiants': '1'})
+        self.assertEqual(reponse.status_code, 201)
+        self.assertEqual([i['username'] for i in reponse.json()['identifiants']], [
+            Patient.objects.get(telephone='690000502').username,
+        ])
+
+
+# ----------------------------------------------------------------------
+# HACHAGE DES MOTS DE PASSE (users/hachage.py)
+# ----------------------------------------------------------------------
+
+class HachageTests(TestCase):
+
+    def test_ordre_des_hashes_avec_pool(self):
+        mots_de_passe = [f'secret{i}' for i in range(SEUIL_POOL * 2 + 3)]  # tranches inégales
+        with ServiceHachage(processus=3, differe=True) as hachage:
+            hashes = hachage.hacher_lot(iter(mots_de_passe))
+            self.assertIsNotNone(hachage._pool)
+        self.assertIsNone(hachage._pool)
+        self.assertEqual(len(hashes), len(mots_de_passe))
+        for mot_de_passe, hash_ in zip(mots_de_passe, hashes):
+            self.assertTrue(check_password(mot_de_passe, hash_))
+
+    def test_petit_lot_en_serie(self):
+        with ServiceHachage(processus=4, differe=True) as hachage:
+            hashes = hachage.hacher_lot(['a', 'b'])
+            self.assertIsNone(hachage._pool)
+        self.assertTrue(check_password('b', hashes[1]))
+
+    @override_settings(HACHAGE_ITERATIONS_DIFFEREES=1000)
+    def test_hash_differe_mis_a_niveau_a_la_connexion(self):
+        hash_ = ServiceHachage(processus=1, differe=True).hacher_lot(['secret'])[0]
+        self.assertEqual(hash_.split('$')[1], '1000')
+        patient = Patient.objects.create(first_name='Awa', telephone='690000600', password=hash_)
+        self.assertEqual(patient.password, hash_)  # conservé par Patient.save()
+
+        self.assertTrue(patient.check_password('secret'))
+        patient.refresh_from_db()
+        self.assertEqual(patient.password.split('$')[1], str(PBKDF2PasswordHasher.iterations))
+        self.assertTrue(patient.check_password('secret'))
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_import_http_sans_pool(self):
+        personnel = Patient.objects.create(first_name='Dr', telephone='690000100', is_personnel=True)
+        api = APIClient()
+        api.force_authenticate(personnel)
+        with mock.patch('users.hachage.ProcessPoolExecutor') as pool:
+            contenu = ''.join(f"Patient{i},6900007{i:02d}\n" for i in range(SEUIL_POOL + 1))
+            reponse = api.post('/api/v1/patients/import/', {'fichier': io.BytesIO(b'first_name,telephone\n' + contenu.encode())})
+        self.assertEqual(reponse.status_code, 201)
+        self.assertEqual(reponse.json()['patients_crees'], SEUIL_POOL + 1)
+        pool.assert_not_called()
+
+
+# ----------------------------------------------------------------------
+# LISTES EN LECTURE RAPIDE (users/api/rapide.py)
+# ----------------------------------------------------------------------
+
+class ListesRapidesTests(TestCase):
+    """Le chemin values_list doit produire exactement le JSON des sérialiseurs DRF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.personnel = Patient.objects.create(first_name='Dr', last_name='Essomba', telephone='690000100', is_personnel=True)
+        maintenant = timezone.now()
+        cls.patients = []
+        for i in range(4):
+            patient = Patient.objects.create(
+                first_name=f'Émilie {i}', last_name='Ngono', telephone=f'69000030{i}', email=f'p{i}@exemple.cm' if i % 2 else None,
+                adresse='Yaoundé' if i else None, date_naissance=timezone.localdate() - timedelta(days=9000 + i),
+                groupe_sanguin='O+' if i % 2 else None,
+            )
+            cls.patients.append(patient)
+            if i != 3:  # un patient sans DetailsPatient
+                DetailsPatient.objects.create(patient=patient, taille_cm=160 + i, allergies='Pénicilline' if i else '')
+            for j in range(i):  # le premier patient n'a aucun relevé
+                ReleveVital.objects.create(
+                    patient=patient, tension_systolique=120 + j, tension_diastolique=80,
+                    glycemie=Decimal('1.05') if j else None, poids=Decimal('70.5'),
+                )
+            Suivi.objects.create(patient=patient, motif=f'Motif {i}', notes_medecin='RAS <b>', prescriptions=None if i else 'Paracétamol')
+            RendezVous.objects.create(
+                patient=patient, date_heure=maintenant + timedelta(days=1, hours=i), motif='Contrôle',
+                statut='PCAT'[i], praticien=cls.personnel if i % 2 else None,
+            )
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.personnel)
+
+    def comparer(self, url, **params):
+        reponses = {}
+        for rapide in (False, True):
+            caches['dossiers'].clear()
+            with override_settings(API_LISTES_RAPIDES=rapide):
+                reponses[rapide] = self.api.get(url, params)
+            self.assertEqual(reponses[rapide].status_code, 200, (url, params))
+        self.assertEqual(reponses[True].content, reponses[False].content, (url, params))
+
+    def test_liste_patients(self):
+        self.comparer('/api/v1/patients/')
+        self.comparer('/api/v1/patients/', page_size=2)
+        self.comparer('/api/v1/patients/', search='emilie')
+
+    def test_liste_suivis(self):
+        self.comparer('/api/v1/suivis/')
+        self.comparer('/api/v1/suivis/', page_size=2)
+        self.comparer('/api/v1/suivis/', patient_id=self.patients[1].pk)
+
+    def test_liste_rendez_vous(self):
+        self.comparer('/api/v1/rendezvous/')
+        self.comparer('/api/v1/rendezvous/', patient_id=self.patients[2].pk)
+        self.comparer('/api/v1/rendezvous/', date=timezone.localdate().isoformat(), vue='mois')
+
+    def test_champs_restreints(self):
+        self.comparer('/api/v1/patients/', fields='id,first_name,last_vital_signs')
+        self.comparer('/api/v1/patients/', omit='last_vital_signs,allergies')
+        self.comparer('/api/v1/rendezvous/', fields='id,patient_name,date_heure')
+
+    def test_page_suivante(self):
+        with override_settings(API_LISTES_RAPIDES=True):
+            suivante = self.api.get('/api/v1/suivis/', {'page_size': 2}).json()['next']
+        self.comparer(suivante)
+
+    def test_champ_calcule_sans_version_par_lot(self):
+        # Sans Meta.calculs_rapides pour un champ calculé, la liste passe par le sérialiseur
+        class SansCalcul(PatientSerializer):
+            class Meta(PatientSerializer.Meta):
+                calculs_rapides = {}
+
+        self.assertIsNone(lecture(SansCalcul))
+        self.assertIsNotNone(lecture(SansCalcul, ('id', 'first_name')))
+
+
+# ----------------------------------------------------------------------
+# RENDU ET LECTURE JSON (centre/renderers.py, centre/parsers.py)
+# ----------------------------------------------------------------------
+
+DONNEES_JSON = [
+    {'date_suivi': datetime(2026, 3, 1, 8, 30, 0, 123456, tzinfo=dt_timezone.utc)},
+    {'date_heure': datetime(2026, 1, 5, 10, 0, tzinfo=zoneinfo.ZoneInfo('Europe/London'))},
+    {'date_heure': datetime(2026, 7, 5, 10, 0, tzinfo=zoneinfo.ZoneInfo('Africa/Douala'))},
+    {'naive': datetime(2026, 7, 5, 10, 0), 'jour': date(2026, 7, 5), 'heure': time(9, 15, 0, 10)},
+    {'glycemie': Decimal('1.46'), 'poids': Decimal('70.50'), 'taille': Decimal('0'), 'flottant': 0.1 + 0.2},
+    {'numero_patient': uuid.UUID('12345678-1234-5678-1234-567812345678'), 'uuid': uuid.uuid4()},
+    {'notes': 'Émilie « RAS » <b>\n\t\x00\x1f\x7f "cité" \\ / 😀 \u2028 \u2029'},
+    {1: 'clé entière', None: 'nulle', 2.5: 'flottante'},
+    {'duree': timedelta(minutes=90), 'octets': b'abc', 'paresseux': gettext_lazy('Patient')},
+    {'grand': 2 ** 64, 'limite': 2 ** 63 - 1, 'negatif': -2 ** 63},
+    {'tuple': (1, 2), 'ensemble': {3}, 'imbrique': [{'a': [None, True, False, []]}, {}]},
+    ReturnList([ReturnDict({'id': 1, 'motif': 'Contrôle'}, serializer=None)], serializer=None),
+    [], {}, 0, 'texte', None,
+]
+
+
+class RenduJSONTests(SimpleTestCase):
+    """ORJSONRenderer produit les mêmes octets que JSONRenderer, avec ou sans orjson."""
+
+    def verifier(self, donnees, **kwargs):
+        self.assertEqual(ORJSONRenderer().render(donnees, **kwargs), JSONRenderer().render(donnees, **kwargs), donnees)
+
+    def test_parite(self):
+        for donnees in DONNEES_JSON:
+            self.verifier(donnees)
+
+    def test_indentation(self):
+        for donnees in DONNEES_JSON:
+            self.verifier(donnees, accepted_media_type='application/json; indent=4')
+            self.verifier(donnees, renderer_context={'indent': 2})
+
+    def test_sans_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.test_parite()
+
+    def test_erreurs_identiques(self):
+        for donnees in [{'heure': time(9, 0, tzinfo=dt_timezone.utc)}, {'objet': object()}]:
+            with self.assertRaises(Exception) as attendue:
+                JSONRenderer().render(donnees)
+            with self.assertRaises(type(attendue.exception)):
+                ORJSONRenderer().render(donnees)
+
+    def test_flottants_en_notation_exponentielle(self):
+        # Seule différence d'écriture admise : même valeur une fois relue
+        donnees = {'grand': 1e16, 'petit': 1e-05, 'normal': 1234.5}
+        self.assertEqual(json.loads(ORJSONRenderer().render(donnees)), json.loads(JSONRenderer().render(donnees)))
+
+
+class LectureJSONTests(SimpleTestCase):
+    """ORJSONParser lit les mêmes valeurs et lève les mêmes erreurs que JSONParser."""
+    CORPS = [
+        b'{"motif": "Contr\xc3\xb4le", "glycemie": 1.46, "ids": [1, 2, 3], "ok": true, "rien": null}',
+        b'  [1e2, -0, -0.0, 0.1, 1.0e-5, 9223372036854775807]  ',
+        b'{"a": 1, "a": 2}', b'"texte"', b'123',
+        b'{"x": "\\u00e9\\ud83d\\ude00", "nul": "\\u0000"}',
+        b'[18446744073709551616, 123456789012345678901234567890]',
+        b'["\\ud800"]', b'[1e400]',
+        b'', b'[1,]', b'{"a": 1}x', b'[NaN]', b'[Infinity]', b'["\xff"]', b'\xef\xbb\xbf{"a": 1}', b'["a\x01b"]',
+    ]
+
+    def lire(self, parser, corps):
+        try:
+            return 'valeur', repr(parser.parse(io.BytesIO(corps)))
+        except ParseError as erreur:
+            return 'erreur', str(erreur.detail)
+
+    def test_parite(self):
+        for corps in self.CORPS:
+            self.assertEqual(self.lire(ORJSONParser(), corps), self.lire(JSONParser(), corps), corps)
+
+    def test_sans_orjson(self):
+        with mock.patch.object(parsers, 'orjson', None):
+            self.test_parite()
+
+    def test_autre_encodage(self):
+        corps = '{"nom": "Émilie"}'.encode('latin-1')
+        contexte = {'encoding': 'latin-1'}
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(corps), parser_context=contexte), {'nom': 'Émilie'})
+
+
+class APIJSONTests(ListesRapidesTests):
+    """Réponses réelles de l'API : mêmes octets avec les deux renderers."""
+
+    def comparer(self, url, **params):
+        reponse = self.api.get(url, params)
+        self.assertEqual(reponse.status_code, 200, (url, params))
+        self.assertEqual(ORJSONRenderer().render(reponse.data), JSONRenderer().render(reponse.data), (url, params))
+
+    def test_corps_json_lu_par_orjson(self):
+        reponse = self.api.post(
+            '/api/v1/suivis/', json.dumps({'patient': self.patients[0].pk, 'motif': 'Fièvre', 'notes_medecin': 'T° 39,2'}),
+            content_type='application/json',
+        )
+        self.assertEqual(reponse.status_code, 201, reponse.content)
+        self.assertEqual(reponse.json()['motif'], 'Fièvre')